@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк операций с реле: p50/p95/p99 задержки и операций в секунду.
+
+Без оборудования (локальный эмулятор, мгновенные ответы / с временем RS485):
+    python3 scripts/bench.py --local --output bench.json
+    python3 scripts/bench.py --local --realistic --slaves 1 2 3 4
+    python3 scripts/bench.py --local --transports raw-tcp rtu --baud 115200
+    python3 scripts/bench.py --local --realistic --transports raw-tcp rtu-tcp
+С Gateway и сравнением с прошлым прогоном:
+    python3 scripts/bench.py --host 192.168.1.254 --slaves 1 2 --compare bench.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bench import OPERATIONS, compare, run_suite
+from src.emulator import LocalServer, RtuResponder, RtuTcpServer, SerialTiming, WaveshareEmulator
+from src.transport import TRANSPORT_KINDS, open_transport
+
+
+def print_results(report):
+    print(f'{"транспорт":10}{"slave":>6}  {"операция":9}{"p50, мс":>10}{"p95, мс":>10}'
+          f'{"p99, мс":>10}{"оп/с":>10}')
+    for transport_name, per_slave in report['results'].items():
+        for slave_id, per_op in per_slave.items():
+            for name, stats in per_op.items():
+                print(f'{transport_name:10}{slave_id:>6}  {name:9}{stats["p50_ms"]:10.2f}'
+                      f'{stats["p95_ms"]:10.2f}{stats["p99_ms"]:10.2f}{stats["ops_per_sec"]:10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='192.168.1.254')
+    parser.add_argument('--port', type=int, default=502)
+    parser.add_argument('--local', action='store_true',
+                        help='Запустить локальный эмулятор вместо Gateway')
+    parser.add_argument('--realistic', action='store_true',
+                        help='Эмулятор с моделью времени RS485 (вместе с --local)')
+    parser.add_argument('--baud', type=int, default=9600,
+                        help='Скорость RS485 для --realistic и транспорта rtu')
+    parser.add_argument('--device', default='/dev/ttyCH343USB0',
+                        help='Порт USB-RS485 для транспорта rtu')
+    parser.add_argument('--raw-port', type=int, default=502,
+                        help='TCP порт Gateway в прозрачном режиме для транспорта rtu-tcp')
+    parser.add_argument('--slaves', type=int, nargs='+', default=[1])
+    parser.add_argument('--transports', nargs='+', choices=TRANSPORT_KINDS, default=['tcp'])
+    parser.add_argument('--ops', nargs='+', choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    parser.add_argument('--compare', help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Допустимый рост p50 при сравнении (доля)')
+    args = parser.parse_args()
+
+    server = responder = raw_server = None
+    if args.local:
+        if args.realistic:
+            server = WaveshareEmulator(timing=SerialTiming(args.baud))
+        else:
+            server = LocalServer()
+        args.host, args.port = server.start()
+        if 'rtu' in args.transports:
+            responder = RtuResponder(args.slaves, SerialTiming(args.baud) if args.realistic else None)
+            args.device = responder.start()
+        if 'rtu-tcp' in args.transports:
+            raw_server = RtuTcpServer(slave_ids=args.slaves,
+                                      timing=SerialTiming(args.baud) if args.realistic else None)
+            args.raw_port = raw_server.start()[1]
+
+    print('=' * 70)
+    print(f'⏱️  БЕНЧМАРК РЕЛЕ ({args.host}:{args.port}{", эмулятор" if args.local else ""})')
+    print('=' * 70)
+
+    def connect(kind):
+        if kind == 'rtu':
+            return open_transport(kind, args.device, baudrate=args.baud)
+        if kind == 'rtu-tcp':
+            return open_transport(kind, args.host, args.raw_port)
+        return open_transport(kind, args.host, args.port)
+
+    transports = {kind: connect(kind) for kind in args.transports}
+    report = run_suite(
+        transports, args.slaves, args.ops, args.iterations,
+        progress=lambda t, s, op: print(f'  {t} / Slave {s} / {op}...', flush=True),
+    )
+    report['meta'].update(target=f'{args.host}:{args.port}', local=args.local)
+    for transport in transports.values():
+        transport.close()
+    if server is not None:
+        server.stop()
+    if responder is not None:
+        responder.stop()
+    if raw_server is not None:
+        raw_server.stop()
+
+    print()
+    print_results(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f'\n💾 Сохранено: {args.output}')
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report, baseline, threshold=args.threshold)
+        print()
+        if not regressions:
+            print(f'✅ Регрессий нет (порог p50 +{args.threshold:.0%})')
+        for transport_name, slave_id, name, old, new in regressions:
+            print(f'❌ {transport_name} / Slave {slave_id} / {name}: '
+                  f'p50 {old:.2f} → {new:.2f} мс')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
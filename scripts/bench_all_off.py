@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Сравнение задержки "выключить все": 32 x FC05 (как раньше) против 1 x FC15.
+
+Пример:
+    python3 scripts/bench_all_off.py --host 192.168.1.254 --slave 1 --runs 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from src.relay import ALL_OFF, CHANNELS, RelayBoard
+from src.session import get_session
+from src.shadow import FC05_BYTES, fc15_bytes
+
+
+def wire_time_ms(frames, wire_bytes, baud):
+    """Время на шине: 10 бит на символ (8N1) + пауза 3.5 символа на кадр."""
+    char_ms = 10 / baud * 1000
+    return frames * (wire_bytes + 2 * 3.5) * char_ms
+
+
+def measure(func, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='192.168.1.254')
+    parser.add_argument('--port', type=int, default=502)
+    parser.add_argument('--slave', type=int, default=1)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--baud', type=int, default=9600)
+    args = parser.parse_args()
+
+    client = get_session(args.host, args.port, timeout=3)
+    if not client.connect():
+        print(f'❌ Не удалось подключиться к {args.host}:{args.port}')
+        return 1
+
+    board = RelayBoard(client, args.slave)
+
+    def fc05_loop():
+        for ch in range(CHANNELS):
+            board.set_coil(ch, False)
+
+    before = measure(fc05_loop, args.runs)
+    after = measure(lambda: board.write_mask(ALL_OFF), args.runs)
+    client.close()
+
+    print('=' * 60)
+    print(f'⏱️  ВЫКЛЮЧЕНИЕ ВСЕХ КАНАЛОВ ({args.host}:{args.port}, Slave ID {args.slave})')
+    print('=' * 60)
+    print(f'{"":14}{"медиана, мс":>14}{"мин, мс":>12}{"шина, мс":>12}')
+    for name, samples, frames, wire in (
+        ('32 x FC05', before, CHANNELS, FC05_BYTES),
+        ('1 x FC15', after, 1, fc15_bytes(CHANNELS)),
+    ):
+        print(f'{name:14}{statistics.median(samples):14.2f}{min(samples):12.2f}'
+              f'{wire_time_ms(frames, wire, args.baud):12.1f}')
+    print(f'Ускорение: x{statistics.median(before) / statistics.median(after):.1f}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
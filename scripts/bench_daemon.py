@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Объединение команд демона: N клиентов HTTP одновременно переключают
+каналы одной платы — кадры на шине без окна и с окном.
+
+Каждый клиент — отдельное соединение, POST /boards/{board}/set со своим
+каналом (клиент i — канал i % 32 + 1), ``--rounds`` раз, перед каждой
+командой — случайная пауза до ``--spread`` мс (клиенты не в такт).
+Считаются кадры, дошедшие до эмулятора Gateway, и время ответа клиентам.
+Без окна команды объединяются только пока идет предыдущая запись.
+Для сравнения — «по команде»: те же команды по одной записи FC05 на
+каждую, как при запуске relayctl на каждое действие (без времени запуска).
+
+Пример:
+    python3 scripts/bench_daemon.py --clients 32 --rounds 5 --baud 9600
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api import serve_api
+from src.daemon import RelayDaemon, board_id
+from src.emulator import SerialTiming, WaveshareEmulator
+from src.fleet import Fleet, GatewayConfig
+from src.relay import RelayBoard
+from src.transport import RawTcpTransport
+
+
+async def post(reader, writer, path, body):
+    data = json.dumps(body).encode()
+    writer.write(f'POST {path} HTTP/1.1\r\nHost: relayd\r\nContent-Length: {len(data)}\r\n\r\n'
+                 .encode() + data)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def run(args, window):
+    server = WaveshareEmulator(timing=SerialTiming(args.baud))
+    host, port = server.start()
+    fleet = Fleet([GatewayConfig(host, port, {'PORT1': (1,)})], timeout=args.timeout)
+    daemon = RelayDaemon(fleet, window=window)
+    await daemon.start()
+    api = await serve_api(daemon, '127.0.0.1', 0)
+    api_port = api.sockets[0].getsockname()[1]
+    path = f'/boards/{board_id(fleet.boards[0])}/set'
+    requests_before = server.stats['requests']
+    latencies, errors = [], 0
+
+    async def client(i):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection('127.0.0.1', api_port)
+        channel = i % 32 + 1
+        for round_ in range(args.rounds):
+            await asyncio.sleep(random.uniform(0, args.spread / 1000))
+            start = time.perf_counter()
+            key = 'on' if round_ % 2 == 0 else 'off'
+            if await post(reader, writer, path, {key: [channel]}) != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    frames = server.stats['requests'] - requests_before
+    api.close()
+    await api.wait_closed()
+    await daemon.stop()
+    server.stop()
+    return elapsed, frames, latencies, errors, daemon.stats
+
+
+def run_direct(args):
+    server = WaveshareEmulator(timing=SerialTiming(args.baud))
+    host, port = server.start()
+    board = RelayBoard(RawTcpTransport(host, port, timeout=args.timeout), 1)
+    latencies = []
+    start = time.perf_counter()
+    for round_ in range(args.rounds):
+        for i in range(args.clients):
+            t = time.perf_counter()
+            board.set_coil(i % 32, round_ % 2 == 0)
+            latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    board.transport.close()
+    frames = server.stats['requests']
+    server.stop()
+    return elapsed, frames, latencies, 0, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--spread', type=float, default=100, help='Пауза клиента перед командой, мс')
+    parser.add_argument('--window', type=float, default=20, help='Окно объединения, мс')
+    parser.add_argument('--timeout', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print('=' * 72)
+    print(f'🌐 {args.clients} клиентов x {args.rounds} команд на одну плату ({args.baud} бод)')
+    print('=' * 72)
+    random.seed(1)
+    print(f'  {"":14}{"время, с":>10}{"кадров":>8}{"ответ p50, мс":>15}{"p95, мс":>10}{"ошибок":>8}')
+    runs = [('по команде', lambda: run_direct(args)),
+            ('без окна', lambda: asyncio.run(run(args, 0.0))),
+            (f'окно {args.window:g} мс', lambda: asyncio.run(run(args, args.window / 1000)))]
+    for title, measure in runs:
+        elapsed, frames, latencies, errors, stats = measure()
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f'  {title:14}{elapsed:10.2f}{frames:8}{statistics.median(latencies) * 1000:15.1f}'
+              f'{p95 * 1000:10.1f}{errors:8}')
+        if stats is not None:
+            print(f'  {"":14}{stats}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Серия команд при выключенной плате: без карантина против HealthTransport.
+
+Round-robin FC05 по Slave ID 1-4 через одно соединение с эмулятором
+Gateway; плата ``--offline`` выключена первую половину серии и
+включается на второй. Без карантина каждое обращение к ней стоит
+``--timeout``; с HealthTransport после ``--quarantine-after`` таймаутов
+команды ей сразу отклоняются, а фоновая проверка FC01 возвращает плату
+после включения.
+
+Пример:
+    python3 scripts/bench_health.py --baud 9600 --ops 200 --offline 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.emulator import SerialTiming, WaveshareEmulator
+from src.errors import RelayError, SlaveQuarantined
+from src.health import HealthTracker, HealthTransport
+from src.transport import RawTcpTransport
+
+
+def run(server, host, port, args, health):
+    transport = RawTcpTransport(host, port, timeout=args.timeout)
+    transport.connect()
+    if health is not None:
+        transport = HealthTransport(transport, health)
+    for slave_id in args.offline:
+        server.set_online(slave_id, False)
+    recover_at = args.ops // 2
+    healthy_ops = rejected = timeouts = 0
+    recovered = None
+    start = time.perf_counter()
+    for i in range(args.ops):
+        if i == recover_at:
+            for slave_id in args.offline:
+                server.set_online(slave_id)
+            online_since = time.perf_counter()
+        slave_id = args.slaves[i % len(args.slaves)]
+        try:
+            transport.write_coil(slave_id, 0, i // len(args.slaves) % 2 == 0)
+        except SlaveQuarantined:
+            rejected += 1
+            continue
+        except RelayError:
+            timeouts += 1
+            continue
+        if slave_id in args.offline:
+            if recovered is None and i >= recover_at:
+                recovered = time.perf_counter() - online_since
+        else:
+            healthy_ops += 1
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return elapsed, healthy_ops, timeouts, rejected, recovered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--slaves', type=int, nargs='+', default=[1, 2, 3, 4])
+    parser.add_argument('--offline', type=int, nargs='+', default=[3], help='Выключенные платы')
+    parser.add_argument('--ops', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=1.0, help='Таймаут запроса, сек')
+    parser.add_argument('--quarantine-after', type=int, default=3)
+    parser.add_argument('--probe-interval', type=float, default=0.5, help='Проверка FC01, сек')
+    args = parser.parse_args()
+
+    # Gateway ждет ответ дольше таймаута клиента — молчание видно только клиенту
+    server = WaveshareEmulator(timing=SerialTiming(args.baud), response_timeout=args.timeout * 2)
+    host, port = server.start()
+    plain = run(server, host, port, args, None)
+    health = HealthTracker(quarantine_after=args.quarantine_after,
+                           probe_interval=args.probe_interval)
+    guarded = run(server, host, port, args, health)
+    server.stop()
+
+    print('=' * 72)
+    print(f'🩺 {args.ops} x FC05 по Slave ID {args.slaves}, {args.offline} выключены '
+          f'первую половину ({args.baud} бод)')
+    print('=' * 72)
+    print(f'  {"":16}{"время, с":>10}{"исправные, оп/с":>17}{"таймаутов":>11}'
+          f'{"отклонено":>11}{"возврат, с":>12}')
+    for title, (elapsed, healthy_ops, timeouts, rejected, recovered) in (
+            ('без карантина', plain), ('HealthTransport', guarded)):
+        back = '-' if recovered is None else f'{recovered:.2f}'
+        print(f'  {title:16}{elapsed:10.2f}{healthy_ops / elapsed:17.1f}{timeouts:11}'
+              f'{rejected:11}{back:>12}')
+    print()
+    print(health)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
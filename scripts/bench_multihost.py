@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность round-robin по Slave ID 1-4:
+блокирующая сессия (как в scan_ports.py) против AsyncRelayClient
+и WritePipeline с несколькими запросами в полете.
+
+Пример:
+    python3 scripts/bench_multihost.py --host 192.168.1.254 --ops 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from src.async_client import AsyncRelayClient
+from src.pipeline import WritePipeline
+from src.relay import RelayBoard
+from src.session import get_session
+
+
+def run_blocking(args):
+    client = get_session(args.host, args.port, timeout=3)
+    if not client.connect():
+        raise SystemExit(f'❌ Не удалось подключиться к {args.host}:{args.port}')
+    boards = [RelayBoard(client, slave_id) for slave_id in args.slaves]
+
+    start = time.perf_counter()
+    for i in range(args.ops):
+        boards[i % len(boards)].set_coil(args.coil, i // len(boards) % 2 == 0)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+async def run_async(args):
+    async with AsyncRelayClient(args.host, args.port, max_in_flight=args.window) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client.write_coil(args.slaves[i % len(args.slaves)], args.coil,
+                              i // len(args.slaves) % 2 == 0)
+            for i in range(args.ops)
+        ))
+        return time.perf_counter() - start
+
+
+def run_pipeline(args):
+    pipeline = WritePipeline(args.host, args.port, window=args.window, timeout=3)
+    if not pipeline.connect():
+        raise SystemExit(f'❌ Не удалось подключиться к {args.host}:{args.port}')
+    boards = [RelayBoard(pipeline, slave_id) for slave_id in args.slaves]
+
+    start = time.perf_counter()
+    for i in range(args.ops):
+        boards[i % len(boards)].set_coil(args.coil, i // len(boards) % 2 == 0)
+    pipeline.drain()
+    elapsed = time.perf_counter() - start
+    pipeline.close()
+    return elapsed, pipeline.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='192.168.1.254')
+    parser.add_argument('--port', type=int, default=502)
+    parser.add_argument('--slaves', type=int, nargs='+', default=[1, 2, 3, 4])
+    parser.add_argument('--coil', type=int, default=0)
+    parser.add_argument('--ops', type=int, default=200)
+    parser.add_argument('--window', type=int, default=8)
+    args = parser.parse_args()
+
+    blocking = run_blocking(args)
+    pipelined = asyncio.run(run_async(args))
+    windowed, stats = run_pipeline(args)
+
+    print('=' * 60)
+    print(f'⚡ ROUND-ROBIN {args.slaves} ({args.host}:{args.port}, {args.ops} FC05)')
+    print('=' * 60)
+    print(f'Блокирующий цикл:      {args.ops / blocking:8.1f} оп/с')
+    print(f'Async, окно {args.window:<3}:      {args.ops / pipelined:8.1f} оп/с')
+    print(f'Конвейер, окно {args.window:<3}:   {args.ops / windowed:8.1f} оп/с')
+    print(f'Ускорение: x{blocking / pipelined:.1f} (async), x{blocking / windowed:.1f} (конвейер)')
+    print(f'Ответы конвейера: {stats}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Суммарная скорость переключений по портам Gateway (Multi-host).
+
+Одно соединение с обходом PORT1→PORT4 по очереди (как
+legacy/test_gateway_fast.py, без пауз) против PortScheduler: соединение
+и очередь на каждый порт, порты работают одновременно. Каждая операция —
+FC05 (переключение одного канала) на плату своего порта.
+
+Без оборудования (эмулятор с временем RS485):
+    python3 scripts/bench_ports.py --local --baud 9600 --ops 200
+С Gateway:
+    python3 scripts/bench_ports.py --host 192.168.1.254 --slaves 1 2 3 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.emulator import SerialTiming, WaveshareEmulator
+from src.ports import PortScheduler
+from src.relay import RelayBoard
+from src.transport import open_transport
+
+
+def toggle(board, i):
+    board.set_coil(0, i % 2 == 0)
+
+
+def run_single(args):
+    transport = open_transport(args.transport, args.host, args.port, timeout=args.timeout)
+    boards = [RelayBoard(transport, slave_id) for slave_id in args.slaves]
+    errors = 0
+    start = time.perf_counter()
+    for i in range(args.ops):
+        try:
+            toggle(boards[i % len(boards)], i // len(boards))
+        except Exception:
+            errors += 1
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return elapsed, errors
+
+
+def run_ports(args):
+    routes = {slave_id: slave_id for slave_id in args.slaves}
+    with PortScheduler(args.host, args.port, routes, kind=args.transport,
+                       timeout=args.timeout) as ports:
+        # Соединения открываются заранее, чтобы не входить в замер
+        ports.run([(slave_id, RelayBoard.sync) for slave_id in args.slaves])
+        ports.reset_stats()
+        start = time.perf_counter()
+        errors = ports.run([(args.slaves[i % len(args.slaves)], toggle, i // len(args.slaves))
+                            for i in range(args.ops)])
+        elapsed = time.perf_counter() - start
+        return elapsed, len(errors), ports.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='192.168.1.254')
+    parser.add_argument('--port', type=int, default=502)
+    parser.add_argument('--local', action='store_true', help='Эмулятор Gateway вместо --host')
+    parser.add_argument('--baud', type=int, default=9600, help='Скорость RS485 эмулятора')
+    parser.add_argument('--slaves', type=int, nargs='+', default=[1, 2, 3, 4],
+                        help='Slave ID, по одному на порт (Slave ID N — PORTN)')
+    parser.add_argument('--transport', choices=('tcp', 'raw-tcp'), default='raw-tcp')
+    parser.add_argument('--ops', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = None
+    if args.local:
+        server = WaveshareEmulator(timing=SerialTiming(args.baud))
+        args.host, args.port = server.start()
+
+    single, single_errors = run_single(args)
+    parallel, parallel_errors, stats = run_ports(args)
+    if server is not None:
+        server.stop()
+
+    print('=' * 64)
+    print(f'⏱️  {args.ops} x FC05 по {len(args.slaves)} портам ({args.host}:{args.port}'
+          f'{f", эмулятор {args.baud} бод" if args.local else ""})')
+    print('=' * 64)
+    print(f'  {"":26}{"время, с":>10}{"перекл./с":>12}{"ошибок":>8}')
+    print(f'  {"одно соединение":26}{single:10.2f}{args.ops / single:12.1f}{single_errors:8}')
+    print(f'  {"соединение на порт":26}{parallel:10.2f}{args.ops / parallel:12.1f}{parallel_errors:8}')
+    print(f'  Ускорение: x{single / parallel:.1f}')
+    print()
+    for name, port_stats in stats.items():
+        print(f'  PORT{name}: {port_stats}, {port_stats.ops / parallel:.1f} перекл./с')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
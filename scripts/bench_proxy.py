@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Опрос Gateway несколькими клиентами: напрямую против ModbusProxy.
+
+``--clients`` клиентов (SCADA, RPi, ноутбуки) каждые ``--interval`` мс
+читают FC01 32 coils платы 1-4 по кругу, ``--duration`` сек. Эмулятор
+Gateway принимает не больше ``--max-clients`` соединений, как Waveshare:
+напрямую лишние клиенты получают сброс, через прокси все идут в одно
+соединение, а повторные чтения отвечаются из кэша.
+
+Пример:
+    python3 scripts/bench_proxy.py --clients 12 --max-clients 4 --duration 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.async_client import AsyncRelayClient
+from src.emulator import SerialTiming, WaveshareEmulator
+from src.errors import RelayError
+from src.proxy import ModbusProxy
+
+
+async def poll(host, port, i, args, latencies):
+    """Один клиент; возвращает (успешных чтений, ошибок)."""
+    client = AsyncRelayClient(host, port, timeout=args.timeout)
+    ok = errors = 0
+    try:
+        await client.connect()
+    except OSError:
+        return ok, 1
+    deadline = time.perf_counter() + args.duration
+    n = i
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await client.read_coils(n % 4 + 1, 0, 32)
+            ok += 1
+            latencies.append(time.perf_counter() - start)
+        except RelayError:
+            errors += 1
+            if not client.connected:
+                break
+        n += 1
+        await asyncio.sleep(max(0.0, args.interval / 1000 - (time.perf_counter() - start)))
+    await client.close()
+    return ok, errors
+
+
+async def run(args, via_proxy):
+    server = WaveshareEmulator(timing=SerialTiming(args.baud), max_clients=args.max_clients)
+    host, port = server.start()
+    proxy = None
+    if via_proxy:
+        proxy = ModbusProxy(host, port, ttl=args.ttl / 1000, timeout=args.timeout)
+        listener = await proxy.serve('127.0.0.1', 0)
+        host, port = listener.sockets[0].getsockname()[:2]
+    latencies = []
+    results = await asyncio.gather(*(poll(host, port, i, args, latencies)
+                                     for i in range(args.clients)))
+    if proxy is not None:
+        listener.close()
+        await proxy.close()
+    server.stop()
+    ok = sum(r[0] for r in results)
+    failed = sum(1 for r in results if r[1] and not r[0])
+    return ok, failed, server.stats, latencies, proxy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=12)
+    parser.add_argument('--max-clients', type=int, default=4, help='Лимит соединений Gateway')
+    parser.add_argument('--interval', type=float, default=100, help='Период опроса клиента, мс')
+    parser.add_argument('--duration', type=float, default=3.0, help='Сек')
+    parser.add_argument('--ttl', type=float, default=250, help='Кэш прокси, мс')
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--timeout', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print('=' * 72)
+    print(f'🔀 {args.clients} клиентов, FC01 раз в {args.interval:g} мс, {args.duration:g} сек; '
+          f'Gateway: до {args.max_clients} соединений, {args.baud} бод')
+    print('=' * 72)
+    print(f'  {"":12}{"чтений":>8}{"клиентов без связи":>20}{"запросов на шину":>18}'
+          f'{"p50, мс":>9}{"p95, мс":>9}')
+    for title, via_proxy in (('напрямую', False), ('через прокси', True)):
+        ok, failed, stats, latencies, proxy = asyncio.run(run(args, via_proxy))
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000 if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0
+        print(f'  {title:12}{ok:8}{failed:20}{stats["requests"]:18}{p50:9.1f}{p95:9.1f}')
+        if proxy is not None:
+            print(f'  {"":12}{proxy.stats}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк RTU: готовые кадры RtuFrameTable против пути minimalmodbus.
+
+Две части:
+  * сборка кадра FC05 на хосте (без порта): minimalmodbus, сборка через
+    src.pdu с табличным CRC, готовый кадр из таблицы;
+  * полный обмен FC05 через pty с эмулятором плат: minimalmodbus с
+    close_port_after_each_call (как в старом USB-скрипте) и без него,
+    RtuSerialTransport с постоянно открытым портом.
+
+Пример:
+    python3 scripts/bench_rtu_frames.py --baud 115200 --runs 500
+    python3 scripts/bench_rtu_frames.py --device /dev/ttyCH343USB0   # с платой
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import minimalmodbus
+except ImportError:
+    minimalmodbus = None
+
+from src import pdu
+from src.emulator import RtuResponder
+from src.relay import CHANNELS
+from src.transport import RtuFrameTable, RtuSerialTransport
+
+
+def build_us(func, number):
+    """Среднее время одного вызова, мкс."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def measure(func, runs):
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def minimalmodbus_instrument(device, slave_id, baud, close_each_call):
+    instrument = minimalmodbus.Instrument(device, slave_id)
+    instrument.serial.baudrate = baud
+    instrument.serial.timeout = 1
+    instrument.close_port_after_each_call = close_each_call
+    return instrument
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--device', help='Порт USB-RS485 (по умолчанию — эмулятор на pty)')
+    parser.add_argument('--slave', type=int, default=1)
+    parser.add_argument('--baud', type=int, default=115200)
+    parser.add_argument('--runs', type=int, default=300)
+    args = parser.parse_args()
+
+    slave_id = args.slave
+    table = RtuFrameTable(slave_id)
+    number = 20000
+
+    print('=' * 64)
+    print(f'⏱️  RTU КАДРЫ FC05 (Slave ID {slave_id}, {args.baud} бод)')
+    print('=' * 64)
+    print('Сборка кадра на хосте, мкс:')
+    builders = [
+        ('src.pdu (табличный CRC)', lambda: pdu.rtu(slave_id, pdu.write_coil(7, True))),
+        ('RtuFrameTable', lambda: table.coil[7][True]),
+    ]
+    if minimalmodbus is not None:
+        # То же, что делает Instrument.write_bit перед записью в порт
+        def minimalmodbus_frame():
+            payload = minimalmodbus._create_payload(
+                5, 7, 1, 0, 0, 1, False, False, minimalmodbus._Payloadformat.BIT)
+            return minimalmodbus._embed_payload(slave_id, minimalmodbus.MODE_RTU, 5, payload)
+
+        assert minimalmodbus_frame() == table.coil[7][True]
+        builders.insert(0, ('minimalmodbus', minimalmodbus_frame))
+    for name, func in builders:
+        print(f'  {name:28}{build_us(func, number):10.2f}')
+    print()
+
+    responder = None
+    device = args.device
+    if device is None:
+        responder = RtuResponder((slave_id,))
+        device = responder.start()
+
+    cases = []
+    if minimalmodbus is not None:
+        for close_each_call in (True, False):
+            instrument = minimalmodbus_instrument(device, slave_id, args.baud, close_each_call)
+            name = 'minimalmodbus' + (' (close)' if close_each_call else '')
+            cases.append((name, lambda i, inst=instrument: inst.write_bit(
+                i % CHANNELS, i & 1, functioncode=5), instrument.serial))
+    transport = RtuSerialTransport(device, args.baud)
+    transport.connect()
+    cases.append(('RtuSerialTransport', lambda i: transport.write_coil(
+        slave_id, i % CHANNELS, i & 1), transport))
+
+    print(f'Обмен FC05 через {device}, мс:')
+    print(f'  {"":28}{"медиана":>10}{"p95":>10}{"оп/с":>10}')
+    for name, func, port in cases:
+        samples = sorted(measure(func, args.runs))
+        median = statistics.median(samples)
+        p95 = samples[int(0.95 * (len(samples) - 1))]
+        print(f'  {name:28}{median:10.3f}{p95:10.3f}{1000 / median:10.0f}')
+        port.close()
+
+    if responder is not None:
+        responder.stop()
+    if minimalmodbus is None:
+        print('\n⚠️  minimalmodbus не установлен — сравнение только для src')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
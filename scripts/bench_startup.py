@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Время запуска relayctl: сколько стоит один вызов из цикла shell.
+
+Каждая команда запускается отдельным процессом ``--runs`` раз (как
+``for ch in ...; do relayctl on $ch; done``), печатается медиана и p95
+полного времени процесса. Отдельно — какие тяжелые модули попали в
+импорт (по ``python -X importtime``). Запросы идут в локальный эмулятор
+Gateway, так что сеть в замер почти не входит.
+
+Пример:
+    python3 scripts/bench_startup.py --runs 20
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.emulator import LocalServer
+
+RELAYCTL = str(Path(__file__).parent / 'relayctl.py')
+HEAVY = ('pymodbus', 'serial', 'minimalmodbus', 'asyncio')
+
+
+def run_ms(command, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def heavy_imports(command):
+    """Тяжелые пакеты верхнего уровня, импортированные командой."""
+    result = subprocess.run([command[0], '-X', 'importtime'] + command[1:],
+                            capture_output=True, text=True, check=True)
+    found = set()
+    for line in result.stderr.splitlines():
+        name = line.rsplit('|', 1)[-1].strip()
+        if name.split('.')[0] in HEAVY:
+            found.add(name.split('.')[0])
+    return sorted(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    server = LocalServer()
+    host, port = server.start()
+    relayctl = [sys.executable, RELAYCTL, '--host', host, '--port', str(port)]
+    cases = [
+        ('python -c pass', [sys.executable, '-c', 'pass']),
+        ('import pymodbus.client', [sys.executable, '-c', 'import pymodbus.client']),
+        ('relayctl --help', [sys.executable, RELAYCTL, '--help']),
+        ('relayctl on 5', relayctl + ['on', '5']),
+        ('relayctl set 1-8 --verify', relayctl + ['set', '1-8', '--verify']),
+        ('relayctl -t tcp on 5', relayctl + ['-t', 'tcp', 'on', '5']),
+    ]
+
+    print('=' * 78)
+    print(f'⏱️  ЗАПУСК RELAYCTL (процесс целиком, {args.runs} запусков)')
+    print('=' * 78)
+    print(f'  {"":30}{"медиана, мс":>12}{"p95, мс":>10}  тяжелые импорты')
+    for name, command in cases:
+        median, p95 = run_ms(command, args.runs)
+        heavy = ', '.join(heavy_imports(command)) or '—'
+        print(f'  {name:30}{median:12.1f}{p95:10.1f}  {heavy}')
+
+    server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Фиксированный таймаут против адаптивного (по RTT) при молчащей плате.
+
+Round-robin FC05 по Slave ID 1-4 через эмулятор Gateway, одна плата
+выключена. С фиксированным таймаутом каждое обращение к ней стоит
+``--timeout`` секунд; с адаптивным (src.rtt) — порядка нескольких RTT
+исправных плат, после таймаутов — не больше 4x оценки (и ``--timeout``).
+
+Пример:
+    python3 scripts/bench_timeouts.py --baud 9600 --ops 80 --offline 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.emulator import SerialTiming, WaveshareEmulator
+from src.errors import RelayTimeout
+from src.rtt import TimeoutPolicy
+from src.transport import RawTcpTransport
+
+
+def run(host, port, args, timeouts):
+    transport = RawTcpTransport(host, port, timeout=args.timeout, timeouts=timeouts)
+    transport.connect()
+    expired = 0
+    start = time.perf_counter()
+    for i in range(args.ops):
+        slave_id = args.slaves[i % len(args.slaves)]
+        try:
+            transport.write_coil(slave_id, 0, i // len(args.slaves) % 2 == 0)
+        except RelayTimeout:
+            expired += 1
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return elapsed, expired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--slaves', type=int, nargs='+', default=[1, 2, 3, 4])
+    parser.add_argument('--offline', type=int, nargs='*', default=[3],
+                        help='Выключенные платы')
+    parser.add_argument('--ops', type=int, default=80)
+    parser.add_argument('--timeout', type=float, default=2.0,
+                        help='Фиксированный таймаут и потолок адаптивного, сек')
+    parser.add_argument('--floor', type=float, default=0.05, help='Нижняя граница, сек')
+    args = parser.parse_args()
+
+    # Gateway ждет ответ дольше любого таймаута клиента — молчание видно только клиенту
+    server = WaveshareEmulator(timing=SerialTiming(args.baud), response_timeout=args.timeout * 2)
+    host, port = server.start()
+    for slave_id in args.offline:
+        server.set_online(slave_id, False)
+
+    fixed, fixed_expired = run(host, port, args, None)
+    policy = TimeoutPolicy(args.timeout, floor=args.floor, ceiling=args.timeout)
+    adaptive, adaptive_expired = run(host, port, args, policy)
+    server.stop()
+
+    print('=' * 64)
+    print(f'⏱️  {args.ops} x FC05 по Slave ID {args.slaves}, молчат {args.offline} '
+          f'({args.baud} бод)')
+    print('=' * 64)
+    print(f'  {"":22}{"время, с":>10}{"таймаутов":>11}{"оп/с":>10}')
+    print(f'  {"фиксированный":22}{fixed:10.2f}{fixed_expired:11}{args.ops / fixed:10.1f}')
+    print(f'  {"адаптивный":22}{adaptive:10.2f}{adaptive_expired:11}{args.ops / adaptive:10.1f}')
+    print()
+    print(policy)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
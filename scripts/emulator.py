@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Эмулятор Waveshare Gateway (Multi-host, 4 платы по 32 канала) для работы без железа.
+
+    python3 scripts/emulator.py --port 5020
+    python3 scripts/bench.py --host 127.0.0.1 --port 5020 --slaves 1 2 3 4
+
+Сбои для проверки путей "No response received" / "Connection reset":
+    python3 scripts/emulator.py --port 5020 --drop 0.05 --reset 0.01 --slow 0.02
+
+Платы за USB-RS485 (Modbus RTU на pty, путь порта печатается при старте):
+    python3 scripts/emulator.py --rtu --baud 115200
+
+Порт Gateway в прозрачном режиме ("Port3-RAW", RTU поверх TCP):
+    python3 scripts/emulator.py --raw --port 5021
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.emulator import Faults, RtuResponder, RtuTcpServer, SerialTiming, WaveshareEmulator
+
+
+async def serve(emulator):
+    server = await emulator.serve()
+    async with server:
+        await server.serve_forever()
+
+
+def serve_rtu(args):
+    timing = SerialTiming(args.baud, turnaround=args.turnaround)
+    with RtuResponder(slave_ids=(1, 2, 3, 4), timing=timing) as responder:
+        print('=' * 60)
+        print(f'🔌 ЭМУЛЯТОР RS485 (Modbus RTU): {responder.device}')
+        print('=' * 60)
+        print(f'  Slave ID 1-4, 32 канала, {args.baud} 8N1, '
+              f'пауза {timing.frame_gap * 1000:.2f} мс')
+        print()
+        print('Ctrl+C — остановить')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f'\n⏹️  Остановлено. Статистика: {responder.stats}')
+
+
+def serve_raw(args):
+    timing = SerialTiming(args.baud, turnaround=args.turnaround)
+    server = RtuTcpServer(args.host, args.port, slave_ids=(1, 2, 3, 4), timing=timing)
+    print('=' * 60)
+    print(f'🖥️  ЭМУЛЯТОР GATEWAY RAW (RTU поверх TCP) {args.host}:{args.port}')
+    print('=' * 60)
+    print(f'  Slave ID 1-4 на одной шине, {args.baud} 8N1')
+    print()
+    print('Ctrl+C — остановить')
+    try:
+        asyncio.run(serve(server))
+    except KeyboardInterrupt:
+        print(f'\n⏹️  Остановлено. Статистика: {server.stats}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5020)
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--turnaround', type=float, default=0.005,
+                        help='Время обработки запроса платой, сек')
+    parser.add_argument('--response-timeout', type=float, default=0.2,
+                        help='Сколько Gateway ждет ответ платы, сек')
+    parser.add_argument('--drop', type=float, default=0.0, help='Вероятность потери ответа')
+    parser.add_argument('--reset', type=float, default=0.0, help='Вероятность сброса TCP')
+    parser.add_argument('--slow', type=float, default=0.0, help='Вероятность медленного ответа')
+    parser.add_argument('--slow-delay', type=float, default=1.0)
+    parser.add_argument('--offline', type=int, nargs='*', default=[],
+                        help='Slave ID выключенных плат')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--max-clients', type=int, help='Лимит TCP соединений Gateway')
+    parser.add_argument('--rtu', action='store_true',
+                        help='Платы Modbus RTU на pty вместо Gateway')
+    parser.add_argument('--raw', action='store_true',
+                        help='Порт Gateway в прозрачном режиме (RTU поверх TCP)')
+    args = parser.parse_args()
+
+    if args.rtu:
+        return serve_rtu(args)
+    if args.raw:
+        return serve_raw(args)
+
+    emulator = WaveshareEmulator(
+        args.host, args.port,
+        timing=SerialTiming(args.baud, turnaround=args.turnaround),
+        faults=Faults(args.drop, args.reset, args.slow, args.slow_delay, args.seed),
+        response_timeout=args.response_timeout,
+        max_clients=args.max_clients,
+    )
+    for slave_id in args.offline:
+        emulator.set_online(slave_id, False)
+
+    print('=' * 60)
+    print(f'🖥️  ЭМУЛЯТОР GATEWAY {args.host}:{args.port}')
+    print('=' * 60)
+    for slave_id, port in sorted(emulator.routes.items()):
+        state = '⛔ выключена' if slave_id in emulator.offline else '✅'
+        print(f'  Slave ID {slave_id} → PORT{port}, 32 канала {state}')
+    print(f'  RS485: {args.baud} 8N1, символ {emulator.timing.char_time * 1000:.3f} мс, '
+          f'пауза {emulator.timing.frame_gap * 1000:.2f} мс')
+    print()
+    print('Ctrl+C — остановить')
+
+    try:
+        asyncio.run(serve(emulator))
+    except KeyboardInterrupt:
+        print(f'\n⏹️  Остановлено. Статистика: {emulator.stats}')
+
+
+if __name__ == "__main__":
+    main()
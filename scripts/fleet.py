@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Команды на весь парк Gateway: шины параллельно, внутри шины — по очереди.
+
+С конфигурацией (см. src/fleet.py):
+    python3 scripts/fleet.py --config fleet.json off
+    python3 scripts/fleet.py --config fleet.json set 0x0000FFFF
+    python3 scripts/fleet.py --config fleet.json status
+Без оборудования: N эмуляторов Gateway по 4 порта с временем RS485 и
+сравнение с последовательным обходом всех плат:
+    python3 scripts/fleet.py --local 4 --boards-per-port 2 --compare off
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.emulator import SerialTiming, WaveshareEmulator
+from src.fleet import Fleet, GatewayConfig, load_fleet
+from src.relay import ALL_OFF, ALL_ON
+
+
+def parse_mask(text):
+    mask = int(text, 0)
+    if not 0 <= mask <= ALL_ON:
+        raise argparse.ArgumentTypeError(f'маска вне 32 каналов: {text!r}')
+    return mask
+
+
+def local_fleet(count, boards_per_port, baud):
+    """Эмуляторы Gateway: на PORTn платы n, n + 4, n + 8..."""
+    servers, gateways = [], []
+    for _ in range(count):
+        routes = {port + 4 * i: port for port in (1, 2, 3, 4) for i in range(boards_per_port)}
+        server = WaveshareEmulator(routes=routes, timing=SerialTiming(baud))
+        host, port = server.start()
+        buses = {}
+        for slave_id, bus in sorted(routes.items()):
+            buses.setdefault(f'PORT{bus}', []).append(slave_id)
+        servers.append(server)
+        gateways.append(GatewayConfig(host, port, {bus: tuple(ids) for bus, ids in buses.items()}))
+    return servers, gateways
+
+
+async def run_sequential(fleet, mask):
+    """Обход плат по одной (как старые скрипты), для сравнения."""
+    for key in fleet.boards:
+        fleet.state[key] = None
+        await fleet.apply({key: mask})
+
+
+async def run(args, gateways):
+    async with Fleet(gateways, timeout=args.timeout) as fleet:
+        for name, error in fleet.unreachable.items():
+            print(f'❌ {name}: {error}')
+
+        if args.command == 'status':
+            results = await fleet.sync()
+        else:
+            mask = {'off': ALL_OFF, 'on': ALL_ON}.get(args.command, args.mask)
+            if args.compare:
+                start = time.perf_counter()
+                await run_sequential(fleet, mask)
+                sequential = time.perf_counter() - start
+                fleet.invalidate()
+            start = time.perf_counter()
+            results = await fleet.set_all(mask)
+            elapsed = time.perf_counter() - start
+
+        failed = 0
+        for key, result in sorted(results.items()):
+            if result.error is not None:
+                failed += 1
+                print(f'  ❌ {key.gateway} / Slave {key.slave_id}: {result.error}')
+            elif args.command == 'status':
+                print(f'  {key.gateway} / Slave {key.slave_id}: 0x{fleet.state[key]:08X}')
+        print(f'Плат: {len(results)}, ошибок: {failed}')
+        if args.command != 'status':
+            print(f'⏱️  Парк: {elapsed * 1000:.1f} мс')
+            if args.compare:
+                print(f'⏱️  По одной плате: {sequential * 1000:.1f} мс '
+                      f'(x{sequential / elapsed:.1f})')
+        return 1 if failed or fleet.unreachable else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--config', help='Конфигурация парка (JSON/YAML)')
+    parser.add_argument('--local', type=int, metavar='N', help='N эмуляторов Gateway вместо --config')
+    parser.add_argument('--boards-per-port', type=int, default=1)
+    parser.add_argument('--baud', type=int, default=9600, help='Скорость RS485 эмуляторов')
+    parser.add_argument('--timeout', type=float, default=1.0)
+    parser.add_argument('--compare', action='store_true',
+                        help='Сначала пройти платы по одной и сравнить время')
+    parser.add_argument('command', choices=('off', 'on', 'set', 'status'))
+    parser.add_argument('mask', nargs='?', type=parse_mask, help='Маска для set (0x...)')
+    args = parser.parse_args()
+    if args.command == 'set' and args.mask is None:
+        parser.error('для set нужна маска')
+    if not args.config and not args.local:
+        parser.error('нужен --config или --local')
+
+    servers = []
+    if args.local:
+        servers, gateways = local_fleet(args.local, args.boards_per_port, args.baud)
+    else:
+        gateways = load_fleet(args.config)
+
+    print('=' * 60)
+    print(f'🏭 ПАРК: {len(gateways)} Gateway, '
+          f'{sum(len(gw.buses) for gw in gateways)} шин, '
+          f'{sum(len(ids) for gw in gateways for ids in gw.buses.values())} плат')
+    print('=' * 60)
+    try:
+        return asyncio.run(run(args, gateways))
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 try:
-    from pymodbus.client import ModbusTcpClient
+    from src.errors import RelayError
+    from src.session import close_all, get_session
+    from src.transport import PymodbusTransport
 except ImportError:
     print("❌ pymodbus не установлен")
     print("Установите: pip install pymodbus")
@@ -34,7 +36,7 @@ def test_gateway_port(gateway_host, gateway_port, slave_id, port_name, delay=3):
     print()
     
     try:
-        client = ModbusTcpClient(host=gateway_host, port=gateway_port, timeout=3)
+        client = get_session(gateway_host, gateway_port, timeout=3)
         
         if not client.connect():
             print("❌ Не удалось подключиться к Gateway")
@@ -43,26 +45,25 @@ def test_gateway_port(gateway_host, gateway_port, slave_id, port_name, delay=3):
         print("✅ Подключено к Gateway")
         print()
         
+        transport = PymodbusTransport(client)
+        
         # Отправляем 3 команды с задержкой
         for i in range(3):
             print(f"Попытка {i+1}/3: Отправка команды на канал 1...")
             print(f"  → Отправка Modbus TCP команды...")
             
-            result = client.write_coil(address=0, value=True, unit=slave_id)
-            
-            print(f"  ← Получен ответ: {type(result).__name__}")
-            
-            if hasattr(result, 'isError'):
-                if result.isError():
-                    print(f"  ❌ Ошибка: {result}")
-                else:
-                    print(f"  ✅ Успешно!")
+            try:
+                transport.write_coil(slave_id, 0, True)
+                print(f"  ← Получен ответ")
+                print(f"  ✅ Успешно!")
+            except RelayError as e:
+                print(f"  ❌ Ошибка: {e}")
             
             print(f"  ⏱️  Ожидание {delay} секунд (проверьте LINK и напряжение)...")
             time.sleep(delay)
             print()
         
-        client.close()
+        # Соединение не закрываем: следующий порт использует ту же сессию
         print(f"✅ Тест {port_name} завершен")
         print()
         
@@ -124,6 +125,8 @@ def main():
             print()
             time.sleep(5)
     
+    close_all()
+    
     # Итоговая сводка
     print()
     print("=" * 70)
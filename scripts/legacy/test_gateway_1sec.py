@@ -12,7 +12,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 try:
-    from pymodbus.client import ModbusTcpClient
+    from src.errors import RelayError
+    from src.session import get_session
+    from src.transport import PymodbusTransport
 except ImportError:
     print("❌ pymodbus не установлен")
     print("Установите: pip install pymodbus")
@@ -49,7 +51,7 @@ def main():
     print()
     
     try:
-        client = ModbusTcpClient(host=gateway_host, port=gateway_port, timeout=2)
+        client = get_session(gateway_host, gateway_port, timeout=2)
         
         if not client.connect():
             print("❌ Не удалось подключиться к Gateway")
@@ -60,6 +62,8 @@ def main():
         print("🔄 Начинаем тест...")
         print()
         
+        transport = PymodbusTransport(client)
+        
         # Порты для тестирования
         ports = [
             ("PORT1", 1),
@@ -74,12 +78,10 @@ def main():
             
             for port_name, slave_id in ports:
                 # Отправляем команду
-                result = client.write_coil(address=0, value=True, unit=slave_id)
-                
-                # Статус
-                if hasattr(result, 'isError') and not result.isError():
+                try:
+                    transport.write_coil(slave_id, 0, True)
                     status = "✅"
-                else:
+                except RelayError:
                     status = "❌"
                 
                 print(f"  {port_name} (ID:{slave_id}) {status}", end="", flush=True)
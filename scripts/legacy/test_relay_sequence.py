@@ -4,30 +4,45 @@
 Включает реле поочередно от 1 до 32, затем в обратном порядке от 32 до 1
 """
 
+import importlib.util
 import sys
 import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-try:
-    import minimalmodbus
-    import serial
-    USE_MINIMALMODBUS = True
-except ImportError:
-    USE_MINIMALMODBUS = False
+USE_SERIAL = importlib.util.find_spec('serial') is not None
 
 # Всегда импортируем для TCP режима
 try:
-    from pymodbus.client import ModbusTcpClient
+    from src.session import get_session
+    from src.transport import PymodbusTransport
 except ImportError:
-    ModbusTcpClient = None
+    get_session = None
+
+from src.console import Renderer
+from src.health import HealthTransport
+from src.pipeline import WritePipeline
+from src.relay import RelayBoard
+from src.scheduler import DeadlineScheduler, JitterStats
+from src.transport import RtuSerialTransport, RtuTcpTransport
+from src.verify import VerifyStats, format_mismatch, verify_boards
 
 
 def test_sequence_usb(
-    port="/dev/ttyCH343USB0", slave_id=1, baudrate=9600, delay=0.1, repeats=2, pause=2
+    port="/dev/ttyCH343USB0",
+    slave_id=1,
+    baudrate=9600,
+    delay=0.1,
+    repeats=2,
+    pause=2,
+    quiet=False,
 ):
-    """Тест последовательности через USB-RS485"""
+    """
+    Тест последовательности через USB-RS485
+
+    quiet: во время теста ничего не выводить, только итоги в конце.
+    """
     print("=" * 60)
     print("🔌 ПОСЛЕДОВАТЕЛЬНОЕ ВКЛЮЧЕНИЕ РЕЛЕ (USB-RS485)")
     print("=" * 60)
@@ -41,66 +56,71 @@ def test_sequence_usb(
     print()
 
     try:
-        instrument = minimalmodbus.Instrument(port, slave_id)
-        instrument.serial.baudrate = baudrate
-        instrument.serial.bytesize = 8
-        instrument.serial.parity = serial.PARITY_NONE
-        instrument.serial.stopbits = 1
-        instrument.serial.timeout = 2
-        instrument.close_port_after_each_call = True
-
-        # Выключаем все каналы
+        # Порт открыт на весь тест, а не переоткрывается на каждый кадр
+        transport = RtuSerialTransport(port, baudrate, timeout=2)
+        if not transport.connect():
+            print(f"❌ Не удалось открыть {port}")
+            return False
+        board = RelayBoard(transport, slave_id)
+
+        # Выключаем все каналы одним кадром FC15
         print("Выключение всех каналов...")
-        for ch in range(32):
-            try:
-                instrument.write_bit(ch, 0, functioncode=5)
-            except:
-                pass
+        try:
+            board.write_mask(0)
+        except:
+            pass
         print("✅ Все каналы выключены")
         time.sleep(1)
         print()
 
-        # Повторяем цикл заданное количество раз
-        for repeat in range(repeats):
-            print("=" * 60)
-            print(f"🔁 ПОВТОР {repeat + 1}/{repeats}")
-            print("=" * 60)
-            print()
-
-            # Включаем поочередно от 1 до 32
-            print("🔄 Включение каналов 1→32...")
-            for ch in range(32):
-                try:
-                    print(f"   Канал {ch+1}...", end=" ", flush=True)
-                    instrument.write_bit(ch, 1, functioncode=5)
-                    print("✅")
-                    time.sleep(delay)
-                except Exception as e:
-                    print(f"❌ {e}")
-
-            print()
-            time.sleep(1)
+        # Шаги по дедлайнам: время записи вычитается из задержки
+        scheduler = DeadlineScheduler(delay)
+        total = JitterStats(delay)
 
-            # Выключаем в обратном порядке от 32 до 1
-            print("🔄 Выключение каналов 32→1...")
-            for ch in reversed(range(32)):
+        # Вывод через Renderer: шаг кладет строку в очередь, терминал
+        # обновляется отдельным потоком и не растягивает шаги
+        with Renderer(quiet=quiet) as out:
+            def step(change):
+                ch, value = change
                 try:
-                    print(f"   Канал {ch+1}...", end=" ", flush=True)
-                    instrument.write_bit(ch, 0, functioncode=5)
-                    print("✅")
-                    time.sleep(delay)
+                    board.set_coil(ch, value)
+                    out.log(f"   Канал {ch+1}... ✅")
                 except Exception as e:
-                    print(f"❌ {e}")
-
-            print()
-            if repeat < repeats - 1:
-                print(f"⏸️  Пауза {pause} сек перед следующим повтором...")
-                time.sleep(pause)
-                print()
-
-        print("=" * 60)
-        print(f"✅ ТЕСТ ЗАВЕРШЕН ({repeats} повторений)")
-        print("=" * 60)
+                    out.log(f"   Канал {ch+1}... ❌ {e}")
+
+            # Повторяем цикл заданное количество раз
+            for repeat in range(repeats):
+                out.log("=" * 60)
+                out.log(f"🔁 ПОВТОР {repeat + 1}/{repeats}")
+                out.log("=" * 60)
+                out.log()
+
+                # Включаем поочередно от 1 до 32
+                out.log("🔄 Включение каналов 1→32...")
+                stats = scheduler.run([(ch, 1) for ch in range(32)], step)
+                out.log(f"⏱️  {stats}")
+                total.merge(stats)
+
+                out.log()
+                time.sleep(1)
+
+                # Выключаем в обратном порядке от 32 до 1
+                out.log("🔄 Выключение каналов 32→1...")
+                stats = scheduler.run([(ch, 0) for ch in reversed(range(32))], step)
+                out.log(f"⏱️  {stats}")
+                total.merge(stats)
+
+                out.log()
+                if repeat < repeats - 1:
+                    out.log(f"⏸️  Пауза {pause} сек перед следующим повтором...")
+                    time.sleep(pause)
+                    out.log()
+
+            out.summary("=" * 60)
+            out.summary(f"⏱️  Всего: {total}")
+            out.summary(f"✅ ТЕСТ ЗАВЕРШЕН ({repeats} повторений)")
+            out.summary("=" * 60)
+        transport.close()
         return True
 
     except Exception as e:
@@ -115,10 +135,28 @@ def test_sequence_tcp(
     delay=0.1,
     repeats=2,
     pause=2,
+    verify="batch",
+    raw=False,
+    window=0,
+    quiet=False,
 ):
-    """Тест последовательности через Gateway (Modbus TCP)"""
+    """
+    Тест последовательности через Gateway (Modbus TCP)
+
+    verify: "off", "step" (FC01 после каждого канала) или "batch"
+    (одно FC01 после прохода) — запись без ответа не значит, что реле
+    не переключилось, поэтому фактическое состояние читаем.
+    raw: порт Gateway в прозрачном режиме ("Port3-RAW") — RTU кадры
+    поверх TCP без конвертации на стороне Gateway.
+    window: > 0 — записи конвейером (до window запросов в полете), ответы
+    сверяются в фоне; поздние и потерянные считаются в итоге.
+    quiet: во время теста ничего не выводить, только итоги в конце.
+    """
     print("=" * 60)
-    print("🌐 ПОСЛЕДОВАТЕЛЬНОЕ ВКЛЮЧЕНИЕ РЕЛЕ (GATEWAY)")
+    if raw:
+        print("🌐 ПОСЛЕДОВАТЕЛЬНОЕ ВКЛЮЧЕНИЕ РЕЛЕ (GATEWAY RAW, RTU ПОВЕРХ TCP)")
+    else:
+        print("🌐 ПОСЛЕДОВАТЕЛЬНОЕ ВКЛЮЧЕНИЕ РЕЛЕ (GATEWAY)")
     print("=" * 60)
     print()
     print(f"Gateway: {gateway_host}:{gateway_port}")
@@ -126,10 +164,19 @@ def test_sequence_tcp(
     print(f"Задержка: {delay} сек")
     print(f"Повторений: {repeats}")
     print(f"Пауза между повторами: {pause} сек")
+    print(f"Проверка состояния: {verify}")
+    if window:
+        print(f"Конвейер: до {window} запросов в полете")
     print()
 
     try:
-        client = ModbusTcpClient(host=gateway_host, port=gateway_port, timeout=3)
+        if raw:
+            client = transport = RtuTcpTransport(gateway_host, gateway_port, timeout=3)
+        elif window:
+            client = transport = WritePipeline(gateway_host, gateway_port, window, timeout=3)
+        else:
+            client = get_session(gateway_host, gateway_port, timeout=3)
+            transport = PymodbusTransport(client)
 
         if not client.connect():
             print("❌ Не удалось подключиться к Gateway")
@@ -138,79 +185,103 @@ def test_sequence_tcp(
         print("✅ Подключено к Gateway")
         print()
 
-        # Выключаем все каналы (игнорируем ошибки, как в USB версии)
-        print("Выключение всех каналов...")
-        for ch in range(32):
+        if not window:
+            # Плата в карантине не держит шаги таймаутом (см. src.health)
+            transport = HealthTransport(transport)
+        board = RelayBoard(transport, slave_id)
+        verify_stats = VerifyStats()
+        # Шаги по дедлайнам: время записи вычитается из задержки
+        scheduler = DeadlineScheduler(delay)
+        total = JitterStats(delay)
+
+        # Вывод через Renderer: шаг кладет строку в очередь, терминал
+        # обновляется отдельным потоком и не растягивает шаги
+        with Renderer(quiet=quiet) as out:
+            def check():
+                found = verify_boards([board], verify_stats)
+                for slave, mismatch in found:
+                    out.log(f"   ⚠️  {format_mismatch(slave, mismatch)}")
+                return not found
+
+            # Выключаем все каналы одним кадром FC15 (игнорируем ошибки, как в USB версии)
+            out.log("Выключение всех каналов...")
             try:
-                # Используем write_coil (функция 5) - как в USB версии write_bit с functioncode=5
-                client.write_coil(address=ch, value=False, unit=slave_id)
+                board.all_off()
             except:
                 pass  # Игнорируем ошибки
-        print("✅ Все каналы выключены")
-        time.sleep(1)
-        print()
-
-        # Повторяем цикл заданное количество раз
-        for repeat in range(repeats):
-            print("=" * 60)
-            print(f"🔁 ПОВТОР {repeat + 1}/{repeats}")
-            print("=" * 60)
-            print()
-
-            # Включаем поочередно от 1 до 32
-            print("🔄 Включение каналов 1→32...")
-            for ch in range(32):
-                try:
-                    print(f"   Канал {ch+1}...", end=" ", flush=True)
-                    # Используем write_coil (функция 5) - как в USB версии write_bit с functioncode=5
-                    # Реле может не отвечать, но команда выполняется (как в USB версии)
-                    try:
-                        result = client.write_coil(
-                            address=ch, value=True, unit=slave_id
-                        )
-                    except:
-                        pass  # Игнорируем отсутствие ответа - команда все равно отправлена
-                    print("✅")
-                    time.sleep(delay)
-                except Exception as e:
-                    # Игнорируем все ошибки, как в USB версии
-                    print("✅")  # Все равно считаем успешным, если команда отправлена
-                    time.sleep(delay)
-
-            print()
+            if verify == "off" or check():
+                out.log("✅ Все каналы выключены")
             time.sleep(1)
+            out.log()
 
-            # Выключаем в обратном порядке от 32 до 1
-            print("🔄 Выключение каналов 32→1...")
-            for ch in reversed(range(32)):
+            def step(change):
+                ch, value = change
+                # Используем write_coil (функция 5) - как в USB версии write_bit с functioncode=5
+                # Реле может не отвечать, но команда выполняется (как в USB версии)
                 try:
-                    print(f"   Канал {ch+1}...", end=" ", flush=True)
-                    # Используем write_coil (функция 5) - как в USB версии write_bit с functioncode=5
-                    # Реле может не отвечать, но команда выполняется (как в USB версии)
-                    try:
-                        result = client.write_coil(
-                            address=ch, value=False, unit=slave_id
-                        )
-                    except:
-                        pass  # Игнорируем отсутствие ответа - команда все равно отправлена
-                    print("✅")
-                    time.sleep(delay)
-                except Exception as e:
-                    # Игнорируем все ошибки, как в USB версии
-                    print("✅")  # Все равно считаем успешным, если команда отправлена
-                    time.sleep(delay)
-
-            print()
-            if repeat < repeats - 1:
-                print(f"⏸️  Пауза {pause} сек перед следующим повтором...")
-                time.sleep(pause)
-                print()
-
-        print("=" * 60)
-        print(f"✅ ТЕСТ ЗАВЕРШЕН ({repeats} повторений)")
-        print("=" * 60)
-
-        client.close()
+                    board.set_coil(ch, value)
+                    status = "📤" if window else "✅"
+                except:
+                    status = "⚠️  нет ответа"  # команда могла выполниться
+                if verify == "step":
+                    status = "✅" if check() else "❌"
+                out.log(f"   Канал {ch+1}... {status}")
+
+            def run_pass(changes):
+                stats = scheduler.run(changes, step)
+                if window:
+                    transport.drain()
+                if verify == "batch":
+                    check()
+                out.log(f"⏱️  {stats}")
+                total.merge(stats)
+
+            # Повторяем цикл заданное количество раз
+            for repeat in range(repeats):
+                out.log("=" * 60)
+                out.log(f"🔁 ПОВТОР {repeat + 1}/{repeats}")
+                out.log("=" * 60)
+                out.log()
+
+                # Включаем поочередно от 1 до 32
+                out.log("🔄 Включение каналов 1→32...")
+                run_pass([(ch, True) for ch in range(32)])
+
+                out.log()
+                time.sleep(1)
+
+                # Выключаем в обратном порядке от 32 до 1
+                out.log("🔄 Выключение каналов 32→1...")
+                run_pass([(ch, False) for ch in reversed(range(32))])
+
+                out.log()
+                if repeat < repeats - 1:
+                    out.log(f"⏸️  Пауза {pause} сек перед следующим повтором...")
+                    time.sleep(pause)
+                    out.log()
+
+            out.summary("=" * 60)
+            out.summary(f"⏱️  Всего: {total}")
+            if verify != "off":
+                out.summary(f"🔎 Проверка: {verify_stats}")
+            if not window and transport.health.slaves:
+                out.summary(f"🩺 {transport.health}")
+            if window:
+                client.close(grace=1)
+                out.summary(f"📨 Ответы конвейера: {transport.stats}")
+                for slave, error in transport.stats.errors:
+                    out.summary(f"   ❌ Slave {slave}: {error}")
+            if verify_stats.ok and (not window or transport.stats.ok):
+                out.summary(f"✅ ТЕСТ ЗАВЕРШЕН ({repeats} повторений)")
+            else:
+                out.summary(f"❌ ТЕСТ ЗАВЕРШЕН С РАСХОЖДЕНИЯМИ ({repeats} повторений)")
+            out.summary("=" * 60)
+
+        if window:
+            client.close()
+        else:
+            # HealthTransport закрывает и исходное соединение, и поток проверок
+            transport.close()
         return True
 
     except Exception as e:
@@ -248,11 +319,11 @@ def main():
             input("Пауза между повторами (текущая: 2 сек) [2]: ").strip() or "2"
         )
 
-        if USE_MINIMALMODBUS:
+        if USE_SERIAL:
             test_sequence_usb(port, slave_id, baudrate, delay, repeats, pause)
         else:
-            print("❌ minimalmodbus не установлен")
-            print("Установите: pip install minimalmodbus")
+            print("❌ pyserial не установлен")
+            print("Установите: pip install pyserial")
 
     elif mode == "2":
         # Gateway режим
@@ -266,8 +337,30 @@ def main():
         pause = float(
             input("Пауза между повторами (текущая: 2 сек) [2]: ").strip() or "2"
         )
+        window = int(
+            input("Окно конвейера (0 — ждать каждый ответ) [0]: ").strip() or "0"
+        )
 
-        test_sequence_tcp(gateway_host, gateway_port, slave_id, delay, repeats, pause)
+        test_sequence_tcp(
+            gateway_host, gateway_port, slave_id, delay, repeats, pause, window=window
+        )
+
+    elif mode == "3":
+        # Порт Gateway в прозрачном режиме (Modbus TCP To RTU выключен)
+        gateway_host = input("Gateway IP [192.168.1.254]: ").strip() or "192.168.1.254"
+        gateway_port = int(input("TCP порт RAW [502]: ").strip() or "502")
+        slave_id = int(input("Slave ID [1]: ").strip() or "1")
+        delay = float(
+            input("Задержка между каналами (текущая: 0.1 сек) [0.1]: ").strip() or "0.1"
+        )
+        repeats = int(input("Количество повторов (текущее: 2) [2]: ").strip() or "2")
+        pause = float(
+            input("Пауза между повторами (текущая: 2 сек) [2]: ").strip() or "2"
+        )
+
+        test_sequence_tcp(
+            gateway_host, gateway_port, slave_id, delay, repeats, pause, raw=True
+        )
 
     else:
         # Автоопределение
@@ -286,7 +379,7 @@ def main():
         # Проверяем USB
         usb_available = Path("/dev/ttyCH343USB0").exists()
 
-        if usb_available and USE_MINIMALMODBUS:
+        if usb_available and USE_SERIAL:
             print("✅ Найден USB-RS485, используем прямое подключение")
             test_sequence_usb(delay=delay, repeats=repeats, pause=pause)
         else:
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Modbus TCP прокси: клиенты подключаются к нему, к Gateway — одно соединение.
+
+Каждый Gateway получает свой порт прокси: первый — ``--listen-port``,
+следующие — по порядку. Повторные чтения FC01/FC02/FC03 отвечаются из
+кэша (``--ttl`` мс), записи его сбрасывают (см. src/proxy.py).
+
+    python3 scripts/modbus_proxy.py --gateway 192.168.1.254 --listen 0.0.0.0
+    python3 scripts/modbus_proxy.py --gateway 192.168.1.254 192.168.1.253:502 --listen-port 5020
+Клиенты (SCADA, relayctl) вместо Gateway указывают адрес прокси:
+    python3 scripts/relayctl.py --host 127.0.0.1 --port 5020 diag
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.proxy import ModbusProxy
+
+
+def parse_gateway(text):
+    host, _, port = text.partition(':')
+    try:
+        return host, int(port or 502)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Gateway — host[:port]: {text!r}') from None
+
+
+async def run(args):
+    proxies, servers = [], []
+    for n, (host, port) in enumerate(args.gateway):
+        proxy = ModbusProxy(host, port, ttl=args.ttl / 1000, timeout=args.timeout)
+        server = await proxy.serve(args.listen, args.listen_port + n)
+        proxies.append(proxy)
+        servers.append(server)
+        print(f'🔀 {args.listen}:{args.listen_port + n} → {host}:{port}')
+    print(f'   Кэш чтений: {args.ttl:g} мс')
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    for server in servers:
+        server.close()
+    for proxy in proxies:
+        await proxy.close()
+        print(f'📊 {proxy.host}:{proxy.port}: {proxy.stats}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--gateway', type=parse_gateway, nargs='+', required=True,
+                        metavar='HOST[:PORT]')
+    parser.add_argument('--listen', default='127.0.0.1', help='Адрес для клиентов')
+    parser.add_argument('--listen-port', type=int, default=5020)
+    parser.add_argument('--ttl', type=float, default=250, help='Срок кэша чтений, мс (0 — без кэша)')
+    parser.add_argument('--timeout', type=float, default=1.0, help='Верхняя граница таймаута, сек')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
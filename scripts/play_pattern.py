@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Воспроизведение паттерна реле из файла (JSON/YAML, см. patterns/).
+
+    python3 scripts/play_pattern.py patterns/chaser.json --host 192.168.1.254
+    python3 scripts/play_pattern.py patterns/soak_4boards.yaml --local --repeat 3
+    python3 scripts/play_pattern.py patterns/chaser.json --dry-run
+
+Метрики Prometheus во время долгого прогона (HTTP и/или файл):
+    python3 scripts/play_pattern.py patterns/soak_4boards.yaml --metrics-port 9105
+    python3 scripts/play_pattern.py patterns/soak_4boards.yaml --metrics-file /var/lib/node_exporter/relay.prom
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.emulator import WaveshareEmulator
+from src.metrics import InstrumentedTransport, Metrics, export_textfile, serve_metrics
+from src.patterns import PatternError, compile_pattern, load_pattern, play
+from src.transport import RawTcpTransport
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pattern')
+    parser.add_argument('--host', default='192.168.1.254')
+    parser.add_argument('--port', type=int, default=502)
+    parser.add_argument('--local', action='store_true', help='Играть на эмуляторе Gateway')
+    parser.add_argument('--repeat', type=int, help='Переопределить число повторов')
+    parser.add_argument('--dry-run', action='store_true', help='Только скомпилировать')
+    parser.add_argument('--metrics-port', type=int, help='Отдавать метрики по HTTP /metrics')
+    parser.add_argument('--metrics-file', help='Переписывать файл метрик (textfile collector)')
+    args = parser.parse_args()
+
+    try:
+        pattern = load_pattern(args.pattern)
+    except (OSError, ValueError, PatternError) as e:
+        print(f'❌ {args.pattern}: {e}')
+        return 1
+
+    server = None
+    if args.local:
+        server = WaveshareEmulator()
+        args.host, args.port = server.start()
+
+    transport = RawTcpTransport(args.host, args.port)
+    metrics = None
+    if args.metrics_port is not None or args.metrics_file:
+        metrics = Metrics()
+        transport = InstrumentedTransport(transport, metrics)
+    if args.repeat is not None:
+        # До компиляции: от числа повторов зависят итоги кадров и байт
+        pattern = pattern._replace(repeat=args.repeat)
+    compiled = compile_pattern(pattern, transport)
+
+    print('=' * 60)
+    print(f'🎬 ПАТТЕРН "{compiled.name}"')
+    print('=' * 60)
+    print(f'Шагов за проход: {len(compiled.first)}, повторов: {compiled.repeat}')
+    print(f'Кадров всего: {compiled.frames}, байт на проводе: {compiled.wire_bytes}')
+    print()
+
+    if args.dry_run:
+        return 0
+
+    if not transport.connect():
+        print(f'❌ Не удалось подключиться к {args.host}:{args.port}')
+        return 1
+
+    if args.metrics_port is not None:
+        serve_metrics(metrics, args.metrics_port)
+        print(f'📈 Метрики: http://127.0.0.1:{args.metrics_port}/metrics')
+    if args.metrics_file:
+        export_textfile(metrics, args.metrics_file)
+        print(f'📈 Метрики: {args.metrics_file}')
+
+    print(f'▶️  Воспроизведение на {args.host}:{args.port}...')
+    try:
+        stats, errors = play(compiled, transport,
+                             on_error=lambda i, e: print(f'  ❌ шаг {i + 1}: {e}'))
+    except KeyboardInterrupt:
+        print('\n⏹️  Прервано пользователем')
+        return 1
+    finally:
+        transport.close()
+        if server is not None:
+            server.stop()
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
+
+    print(f'⏱️  {stats}')
+    print(f'{"✅" if not errors else "❌"} Ошибок обмена: {errors}')
+    return 0 if not errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
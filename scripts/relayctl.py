@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+relayctl — управление реле из командной строки, без вопросов в input().
+
+Подкоманды:
+    on CH / off CH   включить/выключить каналы (остальные не трогаются)
+    set CH|MASK      оставить включенными только указанные каналы
+    sweep            последовательный тест 1→32, 32→1
+    scan             поиск устройств (только чтение FC01/FC03)
+    bench            задержка и оп/с операций
+    diag             проверка связи: TCP 502, FC01, ICMP, причина отказа
+
+Каналы: 5, 1,3,5-8, all (нумерация с 1). Маска: 0x0000FFFF, 0b1010.
+
+Тяжелые зависимости (pymodbus, pyserial) импортируются только там, где
+нужны: транспорт по умолчанию raw-tcp работает на socket, и ``relayctl
+on 5`` в цикле shell запускается за десятки миллисекунд (см.
+scripts/bench_startup.py). Настройки по умолчанию берутся из окружения:
+RELAYCTL_HOST, RELAYCTL_PORT, RELAYCTL_TRANSPORT, RELAYCTL_DEVICE.
+
+Примеры:
+    python3 scripts/relayctl.py on 5
+    python3 scripts/relayctl.py -s 2 set 1-4,9 --verify
+    python3 scripts/relayctl.py sweep --delay 0.02 --repeats 2 --quiet
+    python3 scripts/relayctl.py diag --slaves 1 2 3 4 --icmp
+    python3 scripts/relayctl.py --transport rtu --device /dev/ttyCH343USB0 off all
+
+Код выхода: 0 — успешно, 1 — ошибка связи или расхождение, 2 — неверные аргументы.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+CHANNELS = 32  # как src.relay.CHANNELS; модуль не импортируется ради --help
+TRANSPORTS = ('tcp', 'raw-tcp', 'rtu', 'rtu-tcp')
+
+
+def parse_channels(text):
+    """'1,3,5-8' / 'all' -> отсортированные индексы каналов 0..31."""
+    if text == 'all':
+        return list(range(CHANNELS))
+    channels = set()
+    for part in text.split(','):
+        first, _, last = part.partition('-')
+        try:
+            first, last = int(first), int(last or first)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'неверный канал: {part!r}') from None
+        if not 1 <= first <= last <= CHANNELS:
+            raise argparse.ArgumentTypeError(f'каналы 1-{CHANNELS}: {part!r}')
+        channels.update(range(first - 1, last))
+    return sorted(channels)
+
+
+def parse_mask(text):
+    """Маска 0x…/0b… или список каналов -> маска."""
+    if text.startswith(('0x', '0b')):
+        try:
+            mask = int(text, 0)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'неверная маска: {text!r}') from None
+        if mask >> CHANNELS:
+            raise argparse.ArgumentTypeError(f'маска шире {CHANNELS} каналов: {text!r}')
+        return mask
+    if text == 'none':
+        return 0
+    mask = 0
+    for ch in parse_channels(text):
+        mask |= 1 << ch
+    return mask
+
+
+def format_channels(channels):
+    return ','.join(str(ch + 1) for ch in channels)
+
+
+def say(args, text):
+    if not args.quiet:
+        print(text)
+
+
+def connect(args):
+    from src.rtt import TimeoutPolicy
+    from src.transport import open_transport
+
+    # Таймаут по RTT платы; --timeout — первый запрос и верхняя граница
+    timeouts = None if args.fixed_timeout else TimeoutPolicy(args.timeout, ceiling=args.timeout)
+    if args.transport == 'rtu':
+        return open_transport('rtu', args.device, baudrate=args.baud, timeout=args.timeout,
+                              timeouts=timeouts)
+    return open_transport(args.transport, args.host, args.port, timeout=args.timeout,
+                          timeouts=timeouts)
+
+
+def open_board(args):
+    from src.relay import RelayBoard
+
+    return RelayBoard(connect(args), args.slave)
+
+
+def cmd_switch(args):
+    from src.relay import bits_to_mask
+
+    value = args.command == 'on'
+    board = open_board(args)
+    try:
+        frames = board.set_channels(args.channels, value)
+        if args.verify:
+            actual = bits_to_mask(board.transport.read_coils(args.slave, 0, CHANNELS))
+            wrong = [ch for ch in args.channels if bool(actual >> ch & 1) != value]
+            if wrong:
+                print(f'❌ Slave {args.slave}: каналы {format_channels(wrong)} '
+                      f'не {"включились" if value else "выключились"}', file=sys.stderr)
+                return 1
+    finally:
+        board.transport.close()
+    say(args, f'✅ Slave {args.slave}: {format_channels(args.channels)} '
+              f'{"вкл" if value else "выкл"} ({frames} кадр.)')
+    return 0
+
+
+def cmd_set(args):
+    board = open_board(args)
+    try:
+        board.write_mask(args.mask)
+        if args.verify:
+            mismatches = board.verify()
+            if mismatches:
+                from src.verify import format_mismatch
+                for mismatch in mismatches:
+                    print(f'❌ {format_mismatch(args.slave, mismatch)}', file=sys.stderr)
+                return 1
+    finally:
+        board.transport.close()
+    on = [ch for ch in range(CHANNELS) if args.mask >> ch & 1]
+    say(args, f'✅ Slave {args.slave}: маска 0x{args.mask:08X} '
+              f'(вкл: {format_channels(on) or "нет"})')
+    return 0
+
+
+def cmd_sweep(args):
+    import time
+
+    from src.console import Renderer
+    from src.health import HealthTransport
+    from src.relay import RelayBoard
+    from src.scheduler import DeadlineScheduler, JitterStats
+    from src.verify import VerifyStats, format_mismatch, verify_boards
+
+    # Плата, не ответившая несколько раз подряд, уходит в карантин: шаги
+    # не ждут таймаут, фоновая проверка FC01 возвращает ее после ответа
+    transport = HealthTransport(connect(args))
+    board = RelayBoard(transport, args.slave)
+    scheduler = DeadlineScheduler(args.delay)
+    verify_stats = VerifyStats()
+    total = JitterStats(args.delay)
+    errors = 0
+
+    with Renderer(quiet=args.quiet) as out:
+        def check():
+            for slave, mismatch in verify_boards([board], verify_stats):
+                out.log(f'⚠️  {format_mismatch(slave, mismatch)}')
+
+        def step(change):
+            nonlocal errors
+            ch, value = change
+            try:
+                board.set_coil(ch, value)
+                status = '✅'
+            except Exception as e:
+                errors += 1
+                status = f'❌ {e}'
+            out.status(f'Канал {ch + 1}: {status}')
+            if args.verify == 'step':
+                check()
+
+        def run_pass(title, changes):
+            out.log(title)
+            stats = scheduler.run(changes, step)
+            out.status(None)
+            if args.verify == 'batch':
+                check()
+            out.log(f'⏱️  {stats}')
+            total.merge(stats)
+
+        try:
+            board.all_off()
+            for repeat in range(args.repeats):
+                out.log(f'🔁 {repeat + 1}/{args.repeats}')
+                run_pass('🔄 Включение 1 -> 32...', [(ch, True) for ch in range(CHANNELS)])
+                run_pass('🔄 Выключение 32 -> 1...', [(ch, False) for ch in reversed(range(CHANNELS))])
+                if repeat < args.repeats - 1:
+                    time.sleep(args.pause)
+        finally:
+            board.transport.close()
+
+        out.summary(f'⏱️  Всего: {total}')
+        if args.verify != 'off':
+            out.summary(f'🔎 Проверка: {verify_stats}')
+        if transport.health.slaves:
+            out.summary(f'🩺 {transport.health}')
+        ok = verify_stats.ok and not errors
+        out.summary(f'{"✅" if ok else "❌"} Slave {args.slave}: {args.repeats} повт., '
+                    f'ошибок записи {errors}')
+    return 0 if ok else 1
+
+
+def cmd_scan(args):
+    import asyncio
+    import time
+
+    from src.discovery import discover
+
+    hosts = [args.host] + args.hosts
+    start = time.perf_counter()
+    found = asyncio.run(discover(hosts, args.port, slave_ids=range(args.first, args.last + 1),
+                                 probe=args.probe))
+    elapsed = time.perf_counter() - start
+    for host, devices in found.items():
+        say(args, f'Gateway {host}:{args.port}: найдено {len(devices)}')
+        for device in devices.values():
+            note = f' (exception {device.exception_code})' if device.exception_code else ''
+            # Найденные Slave ID печатаются и в тихом режиме — для скриптов
+            print(f'{host} {device.slave_id} {device.rtt_ms:.2f}{note}' if args.quiet else
+                  f'  ✅ Slave ID {device.slave_id:3}: RTT {device.rtt_ms:7.2f} мс{note}')
+    say(args, f'⏱️  {elapsed:.2f} сек')
+    return 0 if any(found.values()) else 1
+
+
+def cmd_bench(args):
+    import json
+
+    from src.bench import OPERATIONS, run_suite
+
+    transport = connect(args)
+    try:
+        report = run_suite({args.transport: transport}, args.slaves or [args.slave],
+                           args.ops or OPERATIONS, args.iterations)
+    finally:
+        transport.close()
+
+    say(args, f'{"slave":>5}  {"операция":9}{"p50, мс":>10}{"p95, мс":>10}{"оп/с":>10}')
+    for slave_id, per_op in report['results'][args.transport].items():
+        for name, stats in per_op.items():
+            say(args, f'{slave_id:>5}  {name:9}{stats["p50_ms"]:10.2f}'
+                      f'{stats["p95_ms"]:10.2f}{stats["ops_per_sec"]:10.1f}')
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        say(args, f'💾 Сохранено: {args.output}')
+    return 0
+
+
+def cmd_diag(args):
+    from src import preflight
+
+    result = preflight.run_preflight(args.host, args.port, args.slaves or [args.slave],
+                                     timeout=args.timeout, icmp=args.icmp)
+    probes = [(f'TCP {args.host}:{args.port}', result.tcp)]
+    if result.icmp is not None:
+        probes.append(('ICMP', result.icmp))
+    probes += [(f'FC01 Slave {slave_id}', probe) for slave_id, probe in result.slaves.items()]
+    for name, probe in probes:
+        rtt = f' ({probe.rtt_ms} мс)' if probe.rtt_ms is not None else ''
+        say(args, f'  {name}: {"✅" if probe.status == preflight.PROBE_OK else "❌"}{rtt} {probe.detail}')
+    if result.ok:
+        say(args, f'✅ {result.verdict} ({result.elapsed_ms} мс)')
+        return 0
+    print(f'❌ {result.verdict}: {result.detail}', file=sys.stderr)
+    return 1
+
+
+def build_parser():
+    env = os.environ.get
+    parser = argparse.ArgumentParser(
+        prog='relayctl', description=__doc__.strip().splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='Каналы: 5, 1,3,5-8, all. Маска: 0x0000FFFF, 0b1010, none.')
+    parser.add_argument('--host', default=env('RELAYCTL_HOST', '192.168.1.254'))
+    parser.add_argument('--port', type=int, default=int(env('RELAYCTL_PORT', '502')))
+    parser.add_argument('-t', '--transport', choices=TRANSPORTS,
+                        default=env('RELAYCTL_TRANSPORT', 'raw-tcp'),
+                        help='tcp — через pymodbus, raw-tcp — socket (по умолчанию, быстрый запуск)')
+    parser.add_argument('--device', default=env('RELAYCTL_DEVICE', '/dev/ttyCH343USB0'),
+                        help='Порт USB-RS485 для --transport rtu')
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('-s', '--slave', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=1.0,
+                        help='Таймаут, сек: верхняя граница адаптивного (по RTT)')
+    parser.add_argument('--fixed-timeout', action='store_true',
+                        help='Не подстраивать таймаут под RTT')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Выводить только ошибки и итоги')
+    # --quiet и после подкоманды; SUPPRESS — не затирать значение, заданное до нее
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-q', '--quiet', action='store_true', default=argparse.SUPPRESS,
+                        help='Выводить только ошибки и итоги')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='команда')
+
+    for name, help_text in (('on', 'включить каналы'), ('off', 'выключить каналы')):
+        command = commands.add_parser(name, parents=[common], help=help_text)
+        command.add_argument('channels', type=parse_channels, help='5, 1,3,5-8 или all')
+        command.add_argument('--verify', action='store_true', help='Проверить чтением FC01')
+        command.set_defaults(func=cmd_switch)
+
+    command = commands.add_parser('set', parents=[common],
+                                  help='только указанные каналы включены (одним FC15)')
+    command.add_argument('mask', type=parse_mask, help='каналы (1-4,9), маска (0xFF) или none')
+    command.add_argument('--verify', action='store_true', help='Проверить чтением FC01')
+    command.set_defaults(func=cmd_set)
+
+    command = commands.add_parser('sweep', parents=[common],
+                                  help='последовательный тест 1→32, 32→1')
+    command.add_argument('--delay', type=float, default=0.02, help='Шаг, сек')
+    command.add_argument('--repeats', type=int, default=1)
+    command.add_argument('--pause', type=float, default=1.0, help='Пауза между повторами, сек')
+    command.add_argument('--verify', choices=('off', 'step', 'batch'), default='batch')
+    command.set_defaults(func=cmd_sweep)
+
+    command = commands.add_parser('scan', parents=[common], help='поиск устройств (только чтение)')
+    command.add_argument('hosts', nargs='*', help='Еще Gateway, кроме --host')
+    command.add_argument('--first', type=int, default=1)
+    command.add_argument('--last', type=int, default=247)
+    command.add_argument('--probe', choices=('coils', 'registers'), default='coils')
+    command.set_defaults(func=cmd_scan, tcp_only=True)
+
+    command = commands.add_parser('bench', parents=[common], help='задержка и оп/с')
+    command.add_argument('--slaves', type=int, nargs='+')
+    command.add_argument('--ops', nargs='+', choices=('fc05', 'fc15', 'fc01', 'all_off', 'sweep'))
+    command.add_argument('--iterations', type=int, default=50)
+    command.add_argument('--output', help='Сохранить результаты в JSON (формат scripts/bench.py)')
+    command.set_defaults(func=cmd_bench)
+
+    command = commands.add_parser('diag', parents=[common], help='проверка связи и причина отказа')
+    command.add_argument('--slaves', type=int, nargs='+')
+    command.add_argument('--icmp', action='store_true', help='Дополнительно ICMP ping')
+    command.set_defaults(func=cmd_diag, tcp_only=True)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'tcp_only', False) and args.transport in ('rtu', 'rtu-tcp'):
+        parser.error(f'{args.command} работает только по Modbus TCP (--transport tcp/raw-tcp)')
+    from src.errors import RelayError
+
+    try:
+        return args.func(args)
+    except (RelayError, OSError) as e:
+        print(f'❌ {e}', file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
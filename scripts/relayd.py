@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Демон реле: держит соединения с парком Gateway, команды — по HTTP/WebSocket.
+
+Команды, пришедшие за ``--window`` мс, объединяются в одну запись на
+плату; изменения состояния рассылаются подписчикам WebSocket (см.
+src/daemon.py и src/api.py).
+
+С конфигурацией парка (см. src/fleet.py, раздел "scenes" — src/daemon.py):
+    python3 scripts/relayd.py --config fleet.json --listen 0.0.0.0 --http-port 8502
+Без оборудования (эмуляторы Gateway):
+    python3 scripts/relayd.py --local 1
+Команды:
+    curl -X POST localhost:8502/boards/127.0.0.1:40123/1/set -d '{"on": [1, 2]}'
+    curl -X POST localhost:8502/boards/127.0.0.1:40123/1/pulse -d '{"channels": [5], "duration": 1}'
+    curl localhost:8502/boards
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api import serve_api
+from src.daemon import DEFAULT_WINDOW, RelayDaemon, parse_scenes
+from src.emulator import SerialTiming, WaveshareEmulator
+from src.fleet import Fleet, FleetError, GatewayConfig, parse_fleet, read_config
+
+
+def local_gateways(count, baud):
+    """Эмуляторы Gateway по 4 порта, Slave ID N на PORTN."""
+    servers, gateways = [], []
+    for _ in range(count):
+        server = WaveshareEmulator(timing=SerialTiming(baud))
+        host, port = server.start()
+        servers.append(server)
+        gateways.append(GatewayConfig(host, port, {f'PORT{n}': (n,) for n in (1, 2, 3, 4)}))
+    return servers, gateways
+
+
+async def run(args, gateways, scenes):
+    fleet = Fleet(gateways, timeout=args.timeout)
+    daemon = RelayDaemon(fleet, window=args.window / 1000, scenes=parse_scenes(scenes, fleet.boards))
+    await daemon.start()
+    for name, error in fleet.unreachable.items():
+        print(f'❌ {name}: {error}')
+    server = await serve_api(daemon, args.listen, args.http_port)
+    print(f'🌐 http://{args.listen}:{args.http_port}/boards, ws://{args.listen}:{args.http_port}/ws')
+    for key, state in daemon.snapshot().items():
+        mask = '?' if state['mask'] is None else f'0x{state["mask"]:08X}'
+        print(f'  {key}: {mask}')
+    if daemon.scenes:
+        print(f'  Сцены: {", ".join(daemon.scenes)}')
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    server.close()
+    await server.wait_closed()
+    await daemon.stop()
+    print(f'📊 {daemon.stats}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--config', help='Конфигурация парка (JSON/YAML)')
+    parser.add_argument('--local', type=int, metavar='N', help='N эмуляторов Gateway вместо --config')
+    parser.add_argument('--baud', type=int, default=9600, help='Скорость RS485 эмуляторов')
+    parser.add_argument('--listen', default='127.0.0.1', help='Адрес HTTP/WebSocket')
+    parser.add_argument('--http-port', type=int, default=8502)
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW * 1000,
+                        help='Окно объединения команд, мс (0 — без ожидания)')
+    parser.add_argument('--timeout', type=float, default=1.0, help='Верхняя граница таймаута, сек')
+    args = parser.parse_args()
+    if not args.config and not args.local:
+        parser.error('нужен --config или --local')
+
+    servers, scenes = [], None
+    try:
+        if args.local:
+            servers, gateways = local_gateways(args.local, args.baud)
+        else:
+            data = read_config(args.config)
+            gateways, scenes = parse_fleet(data), data.get('scenes')
+        asyncio.run(run(args, gateways, scenes))
+    except FleetError as e:
+        print(f'❌ {e}', file=sys.stderr)
+        return 2
+    finally:
+        for server in servers:
+            server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
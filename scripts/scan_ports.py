@@ -2,13 +2,26 @@
 """
 Скрипт для сканирования портов Gateway с Mac.
 Проверяет Slave ID 1, 2, 3, 4.
+
+Режим --discover: только чтение (FC01/FC03), Slave ID 1-247, несколько
+Gateway параллельно, с замером RTT:
+    python3 scripts/scan_ports.py --discover 192.168.1.254 [192.168.1.253 ...]
 """
 
+import argparse
+import asyncio
 import sys
 import time
-from pymodbus.client import ModbusTcpClient
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import pymodbus
 
+from src.discovery import discover
+from src.relay import RelayBoard
+from src.session import get_session
+
 def test_gateway_ports_mac():
     print('=' * 60)
     print('🔍 СКАНИРОВАНИЕ ПОРТОВ GATEWAY (MAC)')
@@ -20,7 +33,7 @@ def test_gateway_ports_mac():
     gateway_port = 502
     
     try:
-        client = ModbusTcpClient(host=gateway_host, port=gateway_port, timeout=2)
+        client = get_session(gateway_host, gateway_port, timeout=2)
         
         print('Подключение к Gateway...')
         if not client.connect():
@@ -35,13 +48,8 @@ def test_gateway_ports_mac():
         for slave_id in ports:
             print(f'Проверка Slave ID {slave_id}...')
             try:
-                # Pymodbus v3.11+
-                result = client.write_coil(address=0, value=True, device_id=slave_id)
-                
-                if hasattr(result, 'isError') and result.isError():
-                    print(f'  ❌ Ошибка: {result}')
-                else:
-                    print(f'  ✅ УСПЕХ! Устройство найдено.')
+                RelayBoard(client, slave_id).set_coil(0, True)
+                print(f'  ✅ УСПЕХ! Устройство найдено.')
             except Exception as e:
                 print(f'  ❌ Ошибка: {e}')
             
@@ -58,5 +66,39 @@ def test_gateway_ports_mac():
         import traceback
         traceback.print_exc()
 
+def discover_devices(hosts, port, first, last, probe):
+    print('=' * 60)
+    print(f'🔍 ПОИСК УСТРОЙСТВ (Slave ID {first}-{last}, {probe}, только чтение)')
+    print('=' * 60)
+    print()
+
+    start = time.perf_counter()
+    found = asyncio.run(discover(hosts, port, slave_ids=range(first, last + 1), probe=probe))
+    elapsed = time.perf_counter() - start
+
+    for host, devices in found.items():
+        print(f'Gateway {host}:{port}: найдено {len(devices)}')
+        for device in devices.values():
+            note = f' (exception {device.exception_code})' if device.exception_code else ''
+            print(f'  ✅ Slave ID {device.slave_id:3}: RTT {device.rtt_ms:7.2f} мс{note}')
+        print()
+
+    print('=' * 60)
+    print(f'✅ СКАН ЗАВЕРШЕН за {elapsed:.2f} сек')
+    print('=' * 60)
+
+
 if __name__ == "__main__":
-    test_gateway_ports_mac()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--discover', nargs='+', metavar='HOST',
+                        help='Поиск устройств без записи на указанных Gateway')
+    parser.add_argument('--port', type=int, default=502)
+    parser.add_argument('--first', type=int, default=1)
+    parser.add_argument('--last', type=int, default=247)
+    parser.add_argument('--probe', choices=('coils', 'registers'), default='coils')
+    args = parser.parse_args()
+
+    if args.discover:
+        discover_devices(args.discover, args.port, args.first, args.last, args.probe)
+    else:
+        test_gateway_ports_mac()
@@ -6,13 +6,20 @@
 
 import sys
 import time
-from pymodbus.client import ModbusTcpClient
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import pymodbus
 
+from src.errors import RelayError
+from src.session import get_session
+from src.transport import SLAVE_KWARG, PymodbusTransport
+
 def test_relay_mac():
     print('=' * 60)
     print('🧪 ТЕСТ РЕЛЕ С ЛОКАЛЬНОЙ МАШИНЫ (MAC)')
-    print(f'Pymodbus version: {pymodbus.__version__}')
+    print(f'Pymodbus version: {pymodbus.__version__} (Slave ID: {SLAVE_KWARG}=)')
     print('=' * 60)
     print()
 
@@ -25,7 +32,7 @@ def test_relay_mac():
     print()
 
     try:
-        client = ModbusTcpClient(host=gateway_host, port=gateway_port, timeout=3)
+        client = get_session(gateway_host, gateway_port, timeout=3)
         
         print('Подключение к Gateway...')
         if not client.connect():
@@ -35,43 +42,27 @@ def test_relay_mac():
         print('✅ Подключено к Gateway')
         print()
         
+        transport = PymodbusTransport(client)
+        
         # Тест канала 1
         print('Тест канала 1...')
         print('Включение...', end=' ', flush=True)
         
-        # Попытка определить правильный аргумент для slave id
         try:
-            # Pymodbus v3.11+
-            result = client.write_coil(address=0, value=True, device_id=slave_id)
-        except TypeError:
-            try:
-                # Pymodbus v3.x (ранние)
-                result = client.write_coil(address=0, value=True, slave=slave_id)
-            except TypeError:
-                # Pymodbus v2.x
-                result = client.write_coil(address=0, value=True, unit=slave_id)
-        
-        if hasattr(result, 'isError') and result.isError():
-            print(f'❌ Ошибка: {result}')
-        else:
+            transport.write_coil(slave_id, 0, True)
             print('✅ Успешно')
+        except RelayError as e:
+            print(f'❌ Ошибка: {e}')
         
         time.sleep(2)
         
         print('Выключение...', end=' ', flush=True)
         
         try:
-            result = client.write_coil(address=0, value=False, device_id=slave_id)
-        except TypeError:
-            try:
-                result = client.write_coil(address=0, value=False, slave=slave_id)
-            except TypeError:
-                result = client.write_coil(address=0, value=False, unit=slave_id)
-        
-        if hasattr(result, 'isError') and result.isError():
-            print(f'❌ Ошибка: {result}')
-        else:
+            transport.write_coil(slave_id, 0, False)
             print('✅ Успешно')
+        except RelayError as e:
+            print(f'❌ Ошибка: {e}')
         
         client.close()
         print()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Долгий прогон WritePipeline с платой, которая никогда не отвечает (эмулятор).
+
+Записи идут по кругу исправной плате и выключенной. Ответов выключенной
+нет, поэтому каждая ее запись просрочена и потеряна; проверяется, что
+просроченные запросы не копятся (их не больше, чем успевает просрочиться
+за ``LATE_WINDOW`` таймаутов), а Transaction ID не кончаются.
+
+Пример:
+    python3 scripts/test_pipeline_offline.py --duration 10 --timeout 0.2
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.emulator import SerialTiming, WaveshareEmulator
+from src.errors import RelayError
+from src.pipeline import LATE_WINDOW, WritePipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=10.0, help='Сек')
+    parser.add_argument('--timeout', type=float, default=0.2)
+    parser.add_argument('--baud', type=int, default=115200)
+    parser.add_argument('--window', type=int, default=8)
+    args = parser.parse_args()
+
+    server = WaveshareEmulator(timing=SerialTiming(args.baud),
+                               response_timeout=args.timeout * 2)
+    host, port = server.start()
+    server.set_online(2, False)
+    pipeline = WritePipeline(host, port, window=args.window, timeout=args.timeout)
+    pipeline.connect()
+
+    print('=' * 60)
+    print(f'🧪 КОНВЕЙЕР: Slave 1 исправна, Slave 2 не отвечает, {args.duration:g} сек')
+    print('=' * 60)
+    error = None
+    peak = 0
+    deadline = time.perf_counter() + args.duration
+    n = 0
+    try:
+        while time.perf_counter() < deadline:
+            pipeline.write_coil(n % 2 + 1, 0, bool(n & 2))
+            peak = max(peak, len(pipeline._expired))
+            n += 1
+    except RelayError as e:
+        error = e
+    pipeline.close()
+    server.stop()
+
+    stats = pipeline.stats
+    # За таймаут просрочивается не больше окна; помнятся (1 + LATE_WINDOW) таймаутов
+    limit = args.window * (2 + LATE_WINDOW)
+    print(f'  {stats}')
+    print(f'  Просроченных в памяти: максимум {peak}, в конце {len(pipeline._expired)} '
+          f'(граница {limit}, потеряно всего {stats.lost})')
+    if error is not None:
+        print(f'❌ Ошибка: {error}')
+        return 1
+    if peak > limit or not stats.lost:
+        print('❌ Просроченные запросы копятся')
+        return 1
+    print('✅ Просроченные запросы не копятся')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
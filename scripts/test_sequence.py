@@ -6,19 +6,45 @@
 
 import sys
 import time
-import subprocess
-import platform
-from pymodbus.client import ModbusTcpClient
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import pymodbus
 
-def print_failure_report(host, failure_type="PING"):
+from src import preflight
+from src.console import Renderer
+from src.errors import RelayError
+from src.relay import RelayBoard
+from src.scheduler import DeadlineScheduler, JitterStats
+from src.session import get_session
+from src.verify import VerifyStats, format_mismatch, verify_boards
+
+def print_preflight(result):
+    """Результаты проб одной строкой на пробу."""
+    tcp = result.tcp
+    rtt = f' ({tcp.rtt_ms} мс)' if tcp.rtt_ms is not None else ''
+    print(f'  TCP {result.host}:{result.port}: {"✅" if tcp.status == preflight.PROBE_OK else "❌"}{rtt} {tcp.detail}')
+    if result.icmp is not None:
+        icmp = result.icmp
+        rtt = f' ({icmp.rtt_ms} мс)' if icmp.rtt_ms is not None else ''
+        print(f'  ICMP: {"✅" if icmp.status == preflight.PROBE_OK else "❌"}{rtt} {icmp.detail}')
+    for slave_id, probe in result.slaves.items():
+        rtt = f' ({probe.rtt_ms} мс)' if probe.rtt_ms is not None else ''
+        print(f'  FC01 Slave {slave_id}: {"✅" if probe.status == preflight.PROBE_OK else "❌"}{rtt} {probe.detail}')
+
+
+def print_failure_report(result):
     print('\n' + '!' * 60)
     print('❌ ОТЧЕТ ОБ ОШИБКЕ ПОДКЛЮЧЕНИЯ')
     print('!' * 60)
-    print(f'Целевой хост: {host}')
+    print(f'Целевой хост: {result.host}')
+    print(f'Причина: {result.detail}')
     
-    if failure_type == "PING":
-        print('Тип ошибки: Нет ответа на PING (ICMP)')
+    if result.verdict == preflight.NO_ROUTE:
+        print('Тип ошибки: Хост недоступен (нет маршрута или нет ответа на TCP SYN)')
+        if result.icmp is not None and result.icmp.status == preflight.PROBE_OK:
+            print('   ICMP отвечает — порт 502 фильтруется (Firewall).')
         print('\n🔍 ВОЗМОЖНЫЕ ПРИЧИНЫ И РЕШЕНИЯ:')
         print('1. 🔌 Питание Gateway:')
         print('   - Проверьте, горит ли индикатор PWR на устройстве.')
@@ -31,54 +57,31 @@ def print_failure_report(host, failure_type="PING"):
         print('4. 🔢 Настройки IP Gateway:')
         print('   - Убедитесь, что IP адрес Gateway действительно 192.168.1.254.')
         
-    elif failure_type == "MODBUS_CONNECT":
-        print('Тип ошибки: Порт 502 недоступен (TCP Connection Refused/Timeout)')
+    elif result.verdict == preflight.REFUSED:
+        print('Тип ошибки: Порт 502 закрыт (TCP Connection Refused)')
         print('\n🔍 ВОЗМОЖНЫЕ ПРИЧИНЫ И РЕШЕНИЯ:')
         print('1. ⚙️ Настройки Gateway:')
         print('   - Проверьте, что порт устройства установлен на 502.')
         print('   - Проверьте, что протокол установлен как "Modbus TCP to RTU".')
         print('2. 🔄 Зависшее соединение:')
         print('   - Попробуйте перезагрузить Gateway (выкл/вкл питание).')
-        print('3. 🧱 Блокировка:')
-        print('   - Проверьте настройки Firewall.')
 
-    print('=' * 60)
+    elif result.verdict == preflight.RTU_SILENT:
+        print('Тип ошибки: Modbus TCP работает, но ни одна плата не ответила')
+        print('\n🔍 ВОЗМОЖНЫЕ ПРИЧИНЫ И РЕШЕНИЯ:')
+        print('1. 🔌 Питание плат реле.')
+        print('2. 🔗 Проводка RS485: A/B не перепутаны, GND подключен.')
+        print('3. ⚙️ Скорость и четность порта Gateway совпадают с платами (9600 8N1).')
+        print('4. 🔄 После смены настроек нажмите "Restart DEV" в веб-интерфейсе.')
 
-def ping_gateway(host):
-    """
-    Проверяет доступность хоста через ping с таймером.
-    """
-    param = '-n' if platform.system().lower() == 'windows' else '-c'
-    command = ['ping', param, '1', host]
-    
-    print(f'📡 Проверка связи с {host}... ⏳ 0s', end='', flush=True)
-    
-    start_time = time.time()
-    try:
-        # Запускаем ping
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        while process.poll() is None:
-            elapsed = int(time.time() - start_time)
-            print(f'\r📡 Проверка связи с {host}... ⏳ {elapsed}s', end='', flush=True)
-            time.sleep(0.5)
-            
-            # Таймаут 5 секунд
-            if elapsed > 5:
-                process.kill()
-                print(f'\r📡 Проверка связи с {host}... ❌ Timeout')
-                return False
-
-        print() # Перенос строки
-        if process.returncode == 0:
-            print(f'✅ Связь с {host} есть')
-            return True
-        else:
-            print(f'❌ Нет связи с {host}')
-            return False
-    except Exception as e:
-        print(f'\n❌ Ошибка при выполнении ping: {e}')
-        return False
+    elif result.verdict == preflight.WRONG_SLAVE:
+        print(f'Тип ошибки: Не отвечают Slave ID {result.failed_slaves()}')
+        print('\n🔍 ВОЗМОЖНЫЕ ПРИЧИНЫ И РЕШЕНИЯ:')
+        print('1. 🔢 Адрес платы (DIP-переключатели) совпадает с Slave ID в скрипте.')
+        print('2. 🗺️ В режиме Multi-host Slave ID N идет на PORT N Gateway.')
+        print('3. 🔍 Найти фактические адреса: python3 scripts/scan_ports.py --discover HOST')
+
+    print('=' * 60)
 
 def test_sequence_mac():
     print('=' * 60)
@@ -93,80 +96,108 @@ def test_sequence_mac():
     slave_id = 1
     delay = 0.02
     repeats = 4
+    # Проверка чтением FC01: 'off', 'step' (после каждого шага), 'batch' (после прохода)
+    verify_mode = 'batch'
+    # Тихий режим: во время теста ничего не выводится, только итоги в конце
+    quiet = False
+    # ICMP ping в проверке перед тестом (параллельно с TCP и FC01)
+    icmp = False
 
     print(f'Gateway: {gateway_host}:{gateway_port}')
     print(f'Slave ID: {slave_id}')
-    print(f'Задержка: {delay} сек')
+    print(f'Шаг: {delay} сек (по дедлайнам, с учетом времени записи)')
     print(f'Повторов: {repeats}')
+    print(f'Проверка состояния: {verify_mode}')
     print()
 
-    # Проверка ping
-    if not ping_gateway(gateway_host):
-        print_failure_report(gateway_host, "PING")
+    # Проверка перед тестом: TCP 502 и FC01 параллельно, за миллисекунды
+    print(f'📡 Проверка связи с {gateway_host}...')
+    result = preflight.run_preflight(gateway_host, gateway_port, [slave_id], icmp=icmp)
+    print_preflight(result)
+    if not result.ok:
+        print_failure_report(result)
         print('❌ Тест остановлен из-за отсутствия связи')
         return
+    print(f'✅ Связь есть ({result.elapsed_ms} мс)')
+    print()
 
     try:
-        client = ModbusTcpClient(host=gateway_host, port=gateway_port, timeout=3)
+        client = get_session(gateway_host, gateway_port, timeout=3)
         
         print('Подключение к Gateway...')
         if not client.connect():
             print('❌ Не удалось подключиться к Gateway')
-            print_failure_report(gateway_host, "MODBUS_CONNECT")
             return
         
         print('✅ Подключено к Gateway')
         print()
 
-        # Функция для отправки команды с учетом версии pymodbus
-        def write_coil_safe(addr, val):
-            try:
-                return client.write_coil(address=addr, value=val, device_id=slave_id)
-            except TypeError:
-                try:
-                    return client.write_coil(address=addr, value=val, slave=slave_id)
-                except TypeError:
-                    return client.write_coil(address=addr, value=val, unit=slave_id)
-
-        # Сначала выключаем все
-        print('Выключение всех каналов...')
-        for i in range(32):
-            write_coil_safe(i, False)
-        print('✅ Все выключены')
-        print()
+        board = RelayBoard(client, slave_id)
 
-        for cycle in range(repeats):
-            print(f'=' * 40)
-            print(f'🔁 ЦИКЛ {cycle + 1}/{repeats}')
-            print(f'=' * 40)
-            
-            print('🔄 Включение 1 -> 32...')
-            for i in range(32):
-                result = write_coil_safe(i, True)
-                status = "✅" if not (hasattr(result, 'isError') and result.isError()) else "❌"
-                print(f'Канал {i+1}: {status}', end='\r')
-                time.sleep(delay)
-            print(f'Канал 32: ✅ (Готово)   ')
-            
-            time.sleep(1)
-            
-            print('🔄 Выключение 32 -> 1...')
-            for i in range(31, -1, -1):
-                result = write_coil_safe(i, False)
-                status = "✅" if not (hasattr(result, 'isError') and result.isError()) else "❌"
-                print(f'Канал {i+1}: {status}', end='\r')
-                time.sleep(delay)
-            print(f'Канал 1: ✅ (Готово)    ')
-            
-            if cycle < repeats - 1:
-                print('⏸️  Пауза 1 сек...')
-                time.sleep(1)
-            print()
+        scheduler = DeadlineScheduler(delay)
+        verify_stats = VerifyStats()
+        total = JitterStats(delay)
+
+        # Вывод идет через Renderer: шаг только кладет событие в очередь,
+        # терминал перерисовывается отдельным потоком 10 раз в секунду
+        with Renderer(quiet=quiet) as out:
+            def check():
+                for slave, mismatch in verify_boards([board], verify_stats):
+                    out.log(f'⚠️  {format_mismatch(slave, mismatch)}')
 
-        client.close()
-        print('=' * 60)
-        print('✅ ТЕСТ ЗАВЕРШЕН')
-        print('=' * 60)
+            def write_coil_safe(addr, val):
+                try:
+                    board.set_coil(addr, val)
+                    return True
+                except RelayError:
+                    return False
+
+            def step(change):
+                i, val = change
+                status = "✅" if write_coil_safe(i, val) else "❌"
+                out.status(f'Канал {i+1}: {status}')
+                if verify_mode == 'step':
+                    check()
+
+            def run_pass(title, changes):
+                out.log(title)
+                stats = scheduler.run(changes, step)
+                out.status(None)
+                if verify_mode == 'batch':
+                    check()
+                out.log(f'⏱️  {stats}')
+                total.merge(stats)
+
+            # Сначала выключаем все (один кадр FC15 вместо 32 x FC05)
+            out.log('Выключение всех каналов...')
+            board.all_off()
+            out.log('✅ Все выключены')
+            out.log()
+
+            for cycle in range(repeats):
+                out.log('=' * 40)
+                out.log(f'🔁 ЦИКЛ {cycle + 1}/{repeats}')
+                out.log('=' * 40)
+
+                run_pass('🔄 Включение 1 -> 32...', [(i, True) for i in range(32)])
+                time.sleep(1)
+                run_pass('🔄 Выключение 32 -> 1...', [(i, False) for i in range(31, -1, -1)])
+
+                if cycle < repeats - 1:
+                    out.log('⏸️  Пауза 1 сек...')
+                    time.sleep(1)
+                out.log()
+
+            client.close()
+            out.summary('=' * 60)
+            out.summary(f'⏱️  Всего: {total}')
+            if verify_mode != 'off':
+                # В режиме step время проверок входит в шаги, здесь — отдельно
+                out.summary(f'🔎 Проверка: {verify_stats}')
+                if not verify_stats.ok:
+                    out.summary('❌ Фактическое состояние расходилось с запрошенным')
+            out.summary('✅ ТЕСТ ЗАВЕРШЕН')
+            out.summary('=' * 60)
 
     except Exception as e:
         print(f'❌ Ошибка: {e}')
@@ -0,0 +1,6 @@
+"""
+Библиотека управления релейными платами Waveshare через Modbus.
+
+Скрипты из ``scripts/`` добавляют корень проекта в ``sys.path`` и импортируют
+модули как ``from src.relay import RelayBoard``.
+"""
@@ -0,0 +1,313 @@
+"""
+HTTP и WebSocket API демона реле (``src.daemon``) на asyncio, без зависимостей.
+
+HTTP, тела запросов и ответы — JSON; ``{board}`` — ``host:port/slave``,
+каналы — с 1:
+    GET  /boards                  состояние всех плат
+    GET  /boards/{board}          одна плата
+    POST /boards/{board}/set      {"on": [1, 2], "off": [3]} или {"mask": "0x0000FFFF"}
+    POST /boards/{board}/pulse    {"channels": [5], "duration": 0.5}
+    GET  /scenes                  сцены и маски их плат
+    POST /scenes/{name}           применить сцену
+    GET  /stats                   команды клиентов против записей на шину
+Ответ на команду приходит после записи на плату (вместе с командами того
+же окна): {"board": ..., "ok": true, "frames": 1, ...}; 502 — плата не
+ответила или запись не удалась.
+
+WebSocket (GET /ws): сначала {"event": "snapshot", "boards": {...}}, затем
+события {"event": "state" | "health", "board": ...} при каждом изменении.
+Клиент может слать команды сообщениями:
+    {"op": "set", "board": "192.168.1.254:502/1", "on": [1], "id": 7}
+    {"op": "pulse" | "scene" | "get" | "stats" | "scenes", ...}
+и получает {"reply": 7, "status": 200, "result": {...}}.
+
+Пример:
+    server = await serve_api(daemon, '127.0.0.1', 8502)
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from src.daemon import board_id, channels_mask, parse_mask
+from src.errors import RelayError
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+WS_TEXT = 0x1
+WS_CLOSE = 0x8
+WS_PING = 0x9
+WS_PONG = 0xA
+
+MAX_BODY = 64 * 1024
+MAX_PULSE = 3600.0
+
+
+class ApiError(Exception):
+    """Ошибка запроса: HTTP статус и текст для клиента."""
+
+    def __init__(self, status, message):
+        self.status = status
+        super().__init__(message)
+
+
+def _result(key, result):
+    return {'board': board_id(key), 'ok': result.error is None, 'frames': result.frames,
+            'error': None if result.error is None else str(result.error),
+            'elapsed_ms': result.elapsed_ms}
+
+
+def _unmask(data, mask):
+    key = (mask * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(len(data), 'big')
+
+
+def ws_frame(opcode, payload):
+    """Кадр WebSocket от сервера (без маски, не фрагментирован)."""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack('>BB', 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack('>BBH', 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack('>BBQ', 0x80 | opcode, 127, n)
+    return head + payload
+
+
+async def ws_read(reader):
+    """Следующее сообщение клиента: (opcode, данные); фрагменты склеиваются."""
+    opcode, message = None, b''
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        length = b1 & 0x7F
+        if length == 126:
+            (length,) = struct.unpack('>H', await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack('>Q', await reader.readexactly(8))
+        if len(message) + length > MAX_BODY:
+            raise ApiError(413, 'сообщение больше 64 КБ')
+        mask = await reader.readexactly(4) if b1 & 0x80 else b''
+        data = await reader.readexactly(length)
+        if mask:
+            data = _unmask(data, mask)
+        if b0 & 0x0F >= 0x8:
+            return b0 & 0x0F, data
+        opcode = opcode or b0 & 0x0F
+        message += data
+        if b0 & 0x80:
+            return opcode, message
+
+
+class Api:
+    """Обработчик соединений ``asyncio.start_server`` поверх RelayDaemon."""
+
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def _board(self, board):
+        try:
+            return self.daemon.board(board)
+        except KeyError as e:
+            raise ApiError(404, e.args[0]) from None
+
+    async def command(self, op, board, body):
+        """Команда HTTP или WebSocket -> (статус, JSON)."""
+        daemon = self.daemon
+        try:
+            if op == 'get':
+                return 200, daemon.snapshot(None if board is None else [self._board(board)])
+            if op == 'stats':
+                return 200, daemon.stats.as_dict()
+            if op == 'scenes':
+                return 200, {name: {board_id(key): mask for key, mask in scene.items()}
+                             for name, scene in daemon.scenes.items()}
+            if op == 'set':
+                key = self._board(board)
+                if 'mask' in body:
+                    result = await daemon.set_mask(key, parse_mask(body['mask']))
+                else:
+                    result = await daemon.set(key, channels_mask(body.get('on', ())),
+                                              channels_mask(body.get('off', ())))
+                return (200 if result.error is None else 502), _result(key, result)
+            if op == 'pulse':
+                key = self._board(board)
+                duration = body.get('duration', 0.5)
+                if isinstance(duration, bool):
+                    raise ValueError(f'duration — число сек: {duration!r}')
+                duration = float(duration)
+                if not 0 < duration <= MAX_PULSE:
+                    raise ValueError(f'duration 0-{MAX_PULSE:.0f} сек: {duration}')
+                result = await daemon.pulse(key, channels_mask(body.get('channels', ())), duration)
+                return (200 if result.error is None else 502), _result(key, result)
+            if op == 'scene':
+                name = body.get('name')
+                if name not in daemon.scenes:
+                    raise ApiError(404, f'сцена {name} не описана в конфигурации')
+                results = await daemon.scene(name)
+                ok = all(result.error is None for result in results.values())
+                return (200 if ok else 502), {
+                    'scene': name, 'ok': ok,
+                    'boards': [_result(key, result) for key, result in results.items()]}
+        except (ValueError, TypeError) as e:
+            raise ApiError(400, str(e)) from None
+        except (RelayError, OSError) as e:
+            # Запись на шину упала целиком (не ошибка одной платы) — 502 с текстом
+            return 502, {'ok': False, 'error': str(e)}
+        raise ApiError(404, f'неизвестная команда: {op}')
+
+    @staticmethod
+    def route(method, path):
+        """Метод и путь -> (команда, плата/сцена)."""
+        parts = [unquote(part) for part in path.split('?', 1)[0].split('/') if part]
+        if method == 'GET' and parts in (['boards'], ['stats'], ['scenes']):
+            return {'boards': 'get'}.get(parts[0], parts[0]), None
+        if parts[:1] == ['boards'] and len(parts) in (3, 4):
+            board = '/'.join(parts[1:3])
+            if method == 'GET' and len(parts) == 3:
+                return 'get', board
+            if method == 'POST' and len(parts) == 4 and parts[3] in ('set', 'pulse'):
+                return parts[3], board
+        if method == 'POST' and parts[:1] == ['scenes'] and len(parts) == 2:
+            return 'scene', parts[1]
+        raise ApiError(404, f'нет такого пути: {method} {path}')
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, path, _ = line.decode('latin-1').split()
+        except ValueError:
+            raise ApiError(400, 'неверная строка запроса') from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise ApiError(400, 'неверный Content-Length') from None
+        if not 0 <= length <= MAX_BODY:
+            raise ApiError(413, 'тело больше 64 КБ')
+        body = await reader.readexactly(length) if length else b''
+        return method, path, headers, body
+
+    def _respond(self, writer, status, payload, keep_alive=True):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        connection = '' if keep_alive else 'Connection: close\r\n'
+        writer.write((f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+                      'Content-Type: application/json; charset=utf-8\r\n'
+                      f'Content-Length: {len(body)}\r\n{connection}\r\n').encode() + body)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    if path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                        await self._websocket(reader, writer, headers)
+                        break
+                    op, target = self.route(method, path)
+                    try:
+                        body = json.loads(body) if body else {}
+                    except ValueError:
+                        raise ApiError(400, 'тело запроса — не JSON') from None
+                    if not isinstance(body, dict):
+                        raise ApiError(400, 'тело запроса — не объект JSON')
+                    if op == 'scene':
+                        body['name'] = target
+                    status, payload = await self.command(op, target, body)
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                except ApiError as e:
+                    # После ошибки разбора поток запросов не восстановить — закрываем
+                    status, payload, keep_alive = e.status, {'error': str(e)}, False
+                self._respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _websocket(self, reader, writer, headers):
+        key = headers.get('sec-websocket-key')
+        if not key:
+            raise ApiError(400, 'нет Sec-WebSocket-Key')
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n'
+                      f'Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n').encode())
+        send_lock = asyncio.Lock()
+
+        async def send(payload, opcode=WS_TEXT):
+            if isinstance(payload, dict):
+                payload = json.dumps(payload, ensure_ascii=False).encode()
+            async with send_lock:
+                writer.write(ws_frame(opcode, payload))
+                await writer.drain()
+
+        async def push(queue):
+            while True:
+                event = await queue.get()
+                if event is None:
+                    # Очередь переполнилась: клиент не успевает читать события
+                    await send(struct.pack('>H', 1008), WS_CLOSE)
+                    writer.close()
+                    return
+                await send(event)
+
+        async def reply(data):
+            message = {}
+            try:
+                decoded = json.loads(data)
+                if not isinstance(decoded, dict):
+                    raise ApiError(400, 'сообщение — не объект JSON')
+                message = decoded
+                status, result = await self.command(message.get('op'), message.get('board'),
+                                                    message)
+            except ApiError as e:
+                status, result = e.status, {'error': str(e)}
+            except ValueError:
+                status, result = 400, {'error': 'сообщение — не JSON'}
+            await send({'reply': message.get('id'), 'status': status, 'result': result})
+
+        daemon = self.daemon
+        queue = daemon.subscribe()
+        pusher = asyncio.create_task(push(queue))
+        tasks = set()
+        try:
+            await send({'event': 'snapshot', 'boards': daemon.snapshot()})
+            while True:
+                opcode, data = await ws_read(reader)
+                if opcode == WS_CLOSE:
+                    await send(data[:2], WS_CLOSE)
+                    break
+                if opcode == WS_PING:
+                    await send(data, WS_PONG)
+                elif opcode == WS_TEXT:
+                    # Команды выполняются параллельно: ответ приходит после записи,
+                    # а следующие команды клиента попадают в то же окно
+                    task = asyncio.create_task(reply(data))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        except ApiError as e:
+            await send(struct.pack('>H', 1009) + str(e).encode(), WS_CLOSE)
+        finally:
+            daemon.unsubscribe(queue)
+            pusher.cancel()
+            for task in tasks:
+                task.cancel()
+
+
+async def serve_api(daemon, host='127.0.0.1', port=8502):
+    """Запустить HTTP/WebSocket сервер; возвращает asyncio.Server."""
+    return await asyncio.start_server(Api(daemon).handle, host, port)
@@ -0,0 +1,153 @@
+"""
+Асинхронный Modbus TCP клиент с конвейером запросов.
+
+Gateway в режиме Multi-host маршрутизирует запросы по Slave ID на разные
+порты RS485, поэтому запросы к разным платам могут выполняться одновременно.
+AsyncModbusTcpClient из pymodbus держит блокировку на всю транзакцию
+и отправляет следующий запрос только после ответа на предыдущий, поэтому
+здесь MBAP обрамление делается вручную: в одном соединении может висеть
+до ``max_in_flight`` запросов, ответы сопоставляются по Transaction ID.
+
+С ``timeouts`` (``src.rtt.TimeoutPolicy``) таймаут запроса без явного
+``timeout`` берется из RTT платы.
+
+Пример:
+    async with AsyncRelayClient('192.168.1.254') as client:
+        await asyncio.gather(*(client.write_coil(sid, 0, True) for sid in (1, 2, 3, 4)))
+"""
+
+import asyncio
+import time
+
+from src import pdu
+from src.errors import ConnectionLost, RelayError, RelayTimeout
+
+MAX_MBAP_LENGTH = 254
+
+
+class AsyncRelayClient:
+    def __init__(self, host, port=502, timeout=3, max_in_flight=16, timeouts=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.timeouts = timeouts
+        self.max_in_flight = max_in_flight
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}
+        self._next_tid = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._writer = None
+        self._fail_pending(ConnectionLost(f'{self.host}:{self.port}: соединение закрыто'))
+
+    def _fail_pending(self, error):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    def _allocate_tid(self):
+        for _ in range(0x10000):
+            self._next_tid = (self._next_tid + 1) & 0xFFFF
+            if self._next_tid not in self._pending:
+                return self._next_tid
+        raise RelayError('нет свободных Transaction ID')
+
+    async def _read_loop(self):
+        try:
+            while True:
+                header = await self._reader.readexactly(pdu.MBAP_HEADER.size)
+                tid, protocol, length, _ = pdu.MBAP_HEADER.unpack(header)
+                # Unit ID + PDU до 253 байт; иначе поток не разобрать — рвем соединение
+                if protocol != 0 or not 2 <= length <= MAX_MBAP_LENGTH:
+                    raise ConnectionLost(f'{self.host}:{self.port}: неверный MBAP заголовок '
+                                         f'{header.hex()}')
+                body = await self._reader.readexactly(length - 1)
+                future = self._pending.pop(tid, None)
+                # Ответ на запрос, по которому уже истек таймаут — отбрасываем
+                if future is not None and not future.done():
+                    future.set_result(body)
+        except (asyncio.IncompleteReadError, OSError, ConnectionLost) as e:
+            # Сокет закрывается сразу: ``connected`` — False, новые запросы
+            # получают ConnectionLost, а не таймаут
+            self._writer.close()
+            if not isinstance(e, ConnectionLost):
+                e = ConnectionLost(f'{self.host}:{self.port}: {e}')
+            self._fail_pending(e)
+
+    async def execute(self, slave_id, request, timeout=None):
+        """Отправить PDU и дождаться ответного PDU (bytes)."""
+        if not self.connected:
+            raise ConnectionLost(f'{self.host}:{self.port}: нет соединения')
+
+        timeouts = self.timeouts
+        async with self._slots:
+            if not self.connected:
+                raise ConnectionLost(f'{self.host}:{self.port}: соединение закрыто')
+            if timeout is None:
+                timeout = self.timeout if timeouts is None else timeouts.timeout(slave_id)
+            tid = self._allocate_tid()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tid] = future
+            self._writer.write(pdu.mbap(tid, slave_id, request))
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                if timeouts is not None:
+                    timeouts.expired(slave_id)
+                raise RelayTimeout(f'Slave {slave_id}: нет ответа за {timeout:.3g} сек') from None
+            finally:
+                self._pending.pop(tid, None)
+            if timeouts is not None:
+                timeouts.observe(slave_id, time.perf_counter() - start)
+            return response
+
+    async def request(self, slave_id, request, timeout=None):
+        response = await self.execute(slave_id, request, timeout)
+        return pdu.parse_response(slave_id, request, response)
+
+    async def read_coils(self, slave_id, address, count, timeout=None):
+        return await self.request(slave_id, pdu.read_coils(address, count), timeout)
+
+    async def read_holding_registers(self, slave_id, address, count, timeout=None):
+        return await self.request(slave_id, pdu.read_holding_registers(address, count), timeout)
+
+    async def write_coil(self, slave_id, address, value, timeout=None):
+        return await self.request(slave_id, pdu.write_coil(address, value), timeout)
+
+    async def write_coils(self, slave_id, address, values, timeout=None):
+        return await self.request(slave_id, pdu.write_coils(address, values), timeout)
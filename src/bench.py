@@ -0,0 +1,145 @@
+"""
+Бенчмарк операций с реле: задержка p50/p95/p99 и операций в секунду.
+
+Операции:
+    fc05     — запись одного coil (чередование вкл/выкл канала 1)
+    fc15     — запись всех 32 coils одним кадром (чередование масок)
+    fc01     — чтение всех 32 coils
+    all_off  — "выключить все" одним FC15
+    sweep    — полный проход 1→32 вкл, 32→1 выкл (64 x FC05),
+               итераций в 10 раз меньше, чем у остальных операций
+
+Результаты — словарь, пригодный для json.dump; ``compare`` сравнивает
+его с сохраненным прогоном и возвращает операции, ставшие медленнее.
+"""
+
+import math
+import platform
+import time
+
+from src.relay import ALL_OFF, ALL_ON, CHANNELS, RelayBoard
+
+OPERATIONS = ('fc05', 'fc15', 'fc01', 'all_off', 'sweep')
+ALTERNATING = 0x55555555
+
+
+def percentile(samples, p):
+    """Перцентиль по уже отсортированному списку (ближайший ранг)."""
+    if not samples:
+        return None
+    rank = min(len(samples), max(1, math.ceil(p / 100 * len(samples))))
+    return samples[rank - 1]
+
+
+def summarize(samples, elapsed):
+    ordered = sorted(samples)
+    return {
+        'count': len(samples),
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 3),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'ops_per_sec': round(len(samples) / elapsed, 1) if elapsed else None,
+    }
+
+
+def _operation(board, name):
+    """Функция одной итерации операции ``name``."""
+    transport = board.transport
+    slave_id = board.slave_id
+
+    if name == 'fc05':
+        state = [False]
+
+        def run():
+            state[0] = not state[0]
+            transport.write_coil(slave_id, 0, state[0])
+    elif name == 'fc15':
+        masks = [ALTERNATING, ALTERNATING << 1 & ALL_ON]
+        state = [0]
+
+        def run():
+            state[0] ^= 1
+            board.write_mask(masks[state[0]])
+    elif name == 'fc01':
+        def run():
+            transport.read_coils(slave_id, 0, CHANNELS)
+    elif name == 'all_off':
+        def run():
+            board.write_mask(ALL_OFF)
+    elif name == 'sweep':
+        def run():
+            for ch in range(CHANNELS):
+                transport.write_coil(slave_id, ch, True)
+            for ch in reversed(range(CHANNELS)):
+                transport.write_coil(slave_id, ch, False)
+    else:
+        raise ValueError(f'неизвестная операция: {name}')
+    return run
+
+
+def run_operation(board, name, iterations, warmup=2):
+    run = _operation(board, name)
+    for _ in range(warmup):
+        run()
+
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(iterations):
+        t0 = clock()
+        run()
+        samples.append(clock() - t0)
+    return summarize(samples, clock() - start)
+
+
+def run_suite(transports, slave_ids, operations=OPERATIONS, iterations=50, warmup=2,
+              progress=None):
+    """
+    Прогнать ``operations`` для каждого транспорта и Slave ID.
+
+    ``transports`` — ``{name: Transport}``. Результат:
+    ``{'meta': {...}, 'results': {transport: {slave_id: {operation: stats}}}}``
+    (Slave ID в ключах — строки, как после json.load).
+    """
+    results = {}
+    for transport_name, transport in transports.items():
+        per_slave = results.setdefault(transport_name, {})
+        for slave_id in slave_ids:
+            board = RelayBoard(transport, slave_id)
+            per_op = per_slave.setdefault(str(slave_id), {})
+            for name in operations:
+                if progress:
+                    progress(transport_name, slave_id, name)
+                count = max(1, iterations // 10) if name == 'sweep' else iterations
+                per_op[name] = run_operation(board, name, count, warmup)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'host': platform.node(),
+            'iterations': iterations,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, metric='p50_ms', threshold=0.10):
+    """
+    Операции, у которых ``metric`` вырос больше чем на ``threshold``.
+
+    Возвращает список ``(transport, slave_id, operation, old, new)``.
+    """
+    regressions = []
+    for transport_name, per_slave in current['results'].items():
+        for slave_id, per_op in per_slave.items():
+            for name, stats in per_op.items():
+                try:
+                    old = baseline['results'][transport_name][slave_id][name][metric]
+                except KeyError:
+                    continue
+                new = stats[metric]
+                if old and new > old * (1 + threshold):
+                    regressions.append((transport_name, slave_id, name, old, new))
+    return regressions
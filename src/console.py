@@ -0,0 +1,103 @@
+"""
+Вывод прогресса вне горячего цикла.
+
+Шаг последовательности не пишет в терминал сам: он только кладет событие
+в очередь (``deque.append`` — без блокировок, десятки наносекунд), а
+отдельный поток Renderer раз в ``refresh`` секунд выводит накопившиеся
+строки и перерисовывает строку прогресса одним ``write`` + ``flush``.
+Медленный терминал (SSH до Raspberry Pi) тормозит только поток вывода,
+а не дедлайны шагов.
+
+Тихий режим (``quiet``) не выводит ничего, кроме итогов (``summary``)
+после остановки.
+
+Пример:
+    with Renderer(quiet=args.quiet) as out:
+        out.log('🔄 Включение 1 -> 32...')
+        scheduler.run(steps, lambda ch: out.status(f'Канал {ch + 1}'))
+        out.summary(f'⏱️  {stats}')
+"""
+
+import sys
+import threading
+from collections import deque
+
+
+class Renderer:
+    def __init__(self, refresh=0.1, quiet=False, stream=None):
+        self.refresh = refresh
+        self.quiet = quiet
+        self.stream = stream or sys.stdout
+        self._lines = deque()
+        self._summary = []
+        self._status = None
+        self._drawn = None
+        self._shown = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        if not self.quiet:
+            self._thread = threading.Thread(target=self._run, name='console', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Вывести всё накопленное, затем итоги."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._status = None
+        self._render()
+        if self._summary:
+            self.stream.write('\n'.join(self._summary) + '\n')
+            self.stream.flush()
+            self._summary.clear()
+
+    def status(self, text):
+        """
+        Строка прогресса: выводится только последняя на момент отрисовки.
+        None — убрать строку прогресса.
+        """
+        if not self.quiet:
+            self._status = text
+
+    def log(self, text=''):
+        """Постоянная строка (в тихом режиме не выводится)."""
+        if not self.quiet:
+            self._lines.append(text)
+
+    def summary(self, text=''):
+        """Строка итогов: выводится после ``stop`` в любом режиме."""
+        self._summary.append(text)
+
+    def _run(self):
+        while not self._stop.wait(self.refresh):
+            self._render()
+
+    def _render(self):
+        out = []
+        lines = self._lines
+        status = self._status
+        if self._shown and (lines or status is None):
+            # Стереть строку прогресса перед постоянными строками
+            out.append('\r' + ' ' * self._shown + '\r')
+            self._shown = 0
+            self._drawn = None
+        while lines:
+            out.append(lines.popleft() + '\n')
+        if status is not None and status != self._drawn:
+            out.append('\r' + status.ljust(self._shown))
+            self._shown = len(status)
+            self._drawn = status
+        if out:
+            self.stream.write(''.join(out))
+            self.stream.flush()
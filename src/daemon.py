@@ -0,0 +1,278 @@
+"""
+Демон реле: один процесс держит соединения с парком Gateway, клиенты
+шлют команды через API (``src.api``) вместо запуска скриптов.
+
+Команды не уходят на шину по одной: первая открывает окно ``window``
+сек, все команды, пришедшие за это время, складываются в одну целевую
+маску на плату и применяются одним ``Fleet.apply`` — для 32 каналов это
+не больше одного кадра (FC15, или FC05 для одного канала) на плату,
+сколько бы клиентов ни переключали ее каналы. Пока идет запись, новые
+команды копятся для следующей.
+
+Изменения состояния (и переходы ``src.health``) рассылаются подписчикам
+через очереди asyncio — клиентам не нужно опрашивать платы.
+
+Сцены — именованные маски нескольких плат из раздела ``scenes``
+конфигурации парка:
+    "scenes": {"night": {"192.168.1.254:502/1": "0x0000000F", "192.168.1.254:502/2": 0}}
+
+Пример:
+    daemon = RelayDaemon(Fleet(load_fleet('fleet.json')), window=0.02)
+    await daemon.start()
+    await daemon.set(daemon.board('192.168.1.254:502/1'), on=0b101)
+"""
+
+import asyncio
+
+from src.fleet import FleetError
+from src.health import HEALTHY
+from src.relay import CHANNELS
+
+DEFAULT_WINDOW = 0.02
+SUBSCRIBER_QUEUE = 256
+
+
+def board_id(key):
+    """BoardKey -> 'host:port/slave' (в URL и событиях API)."""
+    return f'{key.gateway}/{key.slave_id}'
+
+
+def channel_list(mask):
+    """Маска -> включенные каналы, с 1 (как в relayctl)."""
+    return [ch + 1 for ch in range(CHANNELS) if mask >> ch & 1]
+
+
+def channels_mask(channels):
+    """Каналы с 1 -> маска; ValueError для каналов вне 1-32."""
+    mask = 0
+    for ch in channels:
+        # bool — подкласс int: true из JSON не должен стать каналом 1
+        if isinstance(ch, bool) or not isinstance(ch, int) or not 1 <= ch <= CHANNELS:
+            raise ValueError(f'каналы 1-{CHANNELS}: {ch!r}')
+        mask |= 1 << (ch - 1)
+    return mask
+
+
+def parse_mask(value):
+    """Маска из JSON: число или строка ('0x0000FFFF')."""
+    mask = int(value, 0) if isinstance(value, str) else value
+    if isinstance(mask, bool) or not isinstance(mask, int) or not 0 <= mask < 1 << CHANNELS:
+        raise ValueError(f'маска вне {CHANNELS} каналов: {value!r}')
+    return mask
+
+
+def parse_scenes(data, boards):
+    """Раздел ``scenes`` конфигурации -> ``{имя: {BoardKey: маска}}``."""
+    by_id = {board_id(key): key for key in boards}
+    scenes = {}
+    for name, raw in (data or {}).items():
+        if not isinstance(raw, dict):
+            raise FleetError(f'сцена {name}: нужен словарь плата -> маска')
+        scene = {}
+        for board, value in raw.items():
+            if board not in by_id:
+                raise FleetError(f'сцена {name}: плата {board} не описана в конфигурации')
+            try:
+                scene[by_id[board]] = parse_mask(value)
+            except ValueError as e:
+                raise FleetError(f'сцена {name}: {e}') from None
+        scenes[str(name)] = scene
+    return scenes
+
+
+class DaemonStats:
+    """Команды от клиентов против записей на шину."""
+
+    __slots__ = ('commands', 'flushes', 'writes', 'frames')
+
+    def __init__(self):
+        self.commands = 0
+        self.flushes = 0
+        self.writes = 0
+        self.frames = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __str__(self):
+        return (f'команд {self.commands}, записей {self.flushes}, '
+                f'плат записано {self.writes}, кадров {self.frames}')
+
+
+class RelayDaemon:
+    """
+    Парк Gateway (``src.fleet.Fleet``) с объединением команд и подпиской.
+
+    ``targets`` — ``{BoardKey: маска}``, которую запросили клиенты; факт
+    (последняя подтвержденная запись или чтение) — ``fleet.state``.
+    """
+
+    def __init__(self, fleet, window=DEFAULT_WINDOW, scenes=None):
+        self.fleet = fleet
+        self.window = window
+        self.scenes = scenes or {}
+        self.targets = {}
+        self.stats = DaemonStats()
+        self._pending = {}
+        self._waiters = []
+        self._flush_timer = None
+        self._flushing = asyncio.Lock()
+        self._timers = set()
+        self._tasks = set()
+        self._subscribers = set()
+        self._by_id = {board_id(key): key for key in fleet.boards}
+        if fleet.health is not None:
+            fleet.health.on_change = self._health_changed
+
+    async def start(self):
+        """Подключиться к парку и прочитать фактическое состояние плат."""
+        await self.fleet.connect()
+        await self.fleet.sync()
+        for key, mask in self.fleet.state.items():
+            if mask is not None:
+                self.targets[key] = mask
+
+    async def stop(self):
+        """Дописать накопленные команды (отложенные выключения pulse — нет) и отключиться."""
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        if self._pending:
+            await self._flush()
+        for task in list(self._tasks):
+            task.cancel()
+        await self.fleet.close()
+
+    def board(self, board):
+        """'host:port/slave' -> BoardKey (KeyError, если такой платы нет)."""
+        try:
+            return self._by_id[board]
+        except KeyError:
+            raise KeyError(f'плата {board} не описана в конфигурации') from None
+
+    def snapshot(self, keys=None):
+        """Состояние плат для API: ``{board_id: {...}}``."""
+        fleet = self.fleet
+        result = {}
+        for key in keys or fleet.boards:
+            state = fleet.state[key]
+            result[board_id(key)] = {
+                'mask': state,
+                'on': None if state is None else channel_list(state),
+                'target': self.targets.get(key),
+                'health': HEALTHY if fleet.health is None else fleet.health.state(key),
+            }
+        return result
+
+    # Подписка
+
+    def subscribe(self):
+        """Очередь событий; ``unsubscribe`` — перестать получать."""
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def _publish(self, event):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Клиент не успевает читать: отключаем (None в очереди), а не копим события
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def _health_changed(self, key, old, new):
+        self._publish({'event': 'health', 'board': board_id(key), 'old': old, 'state': new})
+
+    # Команды
+
+    async def _submit(self, changes):
+        """
+        ``changes`` — ``{BoardKey: (включить, выключить)}`` маски каналов.
+        Дождаться записи (общей с командами этого окна) и вернуть
+        ``{BoardKey: BoardResult}`` затронутых плат.
+        """
+        pending = self._pending
+        for key, (on, off) in changes.items():
+            old_on, old_off = pending.get(key, (0, 0))
+            pending[key] = ((old_on & ~off) | on, (old_off & ~on) | off)
+        self.stats.commands += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        if self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.window, lambda: self._spawn(self._flush()))
+        results = await future
+        return {key: results[key] for key in changes}
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self):
+        async with self._flushing:
+            self._flush_timer = None
+            pending, self._pending = self._pending, {}
+            waiters, self._waiters = self._waiters, []
+            if not pending:
+                return
+            fleet = self.fleet
+            masks = {}
+            for key, (on, off) in pending.items():
+                base = self.targets.get(key, fleet.state[key] or 0)
+                masks[key] = self.targets[key] = (base & ~off) | on
+            before = {key: fleet.state[key] for key in masks}
+            try:
+                results = await fleet.apply(masks)
+            except Exception as e:
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            stats = self.stats
+            stats.flushes += 1
+            stats.writes += sum(1 for result in results.values() if result.frames)
+            stats.frames += sum(result.frames for result in results.values())
+            for key in masks:
+                if fleet.state[key] != before[key] and fleet.state[key] is not None:
+                    self._publish({'event': 'state', 'board': board_id(key),
+                                   'mask': fleet.state[key], 'on': channel_list(fleet.state[key])})
+            for future in waiters:
+                if not future.done():
+                    future.set_result(results)
+
+    async def set(self, key, on=0, off=0):
+        """Включить каналы маски ``on``, выключить ``off``; остальные не трогаются."""
+        return (await self._submit({key: (on, off)}))[key]
+
+    async def set_mask(self, key, mask):
+        """Все каналы платы по маске."""
+        return await self.set(key, mask, ~mask & ((1 << CHANNELS) - 1))
+
+    async def pulse(self, key, mask, duration):
+        """Включить каналы ``mask`` и выключить через ``duration`` сек."""
+        result = await self.set(key, on=mask)
+        if result.error is None:
+            loop = asyncio.get_running_loop()
+
+            def release():
+                self._timers.discard(timer)
+                self._spawn(self.set(key, off=mask))
+
+            timer = loop.call_later(duration, release)
+            self._timers.add(timer)
+        return result
+
+    async def scene(self, name):
+        """Применить сцену: ``{BoardKey: BoardResult}``."""
+        scene = self.scenes[name]
+        full = (1 << CHANNELS) - 1
+        return await self._submit({key: (mask, ~mask & full) for key, mask in scene.items()})
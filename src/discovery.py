@@ -0,0 +1,128 @@
+"""
+Поиск устройств на Gateway без побочных эффектов.
+
+Каждый Slave ID опрашивается запросом только на чтение (FC01 coil 0 или
+FC03 регистр 0), запросы к одному Gateway идут конвейером через
+AsyncRelayClient, к разным Gateway — параллельно. Таймаут подстраивается
+под уже измеренные RTT: пока никто не ответил, действует ``timeout_max``,
+затем ``RTT_FACTOR`` x максимальный RTT, но не меньше ``timeout_min``.
+
+Ответ-исключение Modbus (кроме 0x0A/0x0B от самого Gateway) тоже означает,
+что устройство есть — оно просто не поддерживает выбранную функцию.
+"""
+
+import asyncio
+import time
+from collections import namedtuple
+
+from src import pdu
+from src.async_client import AsyncRelayClient
+from src.errors import ModbusExceptionError, RelayError, RelayTimeout
+
+SLAVE_IDS = range(1, 248)
+RTT_FACTOR = 4
+
+# Коды исключений, которыми Gateway сообщает, что за ним никто не ответил
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+GATEWAY_TARGET_FAILED = 0x0B
+
+PROBES = {
+    'coils': pdu.read_coils(0, 1),
+    'registers': pdu.read_holding_registers(0, 1),
+}
+
+Device = namedtuple('Device', 'host slave_id rtt_ms exception_code')
+
+
+class _AdaptiveTimeout:
+    def __init__(self, timeout_min, timeout_max):
+        self.timeout_min = timeout_min
+        self.timeout_max = timeout_max
+        self.max_rtt = None
+
+    def observe(self, rtt):
+        self.max_rtt = rtt if self.max_rtt is None else max(self.max_rtt, rtt)
+
+    @property
+    def value(self):
+        if self.max_rtt is None:
+            return self.timeout_max
+        return min(self.timeout_max, max(self.timeout_min, RTT_FACTOR * self.max_rtt))
+
+
+async def _probe(client, slots, host, slave_id, request, timeouts):
+    """Device, None (нет устройства) или False (истек укороченный таймаут)."""
+    try:
+        async with slots:
+            # Таймаут берется в момент отправки, с учетом уже измеренных RTT
+            timeout = timeouts.value
+            start = time.perf_counter()
+            await client.request(slave_id, request, timeout)
+        exception_code = None
+    except ModbusExceptionError as e:
+        if e.exception_code in (GATEWAY_PATH_UNAVAILABLE, GATEWAY_TARGET_FAILED):
+            return None
+        exception_code = e.exception_code
+    except RelayTimeout:
+        return False if timeout < timeouts.timeout_max else None
+    except RelayError:
+        return None
+
+    rtt = time.perf_counter() - start
+    timeouts.observe(rtt)
+    return Device(host, slave_id, round(rtt * 1000, 2), exception_code)
+
+
+async def scan_host(host, port=502, slave_ids=SLAVE_IDS, probe='coils',
+                    concurrency=32, timeout_min=0.05, timeout_max=0.5, retries=1):
+    """
+    Опросить ``slave_ids`` на одном Gateway.
+
+    Возвращает ``{slave_id: Device}`` только для ответивших устройств.
+    Не ответившие за укороченный адаптивный таймаут опрашиваются повторно
+    (``retries`` раз) с удвоенным таймаутом, но не больше ``timeout_max``.
+    """
+    request = PROBES[probe]
+    timeouts = _AdaptiveTimeout(timeout_min, timeout_max)
+    found = {}
+    slots = asyncio.Semaphore(concurrency)
+
+    async with AsyncRelayClient(host, port, timeout=timeout_max,
+                                max_in_flight=concurrency) as client:
+        pending = list(slave_ids)
+        for attempt in range(retries + 1):
+            results = await asyncio.gather(*(
+                _probe(client, slots, host, slave_id, request, timeouts) for slave_id in pending
+            ))
+            for slave_id, device in zip(pending, results):
+                if device:
+                    found[slave_id] = device
+            pending = [slave_id for slave_id, device in zip(pending, results)
+                       if device is False]
+            if not pending or not client.connected:
+                break
+            # Повтор с удвоенным таймаутом: медленные устройства не теряются.
+            # Потолок прежний: не ответившие и в этот раз идут на следующий повтор
+            retry_timeout = min(timeout_max, 2 * timeouts.value)
+            max_rtt = timeouts.max_rtt
+            timeouts = _AdaptiveTimeout(retry_timeout, timeout_max)
+            timeouts.max_rtt = max_rtt
+
+    return dict(sorted(found.items()))
+
+
+async def discover(hosts, port=502, **kwargs):
+    """
+    Опросить несколько Gateway параллельно.
+
+    Возвращает ``{host: {slave_id: Device}}``; недоступный Gateway даёт
+    пустой словарь.
+    """
+    async def scan(host):
+        try:
+            return await scan_host(host, port, **kwargs)
+        except (OSError, asyncio.TimeoutError, RelayError):
+            return {}
+
+    results = await asyncio.gather(*(scan(host) for host in hosts))
+    return dict(zip(hosts, results))
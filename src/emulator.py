@@ -0,0 +1,449 @@
+"""
+Локальная замена Gateway: Modbus TCP сервер с виртуальными платами.
+
+LocalServer — мгновенные ответы, плата на каждый Slave ID (для быстрых
+проверок и бенчмарков накладных расходов хоста).
+
+WaveshareEmulator — модель Waveshare в режиме Multi-host:
+    * Slave ID маршрутизируется на свой порт RS485 (по умолчанию ID N → PORT N),
+      на каждом порту — виртуальная 32-канальная плата;
+    * каждый порт — полудуплексная шина: транзакции на одном порту идут строго
+      по очереди, на разных портах — параллельно;
+    * время транзакции = (RTU запрос + RTU ответ) x время символа 8N1
+      + две паузы по 3.5 символа + время обработки платы;
+    * необязательные сбои: потеря ответа, сброс TCP, медленный ответ,
+      выключенные платы.
+
+RtuResponder — платы на конце pty: отвечает на Modbus RTU кадры, как шина
+RS485 за USB-адаптером (для проверки RtuSerialTransport без железа).
+
+RtuTcpServer — порт Gateway в прозрачном режиме ("Port3-RAW"): RTU кадры
+поверх TCP без MBAP и без конвертации (для RtuTcpTransport).
+
+Пример (в фоновом потоке, для бенчмарков и скриптов):
+    with WaveshareEmulator(faults=Faults(drop=0.01)) as server:
+        session = get_session(server.host, server.port)
+"""
+
+import asyncio
+import os
+import random
+import select
+import struct
+import threading
+import time
+import tty
+from collections import namedtuple
+
+from src import pdu
+
+CHANNELS = 32
+REGISTERS = 16
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+
+
+class VirtualBoard:
+    """Состояние одной платы: coils и holding регистры."""
+
+    def __init__(self, channels=CHANNELS, registers=REGISTERS):
+        self.coils = [False] * channels
+        self.registers = [0] * registers
+
+    def handle(self, request):
+        """Ответный PDU на запрос ``request``."""
+        function_code = request[0]
+        try:
+            return self._dispatch(function_code, request)
+        except IndexError:
+            return bytes((function_code | 0x80, ILLEGAL_DATA_ADDRESS))
+        except (KeyError, struct.error):
+            return bytes((function_code | 0x80, ILLEGAL_FUNCTION))
+
+    def _dispatch(self, function_code, request):
+        if function_code in (pdu.READ_COILS, pdu.READ_DISCRETE_INPUTS):
+            address, count = struct.unpack_from('>HH', request, 1)
+            self._check_range(self.coils, address, count)
+            data = pdu.pack_bits(self.coils[address:address + count])
+            return bytes((function_code, len(data))) + data
+
+        if function_code in (pdu.READ_HOLDING_REGISTERS, pdu.READ_INPUT_REGISTERS):
+            address, count = struct.unpack_from('>HH', request, 1)
+            self._check_range(self.registers, address, count)
+            values = self.registers[address:address + count]
+            return struct.pack(f'>BB{count}H', function_code, 2 * count, *values)
+
+        if function_code == pdu.WRITE_COIL:
+            address, value = struct.unpack_from('>HH', request, 1)
+            self._check_range(self.coils, address, 1)
+            if value not in (0x0000, 0xFF00):
+                return bytes((function_code | 0x80, ILLEGAL_DATA_VALUE))
+            self.coils[address] = value == 0xFF00
+            return request[:5]
+
+        if function_code == pdu.WRITE_REGISTER:
+            address, value = struct.unpack_from('>HH', request, 1)
+            self._check_range(self.registers, address, 1)
+            self.registers[address] = value
+            return request[:5]
+
+        if function_code == pdu.WRITE_COILS:
+            address, count = struct.unpack_from('>HH', request, 1)
+            self._check_range(self.coils, address, count)
+            self.coils[address:address + count] = pdu.unpack_bits(request[6:], count)
+            return request[:5]
+
+        if function_code == pdu.WRITE_REGISTERS:
+            address, count = struct.unpack_from('>HH', request, 1)
+            self._check_range(self.registers, address, count)
+            self.registers[address:address + count] = struct.unpack_from(f'>{count}H', request, 6)
+            return request[:5]
+
+        raise KeyError(function_code)
+
+    @staticmethod
+    def _check_range(table, address, count):
+        if count < 1 or address + count > len(table):
+            raise IndexError(address)
+
+
+class _Reset(Exception):
+    """Сбросить TCP соединение клиента (имитация сбоя Gateway)."""
+
+
+class LocalServer:
+    """Modbus TCP сервер в фоновом потоке; платы создаются по первому запросу."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.boards = {}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def board(self, slave_id):
+        if slave_id not in self.boards:
+            self.boards[slave_id] = VirtualBoard()
+        return self.boards[slave_id]
+
+    async def respond(self, slave_id, request):
+        """Ответный PDU или None (нет ответа)."""
+        return self.board(slave_id).handle(request)
+
+    async def _transact(self, writer, tid, slave_id, request):
+        try:
+            response = await self.respond(slave_id, request)
+        except _Reset:
+            writer.transport.abort()
+            return
+        if response is not None and not writer.is_closing():
+            writer.write(pdu.mbap(tid, slave_id, response))
+
+    async def _handle_client(self, reader, writer):
+        # Каждый запрос — отдельная задача: клиент может слать запросы
+        # конвейером, ответы уходят по мере готовности
+        tasks = set()
+        try:
+            while True:
+                header = await reader.readexactly(pdu.MBAP_HEADER.size)
+                tid, _, length, slave_id = pdu.MBAP_HEADER.unpack(header)
+                request = await reader.readexactly(length - 1)
+                task = asyncio.create_task(self._transact(writer, tid, slave_id, request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # CancelledError — остановка сервера; не пробрасываем, чтобы
+            # asyncio не жаловался на отмененный обработчик соединения
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def serve(self):
+        """Запустить сервер в текущем event loop (без фонового потока)."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self.serve())
+        self._ready.set()
+        self._loop.run_forever()
+        self._server.close()
+        # Обработчики открытых соединений завершаем до закрытия loop
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.run_until_complete(self._server.wait_closed())
+        self._loop.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='modbus-emulator', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self.host, self.port
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+
+class SerialTiming(namedtuple('SerialTiming', 'baud bits_per_char turnaround',
+                              defaults=(9600, 10, 0.005))):
+    """
+    Параметры линии RS485.
+
+    ``bits_per_char`` — 10 для 8N1 (старт + 8 данных + стоп),
+    ``turnaround`` — время обработки запроса платой, сек.
+    """
+
+    __slots__ = ()
+
+    @property
+    def char_time(self):
+        return self.bits_per_char / self.baud
+
+    @property
+    def frame_gap(self):
+        """Пауза 3.5 символа между кадрами RTU (не меньше 1.75 мс по спецификации)."""
+        return pdu.rtu_frame_gap(self.baud, self.bits_per_char)
+
+    def frame_time(self, pdu_length):
+        """Передача RTU кадра: адрес + PDU + CRC и пауза после него."""
+        return (1 + pdu_length + 2) * self.char_time + self.frame_gap
+
+
+class Faults(namedtuple('Faults', 'drop reset slow slow_delay seed',
+                        defaults=(0.0, 0.0, 0.0, 1.0, None))):
+    """
+    Вероятности сбоев на одну транзакцию.
+
+    ``drop`` — плата не ответила (шина занята до ``response_timeout`` Gateway),
+    ``reset`` — Gateway сбросил TCP соединение,
+    ``slow`` — ответ задержан на ``slow_delay`` сек.
+    """
+
+    __slots__ = ()
+
+
+class WaveshareEmulator(LocalServer):
+    """
+    Gateway в режиме Multi-host с моделью времени RS485.
+
+    ``max_clients`` — лимит одновременных TCP соединений (None — без
+    лимита): лишние соединения сразу сбрасываются, как у Waveshare.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, routes=None, timing=SerialTiming(),
+                 faults=Faults(), response_timeout=0.2, gateway_delay=0.001, max_clients=None):
+        super().__init__(host, port)
+        self.routes = dict(routes or {slave_id: slave_id for slave_id in (1, 2, 3, 4)})
+        self.timing = timing
+        self.faults = faults
+        self.response_timeout = response_timeout
+        self.gateway_delay = gateway_delay
+        self.max_clients = max_clients
+        self.clients = 0
+        self.offline = set()
+        self.stats = {'requests': 0, 'dropped': 0, 'resets': 0, 'slow': 0, 'refused': 0}
+        self._buses = {}
+        self._random = random.Random(faults.seed)
+        for slave_id in self.routes:
+            self.board(slave_id)
+
+    def set_online(self, slave_id, online=True):
+        """Включить/выключить питание платы: выключенная не отвечает."""
+        if online:
+            self.offline.discard(slave_id)
+        else:
+            self.offline.add(slave_id)
+
+    async def _handle_client(self, reader, writer):
+        if self.max_clients is not None and self.clients >= self.max_clients:
+            self.stats['refused'] += 1
+            writer.transport.abort()
+            return
+        self.clients += 1
+        try:
+            await super()._handle_client(reader, writer)
+        finally:
+            self.clients -= 1
+
+    def _bus(self, port):
+        if port not in self._buses:
+            self._buses[port] = asyncio.Lock()
+        return self._buses[port]
+
+    async def respond(self, slave_id, request):
+        self.stats['requests'] += 1
+        await asyncio.sleep(self.gateway_delay)
+
+        port = self.routes.get(slave_id)
+        if port is None:
+            return bytes((request[0] | 0x80, GATEWAY_PATH_UNAVAILABLE))
+
+        faults = self.faults
+        roll = self._random.random
+        if faults.reset and roll() < faults.reset:
+            self.stats['resets'] += 1
+            raise _Reset()
+
+        async with self._bus(port):
+            request_time = self.timing.frame_time(len(request))
+            if slave_id in self.offline or (faults.drop and roll() < faults.drop):
+                # Gateway отправил запрос и ждет ответ до своего таймаута
+                self.stats['dropped'] += 1
+                await asyncio.sleep(request_time + self.response_timeout)
+                return None
+
+            response = self.board(slave_id).handle(request)
+            delay = request_time + self.timing.turnaround + self.timing.frame_time(len(response))
+            if faults.slow and roll() < faults.slow:
+                self.stats['slow'] += 1
+                delay += faults.slow_delay
+            await asyncio.sleep(delay)
+            return response
+
+
+class RtuResponder:
+    """
+    Платы RS485 на конце pseudo-terminal.
+
+    Клиент открывает ``device`` как обычный последовательный порт.
+    Кадры с неверным CRC и запросы к отсутствующим Slave ID остаются
+    без ответа, как на настоящей шине. С ``timing`` ответ задерживается
+    на время обработки и передачи кадра на заданной скорости.
+    """
+
+    def __init__(self, slave_ids=(1,), timing=None):
+        self.boards = {slave_id: VirtualBoard() for slave_id in slave_ids}
+        self.timing = timing
+        self.device = None
+        self.stats = {'requests': 0, 'crc_errors': 0, 'ignored': 0}
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._master, self._slave = os.openpty()
+        # Конец клиента держим открытым: иначе чтение master дает EIO
+        tty.setraw(self._slave)
+        self.device = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='rtu-responder', daemon=True)
+        self._thread.start()
+        return self.device
+
+    def stop(self):
+        if self._thread is not None:
+            self._running = False
+            self._thread.join()
+            self._thread = None
+            os.close(self._master)
+            os.close(self._slave)
+
+    def _read(self, buffer, count):
+        """Дочитать ``buffer`` до ``count`` байт; False — остановка."""
+        while len(buffer) < count:
+            if not self._running:
+                return False
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if ready:
+                buffer += os.read(self._master, 256)
+        return True
+
+    def _run(self):
+        buffer = bytearray()
+        while self._read(buffer, 7):
+            length = pdu.rtu_request_length(buffer)
+            if not self._read(buffer, length):
+                break
+            frame, buffer = bytes(buffer[:length]), buffer[length:]
+            response = self.handle(frame)
+            if response is not None:
+                os.write(self._master, response)
+
+    def handle(self, frame):
+        """RTU кадр ответа или None (нет ответа)."""
+        reply = rtu_reply(self.boards, frame, self.stats)
+        if reply is not None and self.timing is not None:
+            time.sleep(self.timing.turnaround + self.timing.frame_time(len(reply) - 3))
+        return reply
+
+
+def rtu_reply(boards, frame, stats):
+    """
+    Ответ шины RS485 на RTU кадр: кадр платы или None, если кадр
+    испорчен (CRC) или платы с таким адресом нет.
+    """
+    stats['requests'] += 1
+    if not pdu.rtu_check(frame):
+        stats['crc_errors'] += 1
+        return None
+    board = boards.get(frame[0])
+    if board is None:
+        stats['ignored'] += 1
+        return None
+    return pdu.rtu(frame[0], board.handle(frame[1:-2]))
+
+
+class RtuTcpServer(LocalServer):
+    """
+    Порт Gateway в прозрачном режиме: RTU кадры поверх TCP как есть.
+
+    Одна шина на порт, без маршрутизации по Slave ID и без задержки
+    конвертации TCP→RTU; с ``timing`` ответ задерживается на передачу
+    запроса и ответа по RS485 и обработку платой.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, slave_ids=(1,), timing=None):
+        super().__init__(host, port)
+        self.timing = timing
+        self.stats = {'requests': 0, 'crc_errors': 0, 'ignored': 0}
+        for slave_id in slave_ids:
+            self.board(slave_id)
+
+    async def _handle_client(self, reader, writer):
+        # Шина полудуплексная: запросы одного соединения обслуживаются по очереди
+        try:
+            while True:
+                head = await reader.readexactly(7)
+                frame = head + await reader.readexactly(pdu.rtu_request_length(head) - 7)
+                reply = rtu_reply(self.boards, frame, self.stats)
+                if reply is None:
+                    continue
+                if self.timing is not None:
+                    await asyncio.sleep(self.timing.frame_time(len(frame) - 3)
+                                        + self.timing.turnaround
+                                        + self.timing.frame_time(len(reply) - 3))
+                writer.write(reply)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,29 @@
+"""Исключения библиотеки."""
+
+
+class RelayError(Exception):
+    """Плата вернула ошибку Modbus или не ответила."""
+
+
+class ModbusExceptionError(RelayError):
+    """Ответ-исключение Modbus (функция | 0x80)."""
+
+    def __init__(self, slave_id, function_code, exception_code):
+        self.slave_id = slave_id
+        self.function_code = function_code
+        self.exception_code = exception_code
+        super().__init__(
+            f'Slave {slave_id}: FC{function_code:02d} exception code {exception_code}'
+        )
+
+
+class RelayTimeout(RelayError):
+    """Ответ не получен за отведенное время."""
+
+
+class ConnectionLost(RelayError):
+    """Соединение с Gateway разорвано."""
+
+
+class SlaveQuarantined(RelayError):
+    """Плата в карантине после ошибок подряд: запрос не отправлялся."""
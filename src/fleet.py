@@ -0,0 +1,332 @@
+"""
+Управление парком Gateway из одного процесса.
+
+RS485 полудуплексный: на одной шине (порт Gateway) в каждый момент идет
+один обмен, поэтому запросы к платам одной шины выполняются строго
+по очереди (``asyncio.Lock`` на шину). Разные шины одного Gateway и
+разные Gateway работают одновременно: соединение на Gateway одно
+(AsyncRelayClient, запросы разных шин в полете вместе, ответы по
+Transaction ID). Команда на весь парк («всё выключить») занимает время
+самой загруженной шины, а не сумму всех шин.
+
+Состояние плат хранится как в RelayBoard (теневая маска), кадры
+планируются ``src.shadow.plan_frames``: неизменившиеся платы не
+получают ни одного кадра.
+
+С ``health`` (``src.health.HealthTracker``) плата после нескольких
+таймаутов подряд уходит в карантин: ее команды сразу получают
+SlaveQuarantined и не держат шину, фоновая задача раз в
+``probe_interval`` читает ее FC01 и возвращает плату после ответа.
+
+Оборванное соединение с Gateway (перезагрузка, сеть) восстанавливается
+при следующей команде его платам; после неудачной попытки следующая —
+не раньше случайной задержки от 0 до ``reconnect_delay * 2^n`` (full
+jitter, как в GatewaySession), команды до нее сразу получают
+ConnectionLost. Обрыв не записывается платам в HealthTracker.
+
+Конфигурация (JSON или YAML):
+    {
+      "gateways": [
+        {"host": "192.168.1.254", "buses": {"PORT1": [1], "PORT2": [2, 5]}},
+        {"host": "192.168.1.253", "slaves": [1, 2, 3, 4]}
+      ]
+    }
+``slaves`` без ``buses`` — режим Multi-host по умолчанию: Slave ID N на
+порту PORTN, по плате на порт.
+
+Пример:
+    fleet = Fleet(load_fleet('fleet.json'))
+    await fleet.connect()
+    results = await fleet.all_off()
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from src.async_client import AsyncRelayClient
+from src.errors import ConnectionLost, RelayError, SlaveQuarantined
+from src.health import HealthTracker
+from src.relay import ALL_OFF, ALL_ON, CHANNELS, bits_to_mask
+from src.rtt import TimeoutPolicy
+from src.shadow import plan_frames
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class FleetError(ValueError):
+    """Ошибка в конфигурации парка."""
+
+
+# buses: {имя шины: (Slave ID, ...)}
+GatewayConfig = namedtuple('GatewayConfig', 'host port buses')
+# gateway — 'host:port'
+BoardKey = namedtuple('BoardKey', 'gateway slave_id')
+# frames — отправлено кадров, error — исключение или None
+BoardResult = namedtuple('BoardResult', 'frames error elapsed_ms')
+
+
+def parse_fleet(data):
+    """Словарь (из JSON/YAML) -> список GatewayConfig."""
+    if not isinstance(data, dict) or not isinstance(data.get('gateways'), list):
+        raise FleetError('конфигурация должна содержать список "gateways"')
+    gateways = []
+    names = set()
+    for n, raw in enumerate(data['gateways'], 1):
+        where = f'gateway {n}'
+        if not isinstance(raw, dict) or 'host' not in raw:
+            raise FleetError(f'{where}: нужен "host"')
+        port = int(raw.get('port', 502))
+        if 'buses' in raw:
+            buses = {str(bus): tuple(int(s) for s in slave_ids)
+                     for bus, slave_ids in raw['buses'].items()}
+        elif 'slaves' in raw:
+            buses = {f'PORT{int(s)}': (int(s),) for s in raw['slaves']}
+        else:
+            raise FleetError(f'{where}: нужен "buses" или "slaves"')
+        seen = [s for slave_ids in buses.values() for s in slave_ids]
+        if len(seen) != len(set(seen)):
+            raise FleetError(f'{where}: Slave ID на нескольких шинах')
+        name = f'{raw["host"]}:{port}'
+        if name in names:
+            raise FleetError(f'{where}: {name} указан дважды')
+        names.add(name)
+        gateways.append(GatewayConfig(raw['host'], port, buses))
+    return gateways
+
+
+def read_config(path):
+    """Файл конфигурации (JSON или YAML) -> словарь."""
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix in ('.yaml', '.yml'):
+        if yaml is None:
+            raise FleetError('для YAML установите PyYAML: pip install pyyaml')
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def load_fleet(path):
+    return parse_fleet(read_config(path))
+
+
+class Fleet:
+    """
+    Несколько Gateway, по соединению на каждый, очередь на каждую шину.
+
+    ``state`` — ``{BoardKey: маска или None}``; ``unreachable`` —
+    ``{gateway: исключение}`` для Gateway, к которым не удалось
+    подключиться (их платы получают ConnectionLost до переподключения).
+    ``reconnects`` — число восстановленных соединений.
+    ``adaptive`` — таймауты запросов по RTT плат (``src.rtt``), ``timeout``
+    тогда их верхняя граница: молчащая плата не держит свою шину секундами.
+    ``health`` — HealthTracker (True — с настройками по умолчанию, None —
+    без карантина).
+    """
+
+    def __init__(self, gateways, timeout=1.0, channels=CHANNELS, adaptive=True, health=True,
+                 reconnect_delay=0.1, reconnect_delay_max=10.0):
+        self.gateways = {f'{gw.host}:{gw.port}': gw for gw in gateways}
+        self.timeout = timeout
+        self.adaptive = adaptive
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_delay_max = reconnect_delay_max
+        self.reconnects = 0
+        self._connecting = {name: asyncio.Lock() for name in self.gateways}
+        self._retry = {}        # gateway -> (неудачных попыток подряд, время следующей)
+        self.health = HealthTracker() if health is True else health or None
+        self._prober = None
+        self.channels = channels
+        self.clients = {}
+        self.unreachable = {}
+        self.state = {}
+        self._bus_of = {}
+        self._locks = {}
+        for name, gw in self.gateways.items():
+            for bus, slave_ids in gw.buses.items():
+                self._locks[name, bus] = asyncio.Lock()
+                for slave_id in slave_ids:
+                    key = BoardKey(name, slave_id)
+                    self._bus_of[key] = (name, bus)
+                    self.state[key] = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def boards(self):
+        return list(self._bus_of)
+
+    async def _open(self, name):
+        """Новое соединение с Gateway; неудача — в ``unreachable`` и ConnectionLost."""
+        gw = self.gateways[name]
+        timeouts = TimeoutPolicy(self.timeout, ceiling=self.timeout) if self.adaptive else None
+        client = AsyncRelayClient(gw.host, gw.port, timeout=self.timeout,
+                                  max_in_flight=max(1, len(gw.buses)), timeouts=timeouts)
+        try:
+            await client.connect()
+        except (OSError, asyncio.TimeoutError) as e:
+            attempts = self._retry.get(name, (0, 0.0))[0] + 1
+            ceiling = min(self.reconnect_delay_max, self.reconnect_delay * 2 ** attempts)
+            self._retry[name] = (attempts, time.monotonic() + random.uniform(0, ceiling))
+            error = self.unreachable[name] = ConnectionLost(f'{name}: {e or "таймаут"}')
+            raise error from None
+        self._retry.pop(name, None)
+        self.unreachable.pop(name, None)
+        self.clients[name] = client
+        return client
+
+    async def connect(self):
+        """Подключиться ко всем Gateway параллельно; недоступные — в ``unreachable``."""
+        self.unreachable.clear()
+        self._retry.clear()
+        await asyncio.gather(*(self._open(name) for name in self.gateways
+                               if name not in self.clients), return_exceptions=True)
+        if self.health is not None and self._prober is None:
+            self._prober = asyncio.create_task(self._probe_loop())
+        return not self.unreachable
+
+    async def close(self):
+        if self._prober is not None:
+            self._prober.cancel()
+            try:
+                await self._prober
+            except asyncio.CancelledError:
+                pass
+            self._prober = None
+        await asyncio.gather(*(client.close() for client in self.clients.values()))
+        self.clients.clear()
+
+    async def _probe(self, key):
+        """Проверка платы из карантина: FC01 одного coil в очереди ее шины."""
+        async with self._locks[self._bus_of[key]]:
+            try:
+                client = await self._client(key.gateway)
+                await client.read_coils(key.slave_id, 0, 1)
+            except RelayError as e:
+                self.health.probed(key, e)
+            else:
+                self.health.probed(key)
+
+    async def _probe_loop(self):
+        health = self.health
+        while True:
+            delay = health.next_probe_in()
+            await asyncio.sleep(health.probe_interval if delay is None else delay)
+            await asyncio.gather(*(self._probe(key) for key in health.due()))
+
+    async def _client(self, gateway):
+        """Соединение с Gateway; оборванное переподключается (с паузой после неудачи)."""
+        client = self.clients.get(gateway)
+        if client is not None and client.connected:
+            return client
+        async with self._connecting[gateway]:
+            client = self.clients.get(gateway)
+            if client is not None:
+                if client.connected:
+                    return client
+                del self.clients[gateway]
+                await client.close()
+            attempts, retry_at = self._retry.get(gateway, (0, 0.0))
+            if attempts and time.monotonic() < retry_at:
+                raise self.unreachable.get(gateway) or ConnectionLost(f'{gateway}: нет соединения')
+            client = await self._open(gateway)
+            self.reconnects += 1
+            return client
+
+    def _by_bus(self, keys):
+        buses = {}
+        for key in keys:
+            if key not in self._bus_of:
+                raise KeyError(f'плата {key} не описана в конфигурации')
+            buses.setdefault(self._bus_of[key], []).append(key)
+        return buses
+
+    async def _run_buses(self, keys, action):
+        """``action(client, key)`` по очереди на каждой шине, шины — параллельно."""
+        results = {}
+        health = self.health
+
+        async def run_bus(bus, bus_keys):
+            async with self._locks[bus]:
+                for key in bus_keys:
+                    start = time.perf_counter()
+                    try:
+                        if health is not None:
+                            health.check(key)
+                        frames = await action(await self._client(key.gateway), key)
+                        error = None
+                    except (SlaveQuarantined, ConnectionLost) as e:
+                        # Обрыв связи с Gateway — не вина платы
+                        frames, error = 0, e
+                    except RelayError as e:
+                        frames, error = 0, e
+                        if health is not None:
+                            health.failure(key, e)
+                    else:
+                        if health is not None:
+                            health.success(key)
+                    results[key] = BoardResult(frames, error,
+                                               round((time.perf_counter() - start) * 1000, 2))
+
+        await asyncio.gather(*(run_bus(bus, bus_keys)
+                               for bus, bus_keys in self._by_bus(keys).items()))
+        return results
+
+    async def apply(self, masks):
+        """
+        Привести платы к маскам ``{BoardKey: маска}`` минимумом кадров.
+
+        Возвращает ``{BoardKey: BoardResult}``; при ошибке состояние платы
+        становится неизвестным (следующий ``apply`` перепишет все каналы).
+        """
+        async def write(client, key):
+            frames = plan_frames(self.state[key], masks[key], self.channels)
+            try:
+                for frame in frames:
+                    if len(frame.values) == 1:
+                        await client.write_coil(key.slave_id, frame.address, frame.values[0])
+                    else:
+                        await client.write_coils(key.slave_id, frame.address, frame.values)
+            except RelayError:
+                self.state[key] = None
+                raise
+            self.state[key] = masks[key]
+            return len(frames)
+
+        return await self._run_buses(masks, write)
+
+    async def set_all(self, mask, gateways=None):
+        """Одна маска на все платы (или на платы ``gateways``)."""
+        return await self.apply({key: mask for key in self.boards
+                                 if gateways is None or key.gateway in gateways})
+
+    async def all_off(self, gateways=None):
+        return await self.set_all(ALL_OFF, gateways)
+
+    async def all_on(self, gateways=None):
+        return await self.set_all(ALL_ON, gateways)
+
+    async def sync(self, keys=None):
+        """Прочитать фактическое состояние плат (FC01) в ``state``."""
+        async def read(client, key):
+            bits = await client.read_coils(key.slave_id, 0, self.channels)
+            self.state[key] = bits_to_mask(bits)
+            return 0
+
+        return await self._run_buses(keys or self.boards, read)
+
+    def invalidate(self):
+        """Забыть теневое состояние всех плат."""
+        for key in self.state:
+            self.state[key] = None
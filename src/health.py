@@ -0,0 +1,290 @@
+"""
+Состояние плат: исправна -> деградировала -> в карантине.
+
+Выключенная плата в серии команд стоит полного таймаута на каждом
+обращении и все это время держит соединение (шину), на котором ждут
+исправные платы. HealthTracker считает ошибки подряд по каждой плате:
+    HEALTHY      — отвечает;
+    DEGRADED     — ``degrade_after`` ошибок подряд, команды еще идут;
+    QUARANTINED  — ``quarantine_after`` ошибок подряд: команды сразу
+                   получают SlaveQuarantined, шина не занимается.
+Ошибкой считается таймаут и 0x0A/0x0B от Gateway (нет маршрута / плата
+не ответила). Другие ответы-исключения значат, что плата жива; обрыв
+соединения — не вина платы, состояние не меняется. Первый ответ
+возвращает плату в HEALTHY.
+
+Из карантина плату возвращает фоновая проверка: одно чтение FC01 (один
+coil) раз в ``probe_interval`` сек; после каждой неудачной проверки
+интервал удваивается до ``max_probe_interval``.
+
+HealthTransport — обертка транспорта (как InstrumentedTransport) с
+фоновым потоком проверок; Fleet ведет HealthTracker сам (``health=True``).
+
+Пример:
+    transport = HealthTransport(RawTcpTransport('192.168.1.254'))
+    board = RelayBoard(transport, 3)
+    ...
+    print(transport.health)
+"""
+
+import threading
+import time
+
+from src.errors import (ConnectionLost, ModbusExceptionError, RelayError, RelayTimeout,
+                        SlaveQuarantined)
+from src.transport import Transport, as_transport
+
+HEALTHY = 'healthy'
+DEGRADED = 'degraded'
+QUARANTINED = 'quarantined'
+
+STATE_LABELS = {HEALTHY: '✅ исправна', DEGRADED: '⚠️  деградировала', QUARANTINED: '⛔ в карантине'}
+
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+GATEWAY_TARGET_FAILED = 0x0B
+
+
+def label(key):
+    """Slave ID или BoardKey (``src.fleet``) для сообщений."""
+    slave_id = getattr(key, 'slave_id', None)
+    return f'Slave {key}' if slave_id is None else f'{key.gateway} Slave {slave_id}'
+
+
+def is_failure(error):
+    """Ошибка, которую надо записать плате (а не линии или запросу)."""
+    if isinstance(error, RelayTimeout):
+        return True
+    return isinstance(error, ModbusExceptionError) and error.exception_code in (
+        GATEWAY_PATH_UNAVAILABLE, GATEWAY_TARGET_FAILED)
+
+
+class SlaveHealth:
+    """Состояние одной платы."""
+
+    __slots__ = ('state', 'failures', 'since', 'interval', 'next_probe', 'probes', 'error')
+
+    def __init__(self):
+        self.state = HEALTHY
+        self.failures = 0
+        self.since = time.monotonic()
+        self.interval = 0.0
+        self.next_probe = 0.0
+        self.probes = 0
+        self.error = None
+
+    def __str__(self):
+        text = STATE_LABELS[self.state]
+        if self.state != HEALTHY:
+            text += f', ошибок подряд {self.failures}: {self.error}'
+        if self.state == QUARANTINED:
+            text += f', проверок {self.probes}'
+        return text
+
+
+class HealthTracker:
+    """
+    Состояние плат по ключу (Slave ID, BoardKey — любой hashable).
+
+    ``on_change(key, old, new)`` вызывается при каждом переходе.
+    """
+
+    def __init__(self, degrade_after=1, quarantine_after=3, probe_interval=1.0,
+                 max_probe_interval=10.0, on_change=None):
+        self.degrade_after = degrade_after
+        self.quarantine_after = quarantine_after
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.on_change = on_change
+        self.slaves = {}
+        self.probe_error = None     # последний сбой самого цикла проверок
+        # Платы добавляются из потока запросов, обходятся из потока проверок
+        self._lock = threading.Lock()
+
+    def _set(self, key, health, state):
+        if health.state == state:
+            return
+        old, health.state, health.since = health.state, state, time.monotonic()
+        if self.on_change is not None:
+            self.on_change(key, old, state)
+
+    def state(self, key):
+        health = self.slaves.get(key)
+        return HEALTHY if health is None else health.state
+
+    def check(self, key):
+        """SlaveQuarantined, если плата в карантине."""
+        health = self.slaves.get(key)
+        if health is not None and health.state == QUARANTINED:
+            raise SlaveQuarantined(f'{label(key)}: в карантине ({health.error})')
+
+    def success(self, key):
+        # Счет ошибок — подряд: любой ответ его сбрасывает
+        health = self.slaves.get(key)
+        if health is not None and health.failures:
+            health.failures = 0
+            health.error = None
+            self._set(key, health, HEALTHY)
+
+    def failure(self, key, error):
+        """Учесть ошибку запроса; возвращает новое состояние платы."""
+        if not is_failure(error):
+            if not isinstance(error, ConnectionLost):
+                self.success(key)
+            return self.state(key)
+        health = self.slaves.get(key)
+        if health is None:
+            with self._lock:
+                health = self.slaves.setdefault(key, SlaveHealth())
+        health.failures += 1
+        health.error = error
+        if health.failures >= self.quarantine_after:
+            if health.state != QUARANTINED:
+                health.probes = 0
+                health.interval = self.probe_interval
+                health.next_probe = time.monotonic() + health.interval
+            self._set(key, health, QUARANTINED)
+        elif health.failures >= self.degrade_after:
+            self._set(key, health, DEGRADED)
+        return health.state
+
+    def _items(self):
+        with self._lock:
+            return list(self.slaves.items())
+
+    def quarantined(self):
+        return [key for key, health in self._items() if health.state == QUARANTINED]
+
+    def due(self, now=None):
+        """Платы в карантине, которым пора на проверку."""
+        now = time.monotonic() if now is None else now
+        return [key for key, health in self._items()
+                if health.state == QUARANTINED and health.next_probe <= now]
+
+    def next_probe_in(self, now=None):
+        """Сек до ближайшей проверки; None — в карантине никого."""
+        now = time.monotonic() if now is None else now
+        times = [health.next_probe for _, health in self._items() if health.state == QUARANTINED]
+        return max(0.0, min(times) - now) if times else None
+
+    def probed(self, key, error=None):
+        """Итог проверки: ``error`` None — плата ответила."""
+        health = self.slaves[key]
+        health.probes += 1
+        # Плата жива, только если ответила (пусть и исключением Modbus)
+        if error is None or isinstance(error, ModbusExceptionError) and not is_failure(error):
+            self.success(key)
+            return
+        health.error = error
+        health.interval = min(health.interval * 2, self.max_probe_interval)
+        health.next_probe = time.monotonic() + health.interval
+
+    def __str__(self):
+        lines = [f'{label(key)}: {health}' for key, health in self._items()]
+        if self.probe_error is not None:
+            lines.append(f'Сбой проверок: {self.probe_error!r}')
+        return '\n'.join(lines) or 'все платы исправны'
+
+
+class HealthTransport(Transport):
+    """
+    Транспорт-обертка: команды плате в карантине сразу получают
+    SlaveQuarantined, фоновый поток проверяет ее FC01.
+
+    Запросы и проверки идут через исходный транспорт под одной
+    блокировкой (транспорты не потокобезопасны): проверка занимает
+    соединение на время одного FC01, не чаще раза в ``probe_interval``.
+    """
+
+    def __init__(self, transport, health=None):
+        self.transport = as_transport(transport)
+        self.health = health if health is not None else HealthTracker()
+        self.name = self.transport.name
+        self.framing = self.transport.framing
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __getattr__(self, name):
+        return getattr(self.transport, name)
+
+    def connect(self):
+        return self.transport.connect()
+
+    def close(self):
+        """Остановить проверки и закрыть транспорт; после переподключения они снова запускаются."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.transport.close()
+        self._stop.clear()
+
+    def _call(self, slave_id, method, args):
+        health = self.health
+        health.check(slave_id)
+        with self._lock:
+            try:
+                result = method(slave_id, *args)
+            except RelayError as e:
+                if health.failure(slave_id, e) == QUARANTINED:
+                    self._start_probe()
+                raise
+        health.success(slave_id)
+        return result
+
+    def _start_probe(self):
+        with self._probe_lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._probe_loop,
+                                                name=f'health-{self.name}', daemon=True)
+                self._thread.start()
+
+    def _probe_loop(self):
+        health = self.health
+        while True:
+            with self._probe_lock:
+                if self._stop.is_set() or not health.quarantined():
+                    self._thread = None
+                    return
+            delay = None
+            try:
+                for slave_id in health.due():
+                    error = None
+                    with self._lock:
+                        try:
+                            self.transport.read_coils(slave_id, 0, 1)
+                        except Exception as e:
+                            # Не только RelayError: транспорт pymodbus поднимает и свои
+                            error = e
+                    health.probed(slave_id, error)
+                delay = health.next_probe_in()
+            except Exception as e:
+                # Сбой цикла проверок не останавливает поток: ошибка видна
+                # в ``health.probe_error``, повтор через интервал
+                health.probe_error = e
+            self._stop.wait(health.probe_interval if delay is None else delay)
+
+    def read_coils(self, slave_id, address, count):
+        return self._call(slave_id, self.transport.read_coils, (address, count))
+
+    def read_discrete_inputs(self, slave_id, address, count):
+        return self._call(slave_id, self.transport.read_discrete_inputs, (address, count))
+
+    def read_holding_registers(self, slave_id, address, count):
+        return self._call(slave_id, self.transport.read_holding_registers, (address, count))
+
+    def read_input_registers(self, slave_id, address, count):
+        return self._call(slave_id, self.transport.read_input_registers, (address, count))
+
+    def write_coil(self, slave_id, address, value):
+        return self._call(slave_id, self.transport.write_coil, (address, value))
+
+    def write_coils(self, slave_id, address, values):
+        return self._call(slave_id, self.transport.write_coils, (address, values))
+
+    def write_register(self, slave_id, address, value):
+        return self._call(slave_id, self.transport.write_register, (address, value))
+
+    def write_registers(self, slave_id, address, values):
+        return self._call(slave_id, self.transport.write_registers, (address, values))
@@ -0,0 +1,313 @@
+"""
+Метрики обмена с Gateway в формате Prometheus.
+
+InstrumentedTransport оборачивает любой транспорт и пишет в Metrics:
+    * гистограмму задержки по Gateway, Slave ID и коду функции;
+    * таймауты, ответы-исключения (по коду), прочие ошибки, обрывы связи;
+    * байты на проводе (кадры целиком, с MBAP/RTU обрамлением);
+    * переподключения — читаются у транспорта/сессии при выгрузке.
+
+Запись на пути запроса — perf_counter, поиск в dict и пара инкрементов
+(около микросекунды); текст Prometheus собирается только при выгрузке.
+Выгрузка — HTTP (``serve_metrics``, GET /metrics) или файл для textfile
+collector node_exporter (``write_textfile`` / ``export_textfile``).
+
+Пример:
+    metrics = Metrics()
+    transport = InstrumentedTransport(RawTcpTransport(host), metrics)
+    serve_metrics(metrics, port=9105)
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src import pdu
+from src.errors import ConnectionLost, ModbusExceptionError, RelayError, RelayTimeout
+from src.transport import Transport, as_transport
+
+# Границы корзин гистограммы задержки, сек
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+
+class Metrics:
+    """Счетчики и гистограммы; ключи — кортежи значений меток."""
+
+    def __init__(self):
+        self.latency = {}          # (target, slave, fc) -> Histogram
+        self.timeouts = {}         # (target, slave, fc) -> int
+        self.exceptions = {}       # (target, slave, fc, code) -> int
+        self.errors = {}           # (target, slave, fc) -> int
+        self.connection_lost = {}  # target -> int
+        self.bytes_sent = {}       # target -> int
+        self.bytes_received = {}   # target -> int
+        self._reconnects = {}      # target -> [объекты с атрибутом reconnects]
+        # Новые ключи добавляются под блокировкой: render обходит словари
+        # из другого потока (HTTP, выгрузка в файл)
+        self._lock = threading.Lock()
+
+    def observe(self, key, seconds):
+        histogram = self.latency.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.latency.setdefault(key, Histogram())
+        histogram.counts[bisect_left(BUCKETS, seconds)] += 1
+        histogram.sum += seconds
+
+    def count(self, table, key, amount=1):
+        if key in table:
+            table[key] += amount
+        else:
+            with self._lock:
+                table[key] = table.get(key, 0) + amount
+
+    def track_reconnects(self, target, source):
+        """Выгружать ``source.reconnects`` (GatewaySession, транспорт) для ``target``."""
+        with self._lock:
+            sources = self._reconnects.setdefault(target, [])
+            if source not in sources:
+                sources.append(source)
+
+    def _snapshot(self):
+        with self._lock:
+            snapshot = {name: sorted(getattr(self, name).items())
+                        for name in ('latency', 'timeouts', 'exceptions', 'errors',
+                                     'connection_lost', 'bytes_sent', 'bytes_received')}
+            snapshot['_reconnects'] = [(target, list(sources))
+                                       for target, sources in sorted(self._reconnects.items())]
+        return snapshot
+
+    def render(self):
+        """Текст в формате Prometheus (exposition format 0.0.4)."""
+        lines = []
+        snapshot = self._snapshot()
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        samples = []
+        for (target, slave, fc), histogram in snapshot['latency']:
+            labels = f'target="{target}",slave="{slave}",fc="{fc}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                samples.append(f'modbus_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += histogram.counts[-1]
+            samples.append(f'modbus_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            samples.append(f'modbus_request_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+            samples.append(f'modbus_request_duration_seconds_count{{{labels}}} {cumulative}')
+        family('modbus_request_duration_seconds', 'histogram',
+               'Время запроса до ответа (успешные и исключения).', samples)
+
+        family('modbus_timeouts_total', 'counter', 'Запросы без ответа.', [
+            f'modbus_timeouts_total{{target="{t}",slave="{s}",fc="{fc}"}} {n}'
+            for (t, s, fc), n in snapshot['timeouts']
+        ])
+        family('modbus_exceptions_total', 'counter', 'Ответы-исключения Modbus.', [
+            f'modbus_exceptions_total{{target="{t}",slave="{s}",fc="{fc}",code="{code}"}} {n}'
+            for (t, s, fc, code), n in snapshot['exceptions']
+        ])
+        family('modbus_errors_total', 'counter', 'Прочие ошибки обмена (CRC, чужой ответ).', [
+            f'modbus_errors_total{{target="{t}",slave="{s}",fc="{fc}"}} {n}'
+            for (t, s, fc), n in snapshot['errors']
+        ])
+        family('modbus_connection_lost_total', 'counter', 'Обрывы соединения.', [
+            f'modbus_connection_lost_total{{target="{t}"}} {n}'
+            for t, n in snapshot['connection_lost']
+        ])
+        family('modbus_reconnects_total', 'counter', 'Переподключения.', [
+            f'modbus_reconnects_total{{target="{t}"}} {sum(s.reconnects for s in sources)}'
+            for t, sources in snapshot['_reconnects']
+        ])
+        family('modbus_bytes_sent_total', 'counter', 'Байт отправлено (кадры целиком).', [
+            f'modbus_bytes_sent_total{{target="{t}"}} {n}'
+            for t, n in snapshot['bytes_sent']
+        ])
+        family('modbus_bytes_received_total', 'counter', 'Байт получено (кадры целиком).', [
+            f'modbus_bytes_received_total{{target="{t}"}} {n}'
+            for t, n in snapshot['bytes_received']
+        ])
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """Записать метрики в файл атомарно (для textfile collector)."""
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+def _response_length(function_code, count):
+    """Длина PDU ответа без ошибки (для байт на проводе у pymodbus)."""
+    if function_code in (pdu.READ_COILS, pdu.READ_DISCRETE_INPUTS):
+        return 2 + (count + 7) // 8
+    if function_code in (pdu.READ_HOLDING_REGISTERS, pdu.READ_INPUT_REGISTERS):
+        return 2 + 2 * count
+    return 5
+
+
+class InstrumentedTransport(Transport):
+    """
+    Транспорт-обертка, пишущая метрики каждого запроса.
+
+    ``target`` — метка Gateway/порта (по умолчанию ``host:port`` или путь
+    устройства). Для FramedTransport доступны и ``frame``/``exchange``
+    (воспроизведение паттернов): они тоже учитываются.
+    """
+
+    def __init__(self, transport, metrics, target=None):
+        self.transport = as_transport(transport)
+        self.metrics = metrics
+        self.target = self.name = target or self.transport.name
+        self.framing = self.transport.framing
+        source = getattr(self.transport, 'client', self.transport)
+        if hasattr(source, 'reconnects'):
+            metrics.track_reconnects(self.target, source)
+
+    def __getattr__(self, name):
+        # frame, payload, frames, stats... — от исходного транспорта
+        return getattr(self.transport, name)
+
+    def connect(self):
+        return self.transport.connect()
+
+    def close(self):
+        self.transport.close()
+
+    def _call(self, function_code, slave_id, method, args, sent, received):
+        metrics = self.metrics
+        key = (self.target, slave_id, function_code)
+        start = time.perf_counter()
+        try:
+            result = method(slave_id, *args)
+        except RelayTimeout:
+            metrics.count(metrics.timeouts, key)
+            metrics.count(metrics.bytes_sent, self.target, sent + self.framing)
+            raise
+        except ModbusExceptionError as e:
+            metrics.observe(key, time.perf_counter() - start)
+            metrics.count(metrics.exceptions, key + (e.exception_code,))
+            metrics.count(metrics.bytes_sent, self.target, sent + self.framing)
+            metrics.count(metrics.bytes_received, self.target, 2 + self.framing)
+            raise
+        except ConnectionLost:
+            metrics.count(metrics.connection_lost, self.target)
+            raise
+        except RelayError:
+            metrics.count(metrics.errors, key)
+            raise
+        metrics.observe(key, time.perf_counter() - start)
+        metrics.count(metrics.bytes_sent, self.target, sent + self.framing)
+        metrics.count(metrics.bytes_received, self.target, received + self.framing)
+        return result
+
+    def read_coils(self, slave_id, address, count):
+        return self._call(pdu.READ_COILS, slave_id, self.transport.read_coils,
+                          (address, count), 5, _response_length(pdu.READ_COILS, count))
+
+    def read_discrete_inputs(self, slave_id, address, count):
+        return self._call(pdu.READ_DISCRETE_INPUTS, slave_id, self.transport.read_discrete_inputs,
+                          (address, count), 5, _response_length(pdu.READ_DISCRETE_INPUTS, count))
+
+    def read_holding_registers(self, slave_id, address, count):
+        return self._call(pdu.READ_HOLDING_REGISTERS, slave_id,
+                          self.transport.read_holding_registers, (address, count), 5,
+                          _response_length(pdu.READ_HOLDING_REGISTERS, count))
+
+    def read_input_registers(self, slave_id, address, count):
+        return self._call(pdu.READ_INPUT_REGISTERS, slave_id, self.transport.read_input_registers,
+                          (address, count), 5, _response_length(pdu.READ_INPUT_REGISTERS, count))
+
+    def write_coil(self, slave_id, address, value):
+        return self._call(pdu.WRITE_COIL, slave_id, self.transport.write_coil,
+                          (address, value), 5, 5)
+
+    def write_coils(self, slave_id, address, values):
+        return self._call(pdu.WRITE_COILS, slave_id, self.transport.write_coils,
+                          (address, values), 6 + (len(values) + 7) // 8, 5)
+
+    def write_register(self, slave_id, address, value):
+        return self._call(pdu.WRITE_REGISTER, slave_id, self.transport.write_register,
+                          (address, value), 5, 5)
+
+    def write_registers(self, slave_id, address, values):
+        return self._call(pdu.WRITE_REGISTERS, slave_id, self.transport.write_registers,
+                          (address, values), 6 + 2 * len(values), 5)
+
+    def exchange(self, frame):
+        transport = self.transport
+        metrics = self.metrics
+        request = transport.payload(frame)
+        key = (self.target, transport.address(frame), request[0])
+        metrics.count(metrics.bytes_sent, self.target, len(frame))
+        start = time.perf_counter()
+        try:
+            reply = transport.exchange(frame)
+        except RelayTimeout:
+            metrics.count(metrics.timeouts, key)
+            raise
+        except ConnectionLost:
+            metrics.count(metrics.connection_lost, self.target)
+            raise
+        except RelayError:
+            metrics.count(metrics.errors, key)
+            raise
+        metrics.observe(key, time.perf_counter() - start)
+        metrics.count(metrics.bytes_received, self.target, len(reply))
+        function_code = transport.payload(reply)[0]
+        if function_code & 0x80:
+            metrics.count(metrics.exceptions, key + (transport.payload(reply)[1],))
+        return reply
+
+
+class _Handler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(metrics, port=9105, host='127.0.0.1'):
+    """HTTP /metrics в фоновом потоке; возвращает сервер (``shutdown()`` — остановить)."""
+    handler = type('MetricsHandler', (_Handler,), {'metrics': metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def export_textfile(metrics, path, interval=10.0):
+    """Переписывать файл метрик каждые ``interval`` сек в фоновом потоке."""
+    def loop():
+        while True:
+            metrics.write_textfile(path)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name='metrics-textfile', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,250 @@
+"""
+Паттерны реле в файлах (JSON или YAML) и их компиляция в готовые кадры.
+
+Формат:
+
+    {
+      "name": "chaser",
+      "interval_ms": 50,          # шаг по умолчанию
+      "repeat": 2,
+      "initial": "off",           # "off" — считать платы выключенными,
+                                  # "unknown" — первый шаг пишет все каналы
+      "steps": [
+        {"set": {"1": "0x0000000F", "2": [1, 2, 3]}, "hold_ms": 100},
+        {"sweep": "on", "slave": 1, "from": 1, "to": 32},
+        {"sweep": "off", "slave": 1, "from": 32, "to": 1, "hold_ms": 20}
+      ]
+    }
+
+``set`` задает маску платы: число, hex-строку или список номеров каналов
+(с 1). Платы, не упомянутые в шаге, не меняются. ``sweep`` разворачивается
+в шаги, каждый из которых включает (выключает) следующий канал.
+
+Компиляция прогоняет паттерн через теневое состояние (``src.shadow``)
+и превращает каждый шаг в кортеж готовых кадров транспорта вместе
+с ожидаемыми байтами ответа. При воспроизведении кадры только
+отправляются и сравниваются — ничего не собирается и не кодируется.
+YAML поддерживается, если установлен PyYAML.
+"""
+
+import json
+from collections import namedtuple
+from pathlib import Path
+
+from src import pdu
+from src.errors import RelayError
+from src.relay import CHANNELS
+from src.scheduler import DeadlineScheduler
+from src.shadow import FRAME_GAP_CHARS, plan_frames
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class PatternError(ValueError):
+    """Ошибка в файле паттерна."""
+
+
+Pattern = namedtuple('Pattern', 'name interval repeat initial steps')
+# targets: {slave_id: маска} или {slave_id: (канал, вкл)} для шагов sweep
+Step = namedtuple('Step', 'targets hold')
+CompiledStep = namedtuple('CompiledStep', 'exchanges hold')
+CompiledPattern = namedtuple('CompiledPattern', 'name interval repeat first loop frames wire_bytes')
+
+
+def _parse_mask(value, where):
+    if isinstance(value, int):
+        mask = value
+    elif isinstance(value, str):
+        try:
+            mask = int(value, 0)
+        except ValueError:
+            raise PatternError(f'{where}: неверная маска {value!r}') from None
+    elif isinstance(value, list):
+        mask = 0
+        for channel in value:
+            mask |= 1 << (_channel(channel, where) - 1)
+    else:
+        raise PatternError(f'{where}: неверная маска {value!r}')
+    if not 0 <= mask < 1 << CHANNELS:
+        raise PatternError(f'{where}: маска вне 32 каналов')
+    return mask
+
+
+def _hold(raw, default, where):
+    hold = raw.get('hold_ms')
+    if hold is None:
+        return default
+    if not isinstance(hold, (int, float)) or hold < 0:
+        raise PatternError(f'{where}: неверный hold_ms {hold!r}')
+    return hold / 1000
+
+
+def _channel(value, where):
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= CHANNELS:
+        raise PatternError(f'{where}: неверный канал {value!r} (1-{CHANNELS})')
+    return value
+
+
+def _slave(value, where):
+    try:
+        slave_id = int(value)
+    except (TypeError, ValueError):
+        slave_id = None
+    if slave_id is None or isinstance(value, bool) or not 1 <= slave_id <= 247:
+        raise PatternError(f'{where}: неверный Slave ID {value!r}')
+    return slave_id
+
+
+def parse_pattern(data):
+    """Словарь (из JSON/YAML) -> Pattern с развернутыми шагами."""
+    if not isinstance(data, dict) or not isinstance(data.get('steps'), list):
+        raise PatternError('паттерн должен содержать список "steps"')
+
+    interval = data.get('interval_ms', 50)
+    if isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval <= 0:
+        raise PatternError(f'неверный interval_ms {interval!r}')
+    interval /= 1000
+    repeat = data.get('repeat', 1)
+    if isinstance(repeat, bool) or not isinstance(repeat, int) or repeat < 0:
+        raise PatternError(f'неверный repeat {repeat!r}')
+    initial = data.get('initial', 'off')
+    if initial not in ('off', 'unknown'):
+        raise PatternError(f'неверный initial {initial!r}')
+
+    steps = []
+    for n, raw in enumerate(data['steps'], 1):
+        where = f'шаг {n}'
+        if not isinstance(raw, dict):
+            raise PatternError(f'{where}: шаг должен быть объектом')
+        hold = _hold(raw, interval, where)
+        if 'set' in raw:
+            if not isinstance(raw['set'], dict):
+                raise PatternError(f'{where}: "set" должен быть объектом {{Slave ID: маска}}')
+            masks = {_slave(slave_id, where): _parse_mask(mask, where)
+                     for slave_id, mask in raw['set'].items()}
+            steps.append(Step(masks, hold))
+        elif 'sweep' in raw:
+            if raw['sweep'] not in ('on', 'off'):
+                raise PatternError(f'{where}: sweep должен быть "on" или "off"')
+            slave_id = _slave(raw.get('slave', 1), where)
+            first = _channel(raw.get('from', 1), where)
+            last = _channel(raw.get('to', CHANNELS), where)
+            turn_on = raw['sweep'] == 'on'
+            direction = 1 if last >= first else -1
+            for channel in range(first, last + direction, direction):
+                steps.append(Step({slave_id: (channel, turn_on)}, hold))
+        else:
+            raise PatternError(f'{where}: нужен "set" или "sweep"')
+
+    return Pattern(data.get('name', 'pattern'), interval, repeat, initial, steps)
+
+
+def load_pattern(path):
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix in ('.yaml', '.yml'):
+        if yaml is None:
+            raise PatternError('для YAML установите PyYAML: pip install pyyaml')
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise PatternError(f'неверный YAML: {e}') from None
+    else:
+        data = json.loads(text)
+    return parse_pattern(data)
+
+
+def _expected_reply(request):
+    """Ответ на FC05/FC15 — эхо адреса и значения/количества (первые 5 байт PDU)."""
+    return request[:5]
+
+
+def _compile_pass(pattern, transport, states, frame_overhead, tid):
+    """Один проход паттерна от состояний ``states`` (None — неизвестно)."""
+    compiled = []
+    frames = wire = 0
+    for step in pattern.steps:
+        exchanges = []
+        for slave_id, target in sorted(step.targets.items()):
+            old = states.get(slave_id)
+            if isinstance(target, tuple):
+                channel, turn_on = target
+                bit = 1 << (channel - 1)
+                new = (old or 0) | bit if turn_on else (old or 0) & ~bit
+            else:
+                new = target
+            for frame in plan_frames(old, new, CHANNELS, frame_overhead):
+                request = (pdu.write_coil(frame.address, frame.values[0])
+                           if len(frame.values) == 1
+                           else pdu.write_coils(frame.address, frame.values))
+                tid = tid % 0xFFFF + 1
+                wire_frame = transport.frame(slave_id, request, tid)
+                expected = transport.frame(slave_id, _expected_reply(request), tid)
+                exchanges.append((wire_frame, expected))
+                frames += 1
+                wire += len(wire_frame) + len(expected)
+            states[slave_id] = new
+        compiled.append(CompiledStep(tuple(exchanges), step.hold))
+    return tuple(compiled), frames, wire, tid
+
+
+def compile_pattern(pattern, transport, frame_overhead=FRAME_GAP_CHARS):
+    """
+    Pattern -> CompiledPattern для конкретного FramedTransport.
+
+    ``first`` — первый проход от начального состояния, ``loop`` — проход
+    для повторов, от состояния в конце первого прохода. Каждый шаг
+    меняет биты как ``(x & A) | B``, поэтому состояние в конце любого
+    следующего прохода совпадает с концом первого и ``loop`` годится
+    для всех повторов.
+    """
+    if pattern.initial == 'unknown':
+        states = {}
+    else:
+        states = {slave_id: 0 for step in pattern.steps for slave_id in step.targets}
+
+    first, frames, wire, tid = _compile_pass(pattern, transport, states, frame_overhead, 0)
+    loop, loop_frames, loop_wire, _ = _compile_pass(pattern, transport, states,
+                                                    frame_overhead, tid)
+    repeats = max(0, pattern.repeat - 1)
+    return CompiledPattern(pattern.name, pattern.interval, pattern.repeat, first, loop,
+                           frames + repeats * loop_frames, wire + repeats * loop_wire)
+
+
+def play(compiled, transport, repeat=None, on_error=None):
+    """
+    Воспроизвести скомпилированный паттерн.
+
+    Шаги идут по дедлайнам (``DeadlineScheduler``) с интервалом паттерна;
+    ``hold`` шага, отличный от интервала, сдвигает следующий дедлайн.
+    Возвращает ``(JitterStats, errors)``; ``on_error(step_index, error)``
+    вызывается при ошибке обмена или несовпадении ответа.
+    """
+    repeat = compiled.repeat if repeat is None else repeat
+    scheduler = DeadlineScheduler(compiled.interval)
+    exchange = transport.exchange
+    errors = [0]
+
+    # Все шаги и их дедлайны (сумма hold предыдущих шагов) готовятся заранее
+    steps = compiled.first + compiled.loop * max(0, repeat - 1) if repeat else ()
+    offsets = []
+    offset = 0.0
+    for step in steps:
+        offsets.append(offset)
+        offset += step.hold
+
+    def run_step(index):
+        for frame, expected in steps[index].exchanges:
+            try:
+                if exchange(frame) != expected:
+                    raise RelayError('ответ не совпал с ожидаемым (исключение Modbus?)')
+            except RelayError as e:
+                errors[0] += 1
+                if on_error:
+                    on_error(index, e)
+
+    stats = scheduler.run_at(offsets, run_step)
+    return stats, errors[0]
@@ -0,0 +1,162 @@
+"""
+Кодирование и разбор Modbus PDU, обрамление кадров TCP и RTU.
+
+Используются функции, которые нужны для релейных плат:
+FC01/FC02 (чтение coils / discrete inputs), FC03/FC04 (чтение регистров),
+FC05/FC06 (запись одного coil / регистра), FC15/FC16 (запись нескольких).
+
+Обрамление: ``mbap`` для Modbus TCP, ``rtu`` (адрес + PDU + CRC16) для
+последовательной линии.
+"""
+
+import struct
+
+from src.errors import ModbusExceptionError, RelayError
+
+READ_COILS = 1
+READ_DISCRETE_INPUTS = 2
+READ_HOLDING_REGISTERS = 3
+READ_INPUT_REGISTERS = 4
+WRITE_COIL = 5
+WRITE_REGISTER = 6
+WRITE_COILS = 15
+WRITE_REGISTERS = 16
+
+MBAP_HEADER = struct.Struct('>HHHB')
+
+# Минимальная пауза между кадрами RTU на скоростях выше 19200 (спецификация)
+RTU_MIN_GAP = 0.00175
+
+
+def pack_bits(values):
+    """Список bool -> байты FC15 (младший бит первого байта = первый coil)."""
+    data = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value:
+            data[i // 8] |= 1 << (i % 8)
+    return bytes(data)
+
+
+def unpack_bits(data, count):
+    return [bool(data[i // 8] >> (i % 8) & 1) for i in range(count)]
+
+
+def read_coils(address, count):
+    return struct.pack('>BHH', READ_COILS, address, count)
+
+
+def read_discrete_inputs(address, count):
+    return struct.pack('>BHH', READ_DISCRETE_INPUTS, address, count)
+
+
+def read_holding_registers(address, count):
+    return struct.pack('>BHH', READ_HOLDING_REGISTERS, address, count)
+
+
+def read_input_registers(address, count):
+    return struct.pack('>BHH', READ_INPUT_REGISTERS, address, count)
+
+
+def write_coil(address, value):
+    return struct.pack('>BHH', WRITE_COIL, address, 0xFF00 if value else 0x0000)
+
+
+def write_register(address, value):
+    return struct.pack('>BHH', WRITE_REGISTER, address, value)
+
+
+def write_coils(address, values):
+    data = pack_bits(values)
+    return struct.pack('>BHHB', WRITE_COILS, address, len(values), len(data)) + data
+
+
+def write_registers(address, values):
+    data = struct.pack(f'>{len(values)}H', *values)
+    return struct.pack('>BHHB', WRITE_REGISTERS, address, len(values), len(data)) + data
+
+
+def mbap(transaction_id, slave_id, pdu):
+    """Modbus TCP кадр: MBAP заголовок + PDU."""
+    return MBAP_HEADER.pack(transaction_id, 0, len(pdu) + 1, slave_id) + pdu
+
+
+def _crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC_TABLE = _crc_table()
+
+
+def crc16(data):
+    """CRC16 Modbus (полином 0xA001, начальное значение 0xFFFF), по таблице на байт."""
+    crc = 0xFFFF
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def rtu(slave_id, pdu):
+    """Modbus RTU кадр: адрес + PDU + CRC16 (младший байт первым)."""
+    frame = bytes((slave_id,)) + pdu
+    return frame + crc16(frame).to_bytes(2, 'little')
+
+
+def rtu_check(frame):
+    """True, если CRC16 в конце кадра совпадает."""
+    return len(frame) >= 4 and crc16(frame[:-2]) == int.from_bytes(frame[-2:], 'little')
+
+
+def rtu_frame_gap(baud, bits_per_char=10):
+    """Тишина 3.5 символа между кадрами RTU, сек (не меньше 1.75 мс выше 19200)."""
+    return RTU_MIN_GAP if baud > 19200 else 3.5 * bits_per_char / baud
+
+
+def rtu_request_length(head):
+    """Полная длина RTU запроса по первым 7 байтам."""
+    if head[1] in (WRITE_COILS, WRITE_REGISTERS):
+        return 7 + head[6] + 2
+    return 8
+
+
+def rtu_response_length(head):
+    """Полная длина RTU ответа по первым 3 байтам."""
+    function_code = head[1]
+    if function_code & 0x80:
+        return 5
+    if function_code in (READ_COILS, READ_DISCRETE_INPUTS,
+                         READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+        return 3 + head[2] + 2
+    return 8
+
+
+def parse_response(slave_id, request, response):
+    """
+    Разбор ответа на запрос ``request``.
+
+    FC01/FC02 -> list[bool], FC03/FC04 -> list[int], записи -> None.
+    Ответ-исключение поднимает ModbusExceptionError.
+    """
+    function_code = request[0]
+    if not response:
+        raise RelayError(f'Slave {slave_id}: пустой ответ')
+    if response[0] == function_code | 0x80:
+        raise ModbusExceptionError(slave_id, function_code, response[1])
+    if response[0] != function_code:
+        raise RelayError(
+            f'Slave {slave_id}: ответ FC{response[0]:02d} на запрос FC{function_code:02d}'
+        )
+
+    if function_code in (READ_COILS, READ_DISCRETE_INPUTS):
+        count = struct.unpack_from('>H', request, 3)[0]
+        return unpack_bits(response[2:], count)
+    if function_code in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+        count = response[1] // 2
+        return list(struct.unpack_from(f'>{count}H', response, 2))
+    return None
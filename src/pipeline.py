@@ -0,0 +1,275 @@
+"""
+Конвейер записей с окном: команды уходят, не дожидаясь ответа.
+
+Блокирующий цикл тратит на каждый coil полный round-trip (TCP + Gateway
++ RS485). WritePipeline держит до ``window`` запросов в полете в одном
+соединении Modbus TCP; ответы разбираются в фоновом потоке и
+сопоставляются по Transaction ID. Пропускную способность тогда
+ограничивает шина, а не ожидание ответа.
+
+Ответы не теряются молча: запрос без ответа за ``timeout`` считается
+просроченным (слот окна освобождается), пришедший позже ответ — поздним,
+а просроченный без ответа к концу — потерянным. Поздний ответ ждут еще
+``LATE_WINDOW`` таймаутов, потом TID освобождается (ответ после этого
+считается чужим): молчащая плата в долгом прогоне не копит просроченные
+запросы и не занимает Transaction ID. Ответы-исключения и
+ответы на неизвестные TID тоже считаются (см. PipelineStats).
+
+WritePipeline — транспорт: записи возвращаются сразу, чтения ждут ответа,
+поэтому RelayBoard работает поверх него как обычно, а ``verify``
+подтверждает фактическое состояние.
+"""
+
+import socket
+import threading
+import time
+
+from src import pdu
+from src.errors import ConnectionLost, RelayError, RelayTimeout
+from src.transport import Transport
+
+# Сколько таймаутов после просрочки ждать поздний ответ
+LATE_WINDOW = 3
+
+
+class PipelineStats:
+    def __init__(self):
+        self.sent = 0
+        self.acked = 0
+        self.timed_out = 0
+        self.late = 0
+        self.unknown = 0
+        self.errors = []        # (slave_id, исключение)
+        self.rtt = []           # сек, по ответам в срок
+
+    @property
+    def lost(self):
+        """Просроченные, на которые ответ так и не пришел."""
+        return self.timed_out - self.late
+
+    @property
+    def ok(self):
+        return not self.timed_out and not self.errors and not self.unknown
+
+    def __str__(self):
+        rtt = sorted(self.rtt)
+        p50 = rtt[len(rtt) // 2] * 1000 if rtt else 0.0
+        return (f'отправлено {self.sent}, ответов {self.acked} (RTT p50 {p50:.1f} мс), '
+                f'ошибок {len(self.errors)}, просрочено {self.timed_out} '
+                f'(поздних {self.late}, потеряно {self.lost}), чужих TID {self.unknown}')
+
+
+class _Pending:
+    __slots__ = ('slave_id', 'request', 'sent_at', 'event', 'reply', 'forget_at')
+
+    def __init__(self, slave_id, request, sent_at, wait):
+        self.slave_id = slave_id
+        self.request = request
+        self.sent_at = sent_at
+        self.event = threading.Event() if wait else None
+        self.reply = None
+        self.forget_at = None
+
+
+class WritePipeline(Transport):
+    """
+    Конвейер запросов Modbus TCP с окном ``window``.
+
+    ``write_*`` ставят запрос в полет и возвращаются сразу (ждут только
+    свободного места в окне), ``read_*`` ждут ответа. ``drain`` дожидается
+    ответа или просрочки всех запросов в полете.
+    """
+
+    def __init__(self, host, port=502, window=8, timeout=1.0):
+        self.host = host
+        self.port = port
+        self.window = window
+        self.timeout = timeout
+        self.stats = PipelineStats()
+        self.sock = None
+        self._reader = None
+        self._pending = {}
+        self._expired = {}
+        self._tid = 0
+        self._lock = threading.Condition()
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connect(self):
+        if self.sock is None:
+            try:
+                self.sock = socket.create_connection((self.host, self.port), self.timeout)
+            except OSError:
+                return False
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Короткий таймаут чтения: поток ответов заодно просрочивает запросы
+            self.sock.settimeout(min(self.timeout / 4, 0.05))
+            self._reader = threading.Thread(target=self._read_loop, args=(self.sock,),
+                                            name='modbus-pipeline', daemon=True)
+            self._reader.start()
+        return True
+
+    def close(self, grace=0.0):
+        """Закрыть соединение; ``grace`` — сколько ждать поздние ответы перед этим."""
+        if self.sock is None:
+            return
+        self.drain()
+        with self._lock:
+            self._forget(time.perf_counter())
+        if grace and self._expired:
+            time.sleep(grace)
+        sock, self.sock = self.sock, None
+        sock.close()
+        self._reader.join()
+        self._reader = None
+
+    def _expire(self, now):
+        """Просрочить запросы без ответа; вызывается под ``_lock``."""
+        for tid, pending in list(self._pending.items()):
+            if now - pending.sent_at >= self.timeout:
+                del self._pending[tid]
+                pending.forget_at = pending.sent_at + (1 + LATE_WINDOW) * self.timeout
+                self._expired[tid] = pending
+                self.stats.timed_out += 1
+                if pending.event is not None:
+                    pending.event.set()
+        self._lock.notify_all()
+
+    def _forget(self, now):
+        """Забыть просроченные, поздний ответ на которые уже не ждем; под ``_lock``."""
+        expired = self._expired
+        for tid in [tid for tid, pending in expired.items() if pending.forget_at <= now]:
+            del expired[tid]
+
+    def _settle(self, tid, body):
+        with self._lock:
+            pending = self._pending.pop(tid, None)
+            if pending is None:
+                pending = self._expired.pop(tid, None)
+                if pending is None:
+                    self.stats.unknown += 1
+                    return
+                self.stats.late += 1
+            else:
+                self.stats.acked += 1
+                self.stats.rtt.append(time.perf_counter() - pending.sent_at)
+            self._lock.notify_all()
+        pending.reply = body
+        if pending.event is not None:
+            # Ответ ждет ``call``: ошибку поднимет он
+            pending.event.set()
+            return
+        try:
+            pdu.parse_response(pending.slave_id, pending.request, body)
+        except RelayError as e:
+            self.stats.errors.append((pending.slave_id, e))
+
+    def _read_loop(self, sock):
+        header_size = pdu.MBAP_HEADER.size
+        buffer = b''
+        try:
+            while True:
+                try:
+                    chunk = sock.recv(4096)
+                except socket.timeout:
+                    chunk = None
+                if chunk == b'':
+                    raise ConnectionLost(f'{self.host}:{self.port}: соединение закрыто')
+                if chunk:
+                    buffer += chunk
+                while len(buffer) >= header_size:
+                    tid, _, length, _ = pdu.MBAP_HEADER.unpack_from(buffer)
+                    end = header_size + length - 1
+                    if len(buffer) < end:
+                        break
+                    body, buffer = buffer[header_size:end], buffer[end:]
+                    self._settle(tid, body)
+                with self._lock:
+                    self._expire(time.perf_counter())
+        except (OSError, RelayError):
+            # Закрытие сокета или обрыв: всё, что в полете, — без ответа;
+            # следующий submit подключится заново
+            with self._lock:
+                if self.sock is sock:
+                    self.sock = None
+                    sock.close()
+                self._expire(float('inf'))
+
+    def _allocate_tid(self):
+        self._forget(time.perf_counter())
+        for _ in range(0x10000):
+            self._tid = (self._tid + 1) & 0xFFFF
+            if self._tid not in self._pending and self._tid not in self._expired:
+                return self._tid
+        raise RelayError('нет свободных Transaction ID')
+
+    def submit(self, slave_id, request, wait=False):
+        """Отправить PDU; ждет только свободного места в окне."""
+        if self.sock is None and not self.connect():
+            raise ConnectionLost(f'{self.host}:{self.port}: нет соединения')
+        with self._lock:
+            while len(self._pending) >= self.window:
+                self._lock.wait(self.timeout)
+                self._expire(time.perf_counter())
+            sock = self.sock
+            if sock is None:
+                raise ConnectionLost(f'{self.host}:{self.port}: соединение закрыто')
+            tid = self._allocate_tid()
+            pending = _Pending(slave_id, request, time.perf_counter(), wait)
+            self._pending[tid] = pending
+            self.stats.sent += 1
+        try:
+            sock.sendall(pdu.mbap(tid, slave_id, request))
+        except OSError as e:
+            with self._lock:
+                self._pending.pop(tid, None)
+                self._lock.notify_all()
+            raise ConnectionLost(f'{self.host}:{self.port}: {e}') from e
+        return pending
+
+    def drain(self):
+        """Дождаться ответа или просрочки всех запросов в полете."""
+        with self._lock:
+            while self._pending:
+                self._lock.wait(self.timeout)
+                self._expire(time.perf_counter())
+
+    def call(self, slave_id, request):
+        """Отправить PDU и дождаться разобранного ответа."""
+        pending = self.submit(slave_id, request, wait=True)
+        if not pending.event.wait(self.timeout):
+            # Поток ответов мог остановиться: просрочить самим
+            with self._lock:
+                self._expire(time.perf_counter())
+        if pending.reply is None:
+            raise RelayTimeout(f'Slave {slave_id}: нет ответа за {self.timeout} сек')
+        return pdu.parse_response(slave_id, request, pending.reply)
+
+    def read_coils(self, slave_id, address, count):
+        return self.call(slave_id, pdu.read_coils(address, count))
+
+    def read_discrete_inputs(self, slave_id, address, count):
+        return self.call(slave_id, pdu.read_discrete_inputs(address, count))
+
+    def read_holding_registers(self, slave_id, address, count):
+        return self.call(slave_id, pdu.read_holding_registers(address, count))
+
+    def read_input_registers(self, slave_id, address, count):
+        return self.call(slave_id, pdu.read_input_registers(address, count))
+
+    def write_coil(self, slave_id, address, value):
+        self.submit(slave_id, pdu.write_coil(address, value))
+
+    def write_coils(self, slave_id, address, values):
+        self.submit(slave_id, pdu.write_coils(address, values))
+
+    def write_register(self, slave_id, address, value):
+        self.submit(slave_id, pdu.write_register(address, value))
+
+    def write_registers(self, slave_id, address, values):
+        self.submit(slave_id, pdu.write_registers(address, values))
@@ -0,0 +1,149 @@
+"""
+Параллельная работа портов Gateway в режиме Multi-host.
+
+Каждый порт Gateway — отдельная линия RS485: пока плата на PORT1 отвечает,
+PORT2..PORT4 простаивают, если запросы идут по одному через общее
+соединение. PortScheduler держит на каждый порт свое TCP соединение и
+свою очередь (поток-исполнитель на один рабочий поток): команды к
+платам разных портов выполняются одновременно, команды к платам одного
+порта — строго по очереди, как того требует полудуплексная шина.
+
+Slave ID сопоставляется порту по ``routes`` (по умолчанию Slave ID N —
+PORTN, как в настройках Multi-host). Waveshare принимает несколько
+TCP соединений одновременно (до 4-8 в зависимости от модели), поэтому
+соединение на порт не упирается в лимит Gateway с четырьмя портами.
+
+Пример:
+    with PortScheduler('192.168.1.254') as ports:
+        futures = [ports.submit(sid, RelayBoard.all_off) for sid in (1, 2, 3, 4)]
+        ports.wait(futures)
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from src.errors import RelayError
+from src.relay import RelayBoard
+from src.rtt import TimeoutPolicy
+from src.transport import PymodbusTransport, open_transport
+
+DEFAULT_ROUTES = {slave_id: slave_id for slave_id in (1, 2, 3, 4)}
+
+
+class PortStats:
+    """Счетчики одного порта: операции, ошибки, время занятости шины."""
+
+    __slots__ = ('ops', 'errors', 'busy')
+
+    def __init__(self):
+        self.ops = 0
+        self.errors = 0
+        self.busy = 0.0
+
+    def __str__(self):
+        return f'операций {self.ops}, ошибок {self.errors}, занят {self.busy * 1000:.1f} мс'
+
+
+class _Port:
+    def __init__(self, name, connect):
+        self.name = name
+        self.stats = PortStats()
+        self.boards = {}
+        self.transport = None
+        self._connect = connect
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix=f'port-{name}')
+
+    def run(self, slave_id, action, args):
+        """Выполняется в потоке порта: ``action(board, *args)``."""
+        if self.transport is None:
+            self.transport = self._connect()
+        board = self.boards.get(slave_id)
+        if board is None:
+            board = self.boards[slave_id] = RelayBoard(self.transport, slave_id)
+        stats = self.stats
+        start = time.perf_counter()
+        try:
+            return action(board, *args)
+        except RelayError:
+            stats.errors += 1
+            raise
+        finally:
+            stats.ops += 1
+            stats.busy += time.perf_counter() - start
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+
+class PortScheduler:
+    """
+    Один Gateway в режиме Multi-host: соединение и очередь на каждый порт.
+
+    ``routes`` — ``{slave_id: порт}``; ``kind`` — транспорт соединений
+    (см. ``open_transport``, по умолчанию raw-tcp). RelayBoard для каждой
+    платы живет в потоке своего порта, теневое состояние сохраняется
+    между командами. ``adaptive`` — таймауты по RTT плат порта
+    (``src.rtt``, кроме kind='tcp'), ``timeout`` — их верхняя граница.
+    """
+
+    def __init__(self, host, port=502, routes=None, kind='raw-tcp', timeout=1.0, adaptive=True):
+        self.host = host
+        self.port = port
+        self.adaptive = adaptive
+        self.routes = dict(routes or DEFAULT_ROUTES)
+        self.ports = {}
+        for bus in sorted(set(self.routes.values())):
+            self.ports[bus] = _Port(bus, lambda: self._connect(kind, timeout))
+
+    def _connect(self, kind, timeout):
+        if kind == 'tcp':
+            # Не общая get_session: у каждого порта свое соединение pymodbus
+            from src.session import GatewaySession
+            return PymodbusTransport(GatewaySession(self.host, self.port, timeout=timeout))
+        timeouts = TimeoutPolicy(timeout, ceiling=timeout) if self.adaptive else None
+        return open_transport(kind, self.host, self.port, timeout=timeout, timeouts=timeouts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for port in self.ports.values():
+            port.close()
+
+    def port_of(self, slave_id):
+        try:
+            return self.ports[self.routes[slave_id]]
+        except KeyError:
+            raise KeyError(f'Slave {slave_id} не сопоставлен порту Gateway') from None
+
+    def submit(self, slave_id, action, *args):
+        """
+        Поставить ``action(board, *args)`` в очередь порта платы.
+
+        ``action`` — метод RelayBoard (``RelayBoard.set_coil``) или любая
+        функция от платы. Возвращает concurrent.futures.Future.
+        """
+        port = self.port_of(slave_id)
+        return port.executor.submit(port.run, slave_id, action, args)
+
+    def wait(self, futures):
+        """Дождаться всех; возвращает список исключений (пустой — без ошибок)."""
+        done, _ = wait_futures(futures)
+        return [f.exception() for f in done if f.exception() is not None]
+
+    def run(self, jobs):
+        """``jobs`` — (slave_id, action, *args); выполнить все и дождаться."""
+        return self.wait([self.submit(*job) for job in jobs])
+
+    def stats(self):
+        return {name: port.stats for name, port in self.ports.items()}
+
+    def reset_stats(self):
+        for port in self.ports.values():
+            port.stats = PortStats()
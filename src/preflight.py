@@ -0,0 +1,161 @@
+"""
+Быстрая проверка перед тестом: сеть, порт 502, ответ каждой платы.
+
+Все пробы идут параллельно: TCP connect к Gateway, FC01 (1 coil) по
+каждому Slave ID в одном соединении конвейером и, по желанию, ICMP ping.
+В исправной сети проверка занимает миллисекунды (один RTT на connect и
+один на FC01), а не секунды ожидания системного ``ping``.
+
+Причина отказа определяется по результатам проб, а не угадывается:
+    * NO_ROUTE    — нет маршрута до хоста или он не отвечает на SYN;
+    * REFUSED     — хост есть, порт закрыт (RST);
+    * RTU_SILENT  — Modbus TCP есть, но ни одна плата не ответила
+                    (RS485: проводка, скорость, питание плат);
+    * WRONG_SLAVE — шина работает, но часть Slave ID не отвечает, Gateway
+                    не знает маршрута (0x0A) или отвечает другое устройство.
+
+Пример:
+    result = run_preflight('192.168.1.254', slave_ids=(1, 2))
+    if not result.ok:
+        print(result.verdict, result.detail)
+"""
+
+import asyncio
+import platform
+import time
+from collections import namedtuple
+
+from src import pdu
+from src.async_client import AsyncRelayClient
+from src.errors import ModbusExceptionError, RelayError, RelayTimeout
+
+OK = 'ok'
+NO_ROUTE = 'no-route'
+REFUSED = 'refused'
+RTU_SILENT = 'rtu-silent'
+WRONG_SLAVE = 'wrong-slave'
+
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+GATEWAY_TARGET_FAILED = 0x0B
+
+# Состояния одной пробы
+PROBE_OK = 'ok'
+PROBE_SILENT = 'silent'        # таймаут или 0x0B от Gateway
+PROBE_NO_PATH = 'no-path'      # 0x0A: Gateway не знает такой Slave ID
+PROBE_EXCEPTION = 'exception'  # ответило устройство, но с исключением
+PROBE_ERROR = 'error'          # соединение оборвалось
+
+Probe = namedtuple('Probe', 'status rtt_ms detail')
+
+
+class PreflightResult(namedtuple('PreflightResult', 'host port verdict detail tcp icmp slaves elapsed_ms')):
+    """
+    ``tcp`` и ``icmp`` — Probe (``icmp`` — None, если ICMP не проверялся),
+    ``slaves`` — ``{slave_id: Probe}``.
+    """
+
+    @property
+    def ok(self):
+        return self.verdict == OK
+
+    def failed_slaves(self):
+        return [slave_id for slave_id, probe in self.slaves.items() if probe.status != PROBE_OK]
+
+
+def _ms(start):
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+async def probe_tcp(client):
+    """TCP connect клиента к Gateway; соединение остается для проб FC01."""
+    start = time.perf_counter()
+    try:
+        await client.connect()
+    except asyncio.TimeoutError:
+        return Probe(NO_ROUTE, None, f'нет ответа на SYN за {client.timeout} сек')
+    except ConnectionRefusedError:
+        return Probe(REFUSED, _ms(start), f'порт {client.port} закрыт (RST)')
+    except OSError as e:
+        # EHOSTUNREACH/ENETUNREACH, ошибка разрешения имени — до хоста не дойти
+        return Probe(NO_ROUTE, None, e.strerror or str(e))
+    return Probe(PROBE_OK, _ms(start), '')
+
+
+async def probe_icmp(host, timeout):
+    """Один ICMP echo через системный ``ping`` (параллельно с остальными пробами)."""
+    windows = platform.system().lower() == 'windows'
+    command = ['ping', '-n' if windows else '-c', '1', host]
+    start = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+    except OSError as e:
+        return Probe(PROBE_ERROR, None, f'ping недоступен: {e}')
+    try:
+        code = await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return Probe(PROBE_SILENT, None, f'нет ответа за {timeout} сек')
+    if code != 0:
+        return Probe(PROBE_SILENT, None, 'нет ответа')
+    return Probe(PROBE_OK, _ms(start), '')
+
+
+async def probe_slave(client, slave_id, timeout):
+    """FC01 coil 0 — только чтение, состояние реле не меняется."""
+    start = time.perf_counter()
+    try:
+        await client.request(slave_id, pdu.read_coils(0, 1), timeout)
+    except ModbusExceptionError as e:
+        if e.exception_code == GATEWAY_PATH_UNAVAILABLE:
+            return Probe(PROBE_NO_PATH, _ms(start), 'Gateway: нет маршрута (0x0A)')
+        if e.exception_code == GATEWAY_TARGET_FAILED:
+            return Probe(PROBE_SILENT, _ms(start), 'Gateway: плата не ответила (0x0B)')
+        return Probe(PROBE_EXCEPTION, _ms(start), f'исключение {e.exception_code}')
+    except RelayTimeout:
+        return Probe(PROBE_SILENT, None, f'нет ответа за {timeout} сек')
+    except RelayError as e:
+        return Probe(PROBE_ERROR, None, str(e))
+    return Probe(PROBE_OK, _ms(start), '')
+
+
+def classify(tcp, slaves):
+    """Вердикт и пояснение по результатам проб."""
+    if tcp.status != PROBE_OK:
+        return tcp.status, tcp.detail
+    statuses = [probe.status for probe in slaves.values()]
+    if all(status == PROBE_OK for status in statuses):
+        return OK, ''
+    if all(status in (PROBE_SILENT, PROBE_ERROR) for status in statuses):
+        return RTU_SILENT, 'Modbus TCP отвечает, платы на RS485 — нет'
+    failed = ', '.join(f'{slave_id} ({probe.detail})' for slave_id, probe in slaves.items()
+                       if probe.status != PROBE_OK)
+    return WRONG_SLAVE, f'не отвечают Slave ID: {failed}'
+
+
+async def preflight(host, port=502, slave_ids=(1,), timeout=1.0, slave_timeout=0.5, icmp=False):
+    """Все пробы параллельно; возвращает PreflightResult."""
+    start = time.perf_counter()
+    icmp_task = asyncio.ensure_future(probe_icmp(host, timeout)) if icmp else None
+
+    client = AsyncRelayClient(host, port, timeout=timeout, max_in_flight=max(1, len(slave_ids)))
+    tcp = await probe_tcp(client)
+    slaves = {}
+    if tcp.status == PROBE_OK:
+        # FC01 ко всем платам сразу, в том же соединении
+        try:
+            probes = await asyncio.gather(*(
+                probe_slave(client, slave_id, slave_timeout) for slave_id in slave_ids))
+        finally:
+            await client.close()
+        slaves = dict(zip(slave_ids, probes))
+
+    icmp_probe = await icmp_task if icmp_task is not None else None
+    verdict, detail = classify(tcp, slaves)
+    return PreflightResult(host, port, verdict, detail, tcp, icmp_probe, slaves, _ms(start))
+
+
+def run_preflight(host, port=502, slave_ids=(1,), **kwargs):
+    """Синхронная обертка над ``preflight`` для скриптов."""
+    return asyncio.run(preflight(host, port, tuple(slave_ids), **kwargs))
@@ -0,0 +1,217 @@
+"""
+Modbus TCP прокси перед Gateway: много клиентов, одно соединение с Gateway.
+
+Waveshare держит всего несколько TCP соединений; когда RPi, SCADA и
+ноутбуки подключаются напрямую, лишние получают сброс соединения.
+ModbusProxy принимает любое число клиентов и передает их запросы в одно
+соединение с Gateway (AsyncRelayClient, несколько запросов в полете):
+Transaction ID клиента заменяется своим, ответ возвращается клиенту с
+его исходным TID.
+
+Чтения FC01/FC02/FC03 отвечаются из кэша, если тот же запрос (Slave ID,
+адрес, количество) выполнялся не раньше ``ttl`` сек назад; одинаковые
+чтения, пришедшие, пока первое еще на шине, ждут его ответа, а не идут
+на шину сами. Запись плате (FC05/FC06/FC15/FC16) сбрасывает кэш этой
+платы в момент отправки и после ответа; чтение, отправленное до записи,
+в кэш уже не попадет (счетчик поколений на Slave ID). Остальные функции
+(FC04, диагностика, неизвестные) передаются как есть, кэш не трогают.
+
+Запросы к одной плате идут по очереди; к разным — одновременно (Gateway
+в режиме Multi-host разводит их по портам). Нет ответа — клиент получает
+исключение 0x0B (target failed to respond, и при прочих ошибках запроса),
+нет связи с Gateway — 0x0A, как от самого Gateway.
+
+Пример:
+    proxy = ModbusProxy('192.168.1.254', ttl=0.25)
+    server = await proxy.serve('0.0.0.0', 5020)
+"""
+
+import asyncio
+import time
+
+from src import pdu
+from src.async_client import AsyncRelayClient
+from src.errors import ConnectionLost, RelayError, RelayTimeout
+from src.rtt import TimeoutPolicy
+
+CACHED = (pdu.READ_COILS, pdu.READ_DISCRETE_INPUTS, pdu.READ_HOLDING_REGISTERS)
+WRITES = (pdu.WRITE_COIL, pdu.WRITE_REGISTER, pdu.WRITE_COILS, pdu.WRITE_REGISTERS)
+
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+GATEWAY_TARGET_FAILED = 0x0B
+MAX_PDU = 253
+
+
+class ProxyStats:
+    """Запросы клиентов против запросов к Gateway."""
+
+    __slots__ = ('clients', 'requests', 'cache_hits', 'shared', 'upstream', 'errors')
+
+    def __init__(self):
+        self.clients = 0
+        self.requests = 0
+        self.cache_hits = 0
+        self.shared = 0
+        self.upstream = 0
+        self.errors = 0
+
+    def __str__(self):
+        return (f'клиентов {self.clients}, запросов {self.requests}, из кэша {self.cache_hits}, '
+                f'общих {self.shared}, к Gateway {self.upstream}, ошибок {self.errors}')
+
+
+class ModbusProxy:
+    """
+    Один Gateway: одно соединение к нему, кэш чтений, сервер для клиентов.
+
+    ``ttl`` — срок кэша чтений, сек (0 — без кэша, но одинаковые чтения
+    в полете все равно общие); ``timeout`` — верхняя граница таймаута
+    запроса (таймауты по RTT плат, ``src.rtt``).
+    """
+
+    def __init__(self, host, port=502, ttl=0.25, timeout=1.0, max_in_flight=8):
+        self.host = host
+        self.port = port
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.stats = ProxyStats()
+        self.client = None
+        self._connecting = asyncio.Lock()
+        self._cache = {}        # slave_id -> {PDU запроса: (истекает, PDU ответа)}
+        self._in_flight = {}    # (slave_id, PDU запроса, поколение) -> Future
+        self._generation = {}   # slave_id -> число записей
+        self._slaves = {}       # slave_id -> asyncio.Lock
+        self._clients = set()
+
+    async def _upstream(self):
+        if self.client is not None and self.client.connected:
+            return self.client
+        async with self._connecting:
+            if self.client is None or not self.client.connected:
+                if self.client is not None:
+                    await self.client.close()
+                client = AsyncRelayClient(self.host, self.port, timeout=self.timeout,
+                                          max_in_flight=self.max_in_flight,
+                                          timeouts=TimeoutPolicy(self.timeout,
+                                                                 ceiling=self.timeout))
+                try:
+                    await client.connect()
+                except (OSError, asyncio.TimeoutError) as e:
+                    raise ConnectionLost(f'{self.host}:{self.port}: {e or "таймаут"}') from None
+                self.client = client
+        return self.client
+
+    def invalidate(self, slave_id=None):
+        """Сбросить кэш платы (или всех плат)."""
+        if slave_id is None:
+            self._cache.clear()
+            for key in self._generation:
+                self._generation[key] += 1
+        else:
+            self._cache.pop(slave_id, None)
+            self._generation[slave_id] = self._generation.get(slave_id, 0) + 1
+
+    async def _forward(self, slave_id, request):
+        """Запрос к Gateway по очереди платы; ошибка — ответ-исключение."""
+        lock = self._slaves.get(slave_id)
+        if lock is None:
+            lock = self._slaves[slave_id] = asyncio.Lock()
+        async with lock:
+            self.stats.upstream += 1
+            try:
+                client = await self._upstream()
+                return await client.execute(slave_id, request)
+            except RelayTimeout:
+                code = GATEWAY_TARGET_FAILED
+            except ConnectionLost:
+                code = GATEWAY_PATH_UNAVAILABLE
+            except RelayError:
+                # Например, кончились Transaction ID: клиент все равно получает ответ
+                code = GATEWAY_TARGET_FAILED
+        self.stats.errors += 1
+        return bytes((request[0] | 0x80, code))
+
+    async def _read(self, slave_id, request):
+        cache = self._cache.get(slave_id)
+        if cache is not None:
+            entry = cache.get(request)
+            if entry is not None and entry[0] > time.monotonic():
+                self.stats.cache_hits += 1
+                return entry[1]
+        # Чтение после записи не присоединяется к чтению, отправленному до нее
+        generation = self._generation.get(slave_id, 0)
+        key = (slave_id, request, generation)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.shared += 1
+            return await asyncio.shield(future)
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            response = await self._forward(slave_id, request)
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+        # Ответы-исключения и чтения, пересекшиеся с записью, не кэшируются
+        if self.ttl and not response[0] & 0x80 and generation == self._generation.get(slave_id, 0):
+            self._cache.setdefault(slave_id, {})[request] = (time.monotonic() + self.ttl, response)
+        future.set_result(response)
+        return response
+
+    async def _write(self, slave_id, request):
+        self.invalidate(slave_id)
+        try:
+            return await self._forward(slave_id, request)
+        finally:
+            self.invalidate(slave_id)
+
+    async def execute(self, slave_id, request):
+        """PDU запроса клиента -> PDU ответа (из кэша или от Gateway)."""
+        self.stats.requests += 1
+        if request[0] in CACHED:
+            return await self._read(slave_id, request)
+        if request[0] in WRITES:
+            return await self._write(slave_id, request)
+        return await self._forward(slave_id, request)
+
+    async def _handle(self, reader, writer):
+        """Соединение клиента: запросы выполняются параллельно, ответы — по готовности."""
+        self.stats.clients += 1
+        self._clients.add(writer)
+        tasks = set()
+
+        async def answer(tid, slave_id, request):
+            response = await self.execute(slave_id, request)
+            if not writer.is_closing():
+                writer.write(pdu.mbap(tid, slave_id, response))
+
+        try:
+            while True:
+                header = await reader.readexactly(pdu.MBAP_HEADER.size)
+                tid, protocol, length, slave_id = pdu.MBAP_HEADER.unpack(header)
+                if protocol != 0 or not 2 <= length <= MAX_PDU + 1:
+                    break
+                request = await reader.readexactly(length - 1)
+                task = asyncio.create_task(answer(tid, slave_id, request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._clients.discard(writer)
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=5020):
+        """Сервер Modbus TCP для клиентов; соединение с Gateway — при первом запросе."""
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def close(self):
+        for writer in list(self._clients):
+            writer.close()
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
@@ -0,0 +1,155 @@
+"""
+Драйвер 32-канальной релейной платы Waveshare.
+
+Состояние платы хранится как 32-битная маска: бит N соответствует каналу N+1
+(адрес coil N). Если меняется больше одного канала, вся маска уходит одним
+кадром FC15 (write multiple coils) вместо серии FC05.
+
+RelayBoard хранит теневую копию состояния (``state``) и в ``apply`` шлёт
+только кадры, покрывающие изменившиеся каналы (см. ``src.shadow``).
+Обмен идет через транспорт (``src.transport``); клиент pymodbus или
+GatewaySession оборачиваются в PymodbusTransport автоматически.
+"""
+
+from collections import namedtuple
+
+from src.shadow import FRAME_GAP_CHARS, plan_frames
+from src.transport import as_transport
+
+CHANNELS = 32
+ALL_OFF = 0
+ALL_ON = (1 << CHANNELS) - 1
+
+# channel — индекс канала (0..31), expected/actual — bool
+Mismatch = namedtuple('Mismatch', 'channel expected actual')
+
+
+def mask_to_bits(mask, count=CHANNELS):
+    """Маска -> список bool для write_coils (младший бит = coil 0)."""
+    return [bool(mask >> i & 1) for i in range(count)]
+
+
+def _runs(channels):
+    """Отсортированные каналы -> (первый, количество) подряд идущих."""
+    runs = []
+    for ch in channels:
+        if runs and runs[-1][0] + runs[-1][1] == ch:
+            runs[-1][1] += 1
+        else:
+            runs.append([ch, 1])
+    return [tuple(run) for run in runs]
+
+
+def bits_to_mask(bits):
+    """Список bool (как из read_coils) -> маска."""
+    mask = 0
+    for i, bit in enumerate(bits):
+        if bit:
+            mask |= 1 << i
+    return mask
+
+
+class RelayBoard:
+    """
+    Одна релейная плата (Slave ID) за Gateway.
+
+    ``state`` — теневая маска последнего подтвержденного состояния платы,
+    None пока состояние неизвестно (после создания или ошибки записи).
+    ``target`` — маска, которую запрашивали последней (не сбрасывается
+    при ошибке записи); с ней сверяет ``verify``.
+    """
+
+    def __init__(self, transport, slave_id=1, channels=CHANNELS,
+                 frame_overhead=FRAME_GAP_CHARS):
+        self.transport = as_transport(transport)
+        self.slave_id = slave_id
+        self.channels = channels
+        self.frame_overhead = frame_overhead
+        self.state = None
+        self.target = None
+
+    def _merge(self, mask, address, values):
+        """Маска после записи ``values`` с адреса ``address`` (None — неизвестно)."""
+        if mask is None and not (address == 0 and len(values) == self.channels):
+            return None
+        mask = mask or 0
+        for i, value in enumerate(values):
+            bit = 1 << (address + i)
+            mask = mask | bit if value else mask & ~bit
+        return mask
+
+    def _write(self, address, values):
+        """FC05 для одного coil, FC15 для нескольких; обновляет тень."""
+        self.target = self._merge(self.target, address, values)
+        try:
+            if len(values) == 1:
+                self.transport.write_coil(self.slave_id, address, values[0])
+            else:
+                self.transport.write_coils(self.slave_id, address, values)
+        except Exception:
+            self.state = None
+            raise
+        self.state = self._merge(self.state, address, values)
+
+    def set_coil(self, channel, value):
+        """Один канал (0..31) — FC05."""
+        self._write(channel, [value])
+
+    def set_channels(self, channels, value):
+        """
+        Несколько каналов (0..31) в ``value``, остальные не трогаются.
+
+        Подряд идущие каналы — одним FC15, одиночные — FC05. Возвращает
+        число отправленных кадров.
+        """
+        runs = _runs(sorted(set(channels)))
+        for first, count in runs:
+            self._write(first, [value] * count)
+        return len(runs)
+
+    def write_mask(self, mask):
+        """Состояние всех каналов одним кадром FC15."""
+        self._write(0, mask_to_bits(mask, self.channels))
+
+    def apply(self, mask):
+        """
+        Привести плату к маске ``mask``, отправив минимум кадров.
+
+        Возвращает число отправленных кадров (0, если состояние совпадает
+        с теневым).
+        """
+        frames = plan_frames(self.state, mask, self.channels, self.frame_overhead)
+        for frame in frames:
+            self._write(frame.address, frame.values)
+        return len(frames)
+
+    def sync(self):
+        """Прочитать фактическое состояние (FC01) в тень."""
+        self.state = bits_to_mask(self.transport.read_coils(self.slave_id, 0, self.channels))
+        return self.state
+
+    def verify(self, expected=None):
+        """
+        Сверить фактическое состояние (одно чтение FC01 всех каналов) с маской.
+
+        По умолчанию сверяется с последней запрошенной маской (``target``).
+        Возвращает список Mismatch (пустой — всё совпало); тень
+        обновляется фактическим состоянием.
+        """
+        expected = self.target if expected is None else expected
+        actual = self.sync()
+        if expected is None:
+            return []
+        diff = expected ^ actual
+        return [Mismatch(ch, bool(expected >> ch & 1), bool(actual >> ch & 1))
+                for ch in range(self.channels) if diff >> ch & 1]
+
+    def invalidate(self):
+        """Забыть теневое состояние: следующий ``apply`` перепишет все каналы."""
+        self.state = None
+
+    def all_off(self):
+        return self.apply(ALL_OFF)
+
+    def all_on(self):
+        return self.apply((1 << self.channels) - 1)
@@ -0,0 +1,108 @@
+"""
+Адаптивные таймауты запросов по измеренному RTT (как RTO в TCP, RFC 6298).
+
+На каждый Slave ID ведется сглаженный RTT (SRTT) и его разброс (RTTVAR):
+    RTTVAR = 3/4 * RTTVAR + 1/4 * |SRTT - RTT|
+    SRTT   = 7/8 * SRTT   + 1/8 * RTT
+    RTO    = SRTT + max(4 * RTTVAR, SRTT / 2)
+с ограничением ``floor`` <= RTO <= ``ceiling``. Запас SRTT/2 не дает
+таймауту схлопнуться до SRTT на идеально стабильной линии (там RTTVAR
+стремится к нулю, а TCP спасает гранулярность часов).
+
+Исправная плата с RTT ~30 мс получает таймаут порядка 50-100 мс вместо
+фиксированных 2-3 сек; медленная линия (9600 бод, длинные кадры FC15,
+очередь на шине) — больше за счет SRTT и разброса. После таймаута RTO
+этой платы удваивается, но не больше ``MAX_BACKOFF`` раз подряд (в отличие
+от TCP здесь каждый запрос новый, а не повтор того же сегмента: выключенная
+плата иначе быстро дошла бы до ``ceiling`` на каждом обращении), и
+возвращается к оценке при следующем ответе. Slave ID без замеров получает
+RTO всего транспорта (по всем платам): молчащий адрес при сканировании или
+в серии не держит секунды, если остальные платы отвечают быстро.
+"""
+
+ALPHA = 1 / 8
+BETA = 1 / 4
+K = 4
+MAX_BACKOFF = 2  # удвоений подряд: RTO после таймаутов — не больше 4x оценки
+
+
+class RttEstimator:
+    """SRTT/RTTVAR/RTO одного направления (Slave ID или транспорт целиком)."""
+
+    __slots__ = ('floor', 'ceiling', 'srtt', 'rttvar', 'rto', 'base', 'backoffs', 'samples')
+
+    def __init__(self, initial=1.0, floor=0.05, ceiling=3.0):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.srtt = None
+        self.rttvar = None
+        self.rto = self.base = min(max(initial, floor), ceiling)
+        self.backoffs = 0
+        self.samples = 0
+
+    def observe(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+        self.samples += 1
+        rto = self.srtt + max(K * self.rttvar, self.srtt / 2)
+        self.rto = self.base = min(max(rto, self.floor), self.ceiling)
+        self.backoffs = 0
+
+    def backoff(self):
+        """Таймаут: следующий запрос ждет вдвое дольше (до MAX_BACKOFF раз)."""
+        if self.backoffs < MAX_BACKOFF:
+            self.backoffs += 1
+            self.rto = min(self.base * 2 ** self.backoffs, self.ceiling)
+
+    def __str__(self):
+        if self.srtt is None:
+            return f'RTO {self.rto * 1000:.0f} мс (нет замеров)'
+        return (f'SRTT {self.srtt * 1000:.1f} мс, RTTVAR {self.rttvar * 1000:.1f} мс, '
+                f'RTO {self.rto * 1000:.0f} мс ({self.samples} замеров)')
+
+
+class TimeoutPolicy:
+    """
+    Таймауты одного транспорта: оценка на каждый Slave ID и общая.
+
+    Транспорт спрашивает ``timeout(slave_id)`` перед запросом, сообщает
+    ``observe`` с RTT после ответа и ``expired`` после таймаута.
+    """
+
+    def __init__(self, initial=1.0, floor=0.05, ceiling=3.0):
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self.link = RttEstimator(initial, floor, ceiling)
+        self.slaves = {}
+
+    def _slave(self, slave_id):
+        estimator = self.slaves.get(slave_id)
+        if estimator is None:
+            estimator = self.slaves[slave_id] = RttEstimator(
+                self.link.rto, self.floor, self.ceiling)
+        return estimator
+
+    def timeout(self, slave_id):
+        estimator = self.slaves.get(slave_id)
+        if estimator is not None:
+            return estimator.rto
+        return self.link.rto
+
+    def observe(self, slave_id, rtt):
+        self._slave(slave_id).observe(rtt)
+        self.link.observe(rtt)
+
+    def expired(self, slave_id):
+        # Общая оценка не растет: молчит одна плата, а не вся линия
+        self._slave(slave_id).backoff()
+
+    def __str__(self):
+        lines = [f'транспорт: {self.link}']
+        lines += [f'Slave {slave_id}: {estimator}'
+                  for slave_id, estimator in sorted(self.slaves.items())]
+        return '\n'.join(lines)
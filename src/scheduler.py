@@ -0,0 +1,116 @@
+"""
+Планировщик шагов последовательности по дедлайнам ``time.monotonic``.
+
+Шаг N стартует в ``start + N * interval`` независимо от того, сколько
+заняли запись в плату и вывод на экран: время ввода-вывода вычитается
+из ожидания, а ошибка не накапливается даже за тысячи шагов. Последний
+отрезок ожидания (``spin``) проходит активным циклом — ``time.sleep``
+на многих системах просыпается с опозданием на 0.5-1 мс, что заметно
+при шаге 10-20 мс.
+
+Если шаг опоздал больше чем на интервал (медленный ответ платы),
+следующий стартует сразу, а расписание не сдвигается; такие шаги
+считаются в ``overruns``.
+"""
+
+import time
+
+from src.bench import percentile
+
+
+class JitterStats:
+    """Отклонение фактического старта шагов от дедлайнов."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lateness = []
+        self.overruns = 0
+        self.elapsed = 0.0
+
+    def add(self, late):
+        self.lateness.append(late)
+        if late > self.interval:
+            self.overruns += 1
+
+    @property
+    def count(self):
+        return len(self.lateness)
+
+    def merge(self, other):
+        """Добавить шаги другого прогона с тем же интервалом (для итогов)."""
+        self.lateness.extend(other.lateness)
+        self.overruns += other.overruns
+        self.elapsed += other.elapsed
+        return self
+
+    def as_dict(self):
+        ordered = sorted(self.lateness)
+
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            'steps': self.count,
+            'interval_ms': ms(self.interval),
+            'mean_ms': ms(sum(ordered) / len(ordered)) if ordered else None,
+            'p50_ms': ms(percentile(ordered, 50)),
+            'p95_ms': ms(percentile(ordered, 95)),
+            'p99_ms': ms(percentile(ordered, 99)),
+            'max_ms': ms(ordered[-1] if ordered else None),
+            'overruns': self.overruns,
+            'elapsed_s': round(self.elapsed, 3),
+        }
+
+    def __str__(self):
+        if not self.lateness:
+            return 'шагов нет'
+        d = self.as_dict()
+        return (f'{d["steps"]} шагов по {d["interval_ms"]:g} мс: опоздание p50 {d["p50_ms"]:.2f} / '
+                f'p95 {d["p95_ms"]:.2f} / p99 {d["p99_ms"]:.2f} / max {d["max_ms"]:.2f} мс, '
+                f'пропусков {d["overruns"]}')
+
+
+class DeadlineScheduler:
+    def __init__(self, interval, spin=0.002, clock=time.monotonic, sleep=time.sleep):
+        self.interval = interval
+        self.spin = spin
+        self.clock = clock
+        self.sleep = sleep
+
+    def wait_until(self, deadline):
+        """Дождаться момента ``deadline``; возвращает опоздание (>= 0)."""
+        clock = self.clock
+        remaining = deadline - clock()
+        if remaining > self.spin:
+            self.sleep(remaining - self.spin)
+        while clock() < deadline:
+            pass
+        return clock() - deadline
+
+    def run(self, steps, action):
+        """
+        Выполнить ``action(step)`` для каждого шага; первый — сразу.
+
+        Возвращает JitterStats.
+        """
+        stats = JitterStats(self.interval)
+        start = self.clock()
+        for n, step in enumerate(steps):
+            stats.add(self.wait_until(start + n * self.interval))
+            action(step)
+        stats.elapsed = self.clock() - start
+        return stats
+
+    def run_at(self, offsets, action):
+        """
+        Выполнить ``action(i)`` в моменты ``start + offsets[i]`` (сек от старта).
+
+        Для шагов разной длительности; возвращает JitterStats.
+        """
+        stats = JitterStats(self.interval)
+        start = self.clock()
+        for i, offset in enumerate(offsets):
+            stats.add(self.wait_until(start + offset))
+            action(i)
+        stats.elapsed = self.clock() - start
+        return stats
@@ -0,0 +1,174 @@
+"""
+Долгоживущая сессия с Gateway: одно TCP-соединение на (host, port).
+
+Все скрипты берут сессию через ``get_session(host, port)`` вместо того,
+чтобы создавать собственный ModbusTcpClient. Сессия:
+
+* переиспользует соединение между вызовами и между платами;
+* включает TCP keepalive, чтобы простаивающее соединение не умирало молча;
+* при обрыве ("Connection reset by peer" после перезагрузки Gateway)
+  переподключается с экспоненциальной задержкой и случайным разбросом;
+* повторяет идемпотентные запросы (чтения и записи абсолютных значений
+  FC05/FC06/FC15/FC16) после переподключения.
+
+Сессия повторяет интерфейс ModbusTcpClient (``connect``, ``close``,
+``write_coil`` ...), поэтому RelayBoard принимает её как обычный клиент.
+"""
+
+import random
+import socket
+import time
+
+from pymodbus.client import ModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from src.errors import ConnectionLost, RelayTimeout
+
+# Методы, которые безопасно отправить повторно: результат не зависит
+# от того, сколько раз запрос дошел до платы
+IDEMPOTENT = frozenset({
+    'read_coils', 'read_discrete_inputs',
+    'read_holding_registers', 'read_input_registers',
+    'write_coil', 'write_coils', 'write_register', 'write_registers',
+})
+
+_sessions = {}
+
+
+def get_session(host, port=502, **kwargs):
+    """Общая сессия для (host, port); создается при первом обращении."""
+    key = (host, port)
+    if key not in _sessions:
+        _sessions[key] = GatewaySession(host, port, **kwargs)
+    return _sessions[key]
+
+
+def close_all():
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
+
+
+def _enable_keepalive(sock, idle=10, interval=3, count=3):
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # Linux: TCP_KEEPIDLE, macOS: TCP_KEEPALIVE
+    idle_option = getattr(socket, 'TCP_KEEPIDLE', getattr(socket, 'TCP_KEEPALIVE', None))
+    for option, value in ((idle_option, idle),
+                          (getattr(socket, 'TCP_KEEPINTVL', None), interval),
+                          (getattr(socket, 'TCP_KEEPCNT', None), count)):
+        if option is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, option, value)
+            except OSError:
+                pass
+
+
+class GatewaySession:
+    def __init__(self, host, port=502, timeout=3, retries=3,
+                 reconnect_delay=0.1, reconnect_delay_max=10, keepalive=10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_delay_max = reconnect_delay_max
+        self.keepalive = keepalive
+        self.reconnects = 0
+        self.client = None
+
+    def __repr__(self):
+        return f'GatewaySession({self.host}:{self.port})'
+
+    @property
+    def connected(self):
+        return self.client is not None and getattr(self.client, 'socket', None) is not None
+
+    def _open(self):
+        if self.client is None:
+            # retries=0: повторами управляет сессия, иначе два слоя повторов перемножаются
+            self.client = ModbusTcpClient(host=self.host, port=self.port, timeout=self.timeout,
+                                          retries=0)
+        if not self.client.connect():
+            return False
+        sock = getattr(self.client, 'socket', None)
+        if self.keepalive and sock is not None:
+            _enable_keepalive(sock, idle=self.keepalive)
+        return True
+
+    def _backoff(self, attempt):
+        """Full jitter: случайная задержка от 0 до base * 2^attempt."""
+        ceiling = min(self.reconnect_delay_max, self.reconnect_delay * 2 ** attempt)
+        time.sleep(random.uniform(0, ceiling))
+
+    def connect(self, attempts=None):
+        """Подключиться (с повторами); True при успехе, как у ModbusTcpClient."""
+        if self.connected:
+            return True
+        attempts = self.retries + 1 if attempts is None else attempts
+        for attempt in range(attempts):
+            if attempt:
+                self._backoff(attempt)
+            if self._open():
+                return True
+        return False
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+
+    def execute(self, method, *args, **kwargs):
+        """
+        Вызов метода клиента с переподключением при обрыве.
+
+        Неидемпотентные вызовы не повторяются. Нет ответа — не больше одной
+        повторной отправки: молчащая плата стоит двух таймаутов, а не
+        ``retries``. Последняя ошибка пробрасывается как ConnectionLost
+        (обрыв) или RelayTimeout (нет ответа).
+        """
+        retries = self.retries if method in IDEMPOTENT else 0
+        unanswered = 0
+        for attempt in range(retries + 1):
+            if attempt:
+                self._backoff(attempt)
+            if not self.connected and not self._open():
+                error = ConnectionLost(f'{self.host}:{self.port}: нет соединения')
+                continue
+            try:
+                return getattr(self.client, method)(*args, **kwargs)
+            except ModbusIOException as e:
+                # Нет ответа: соединение живо, запрос повторяется один раз
+                error = RelayTimeout(f'{self.host}:{self.port}: {e}')
+                error.__cause__ = e
+                unanswered += 1
+                if unanswered > 1:
+                    break
+            except (ConnectionException, OSError) as e:
+                error = ConnectionLost(f'{self.host}:{self.port}: {e}')
+                error.__cause__ = e
+                self.close()
+                self.reconnects += 1
+        raise error
+
+    def read_coils(self, *args, **kwargs):
+        return self.execute('read_coils', *args, **kwargs)
+
+    def read_discrete_inputs(self, *args, **kwargs):
+        return self.execute('read_discrete_inputs', *args, **kwargs)
+
+    def read_holding_registers(self, *args, **kwargs):
+        return self.execute('read_holding_registers', *args, **kwargs)
+
+    def read_input_registers(self, *args, **kwargs):
+        return self.execute('read_input_registers', *args, **kwargs)
+
+    def write_coil(self, *args, **kwargs):
+        return self.execute('write_coil', *args, **kwargs)
+
+    def write_coils(self, *args, **kwargs):
+        return self.execute('write_coils', *args, **kwargs)
+
+    def write_register(self, *args, **kwargs):
+        return self.execute('write_register', *args, **kwargs)
+
+    def write_registers(self, *args, **kwargs):
+        return self.execute('write_registers', *args, **kwargs)
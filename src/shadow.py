@@ -0,0 +1,76 @@
+"""
+Планирование минимального набора кадров FC05/FC15 по разнице состояний.
+
+Стоимость считается в символах RS485 (запрос + ответ + паузы между кадрами):
+    FC05: 8 + 8 байт
+    FC15: 9 + ceil(N/8) + 8 байт для N coils
+Каждый кадр дополнительно платит ``frame_overhead`` (по умолчанию две паузы
+по 3.5 символа). Изменённые каналы разбиваются на непрерывные диапазоны
+так, чтобы суммарная стоимость была минимальной: соседние изменения
+выгоднее объединять в один FC15, одиночные — отправлять как FC05.
+"""
+
+from collections import namedtuple
+
+FC05_BYTES = 8 + 8
+FRAME_GAP_CHARS = 2 * 3.5
+
+
+def fc15_bytes(count):
+    return 9 + (count + 7) // 8 + 8
+
+
+class Frame(namedtuple('Frame', 'address values')):
+    """Один кадр записи: ``values`` из одного элемента — FC05, иначе FC15."""
+
+    __slots__ = ()
+
+    @property
+    def function_code(self):
+        return 5 if len(self.values) == 1 else 15
+
+
+def frame_cost(count, frame_overhead=FRAME_GAP_CHARS):
+    """Стоимость кадра, покрывающего ``count`` подряд идущих coils."""
+    wire = FC05_BYTES if count == 1 else fc15_bytes(count)
+    return wire + frame_overhead
+
+
+def plan_frames(old, new, channels=32, frame_overhead=FRAME_GAP_CHARS):
+    """
+    Кадры, переводящие плату из маски ``old`` в ``new``.
+
+    Если ``old`` равен None (состояние неизвестно), возвращается один FC15
+    на все каналы. Каналы внутри диапазона FC15, которые не менялись,
+    перезаписываются своим текущим значением.
+    """
+    if old is None:
+        return [Frame(0, [bool(new >> i & 1) for i in range(channels)])]
+
+    diff = (old ^ new) & ((1 << channels) - 1)
+    changed = [i for i in range(channels) if diff >> i & 1]
+    if not changed:
+        return []
+
+    # best[j] — минимальная стоимость покрытия changed[:j], cut[j] — начало
+    # последнего кадра в этом покрытии
+    best = [0.0] * (len(changed) + 1)
+    cut = [0] * (len(changed) + 1)
+    for j in range(1, len(changed) + 1):
+        best[j] = float('inf')
+        for i in range(j):
+            span = changed[j - 1] - changed[i] + 1
+            cost = best[i] + frame_cost(span, frame_overhead)
+            if cost < best[j]:
+                best[j] = cost
+                cut[j] = i
+
+    frames = []
+    j = len(changed)
+    while j:
+        i = cut[j]
+        start, end = changed[i], changed[j - 1]
+        frames.append(Frame(start, [bool(new >> ch & 1) for ch in range(start, end + 1)]))
+        j = i
+    frames.reverse()
+    return frames
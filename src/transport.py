@@ -0,0 +1,613 @@
+"""
+Транспорты: единый синхронный интерфейс запросов к платам.
+
+Все транспорты принимают Slave ID первым аргументом и возвращают
+разобранный результат: чтения coils — list[bool], регистров — list[int],
+записи — None. Ошибки Modbus поднимаются как исключения из ``src.errors``.
+
+PymodbusTransport работает поверх ModbusTcpClient или GatewaySession.
+Имя аргумента Slave ID в pymodbus менялось (``unit`` в 2.x, ``slave``
+в ранних 3.x, ``device_id`` в 3.10+); оно определяется один раз по
+сигнатуре ModbusTcpClient, а не перебором TypeError на каждом запросе.
+
+pymodbus и pyserial импортируются только при первом использовании
+(PymodbusTransport, открытие порта RtuSerialTransport): транспорты на
+socket не платят за их импорт (~100 мс у pymodbus) при запуске скрипта.
+
+FramedTransport — транспорты с собственным обрамлением кадров поверх
+``src.pdu`` (RawTcpTransport — Modbus TCP прямо через socket,
+RtuSerialTransport — Modbus RTU через USB-RS485, RtuTcpTransport — Modbus
+RTU поверх TCP в прозрачном режиме Gateway). Они умеют отправлять
+заранее собранные кадры (``frame`` + ``exchange``), что нужно для
+воспроизведения скомпилированных паттернов без сборки кадров на лету.
+С ``timeouts`` (``src.rtt.TimeoutPolicy``) таймаут каждого обмена
+берется из RTT платы, а не фиксированный ``timeout`` (он остается
+таймаутом подключения).
+"""
+
+import socket
+import time
+
+from src import pdu
+from src.errors import ConnectionLost, ModbusExceptionError, RelayError, RelayTimeout
+
+serial = None  # pyserial, импортируется при первом открытии порта
+_slave_kwarg = None
+
+
+def _detect_slave_kwarg():
+    import inspect
+
+    from pymodbus.client import ModbusTcpClient
+
+    try:
+        params = inspect.signature(ModbusTcpClient.write_coil).parameters
+    except (TypeError, ValueError):
+        return 'unit'
+    for name in ('device_id', 'slave', 'unit'):
+        if name in params:
+            return name
+    # pymodbus 2.x: unit передается через **kwargs
+    return 'unit'
+
+
+def slave_kwarg():
+    """Имя аргумента Slave ID в установленном pymodbus (определяется один раз)."""
+    global _slave_kwarg
+    if _slave_kwarg is None:
+        _slave_kwarg = _detect_slave_kwarg()
+    return _slave_kwarg
+
+
+def __getattr__(name):
+    # SLAVE_KWARG по-прежнему доступен, но pymodbus импортируется при обращении
+    if name == 'SLAVE_KWARG':
+        return slave_kwarg()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def _load_serial():
+    global serial
+    if serial is None:
+        try:
+            import serial as module
+        except ImportError:
+            raise RelayError('pyserial не установлен: pip install pyserial') from None
+        serial = module
+    return serial
+
+
+class Transport:
+    """
+    Базовый класс транспорта; наследники реализуют все методы.
+
+    ``name`` — метка для сообщений и метрик (``host:port`` или устройство),
+    ``framing`` — байт обрамления на кадр (MBAP — 7, RTU — 3).
+    """
+
+    name = '?'
+    framing = pdu.MBAP_HEADER.size
+
+    def connect(self):
+        return True
+
+    def close(self):
+        pass
+
+    def read_coils(self, slave_id, address, count):
+        raise NotImplementedError
+
+    def read_discrete_inputs(self, slave_id, address, count):
+        raise NotImplementedError
+
+    def read_holding_registers(self, slave_id, address, count):
+        raise NotImplementedError
+
+    def read_input_registers(self, slave_id, address, count):
+        raise NotImplementedError
+
+    def write_coil(self, slave_id, address, value):
+        raise NotImplementedError
+
+    def write_coils(self, slave_id, address, values):
+        raise NotImplementedError
+
+    def write_register(self, slave_id, address, value):
+        raise NotImplementedError
+
+    def write_registers(self, slave_id, address, values):
+        raise NotImplementedError
+
+
+def _check(slave_id, function_code, result):
+    if hasattr(result, 'isError') and result.isError():
+        exception_code = getattr(result, 'exception_code', None)
+        if exception_code is not None:
+            raise ModbusExceptionError(slave_id, function_code, exception_code)
+        raise RelayError(f'Slave {slave_id}: {result}')
+    return result
+
+
+class PymodbusTransport(Transport):
+    """Транспорт поверх ModbusTcpClient / GatewaySession."""
+
+    def __init__(self, client):
+        self.client = client
+        params = getattr(client, 'comm_params', client)
+        self.name = f'{getattr(params, "host", "?")}:{getattr(params, "port", "?")}'
+        self._slave = slave_kwarg()
+        self._read_coils = client.read_coils
+        self._read_discrete_inputs = client.read_discrete_inputs
+        self._read_holding_registers = client.read_holding_registers
+        self._read_input_registers = client.read_input_registers
+        self._write_coil = client.write_coil
+        self._write_coils = client.write_coils
+        self._write_register = client.write_register
+        self._write_registers = client.write_registers
+
+    def connect(self):
+        return self.client.connect()
+
+    def close(self):
+        self.client.close()
+
+    def read_coils(self, slave_id, address, count):
+        result = self._read_coils(address, count=count, **{self._slave: slave_id})
+        return _check(slave_id, 1, result).bits[:count]
+
+    def read_discrete_inputs(self, slave_id, address, count):
+        result = self._read_discrete_inputs(address, count=count, **{self._slave: slave_id})
+        return _check(slave_id, 2, result).bits[:count]
+
+    def read_holding_registers(self, slave_id, address, count):
+        result = self._read_holding_registers(address, count=count, **{self._slave: slave_id})
+        return list(_check(slave_id, 3, result).registers)
+
+    def read_input_registers(self, slave_id, address, count):
+        result = self._read_input_registers(address, count=count, **{self._slave: slave_id})
+        return list(_check(slave_id, 4, result).registers)
+
+    def write_coil(self, slave_id, address, value):
+        _check(slave_id, 5, self._write_coil(address, bool(value), **{self._slave: slave_id}))
+
+    def write_coils(self, slave_id, address, values):
+        _check(slave_id, 15, self._write_coils(address, [bool(v) for v in values],
+                                               **{self._slave: slave_id}))
+
+    def write_register(self, slave_id, address, value):
+        _check(slave_id, 6, self._write_register(address, value, **{self._slave: slave_id}))
+
+    def write_registers(self, slave_id, address, values):
+        _check(slave_id, 16, self._write_registers(address, list(values),
+                                                   **{self._slave: slave_id}))
+
+
+class FramedTransport(Transport):
+    """
+    Транспорт с собственным обрамлением.
+
+    Наследники реализуют ``frame`` (PDU -> кадр на проводе), ``payload``
+    (кадр -> PDU), ``address`` (кадр -> Slave ID) и ``exchange``
+    (отправить кадр, вернуть кадр ответа).
+    """
+
+    timeouts = None
+
+    def frame(self, slave_id, request, tid=0):
+        raise NotImplementedError
+
+    def address(self, frame):
+        raise NotImplementedError
+
+    def payload(self, reply):
+        raise NotImplementedError
+
+    def exchange(self, frame):
+        raise NotImplementedError
+
+    def request(self, slave_id, request):
+        reply = self.exchange(self.frame(slave_id, request))
+        return pdu.parse_response(slave_id, request, self.payload(reply))
+
+    def read_coils(self, slave_id, address, count):
+        return self.request(slave_id, pdu.read_coils(address, count))
+
+    def read_discrete_inputs(self, slave_id, address, count):
+        return self.request(slave_id, pdu.read_discrete_inputs(address, count))
+
+    def read_holding_registers(self, slave_id, address, count):
+        return self.request(slave_id, pdu.read_holding_registers(address, count))
+
+    def read_input_registers(self, slave_id, address, count):
+        return self.request(slave_id, pdu.read_input_registers(address, count))
+
+    def write_coil(self, slave_id, address, value):
+        self.request(slave_id, pdu.write_coil(address, value))
+
+    def write_coils(self, slave_id, address, values):
+        self.request(slave_id, pdu.write_coils(address, values))
+
+    def write_register(self, slave_id, address, value):
+        self.request(slave_id, pdu.write_register(address, value))
+
+    def write_registers(self, slave_id, address, values):
+        self.request(slave_id, pdu.write_registers(address, values))
+
+
+class RawTcpTransport(FramedTransport):
+    """
+    Modbus TCP напрямую через socket, по одному запросу за раз.
+
+    Transaction ID берется из кадра; ответ читается в заранее выделенный
+    буфер и возвращается как memoryview (действителен до следующего вызова).
+    После обрыва или таймаута ``exchange`` переподключается сам
+    (счетчик ``reconnects``).
+    """
+
+    def __init__(self, host, port=502, timeout=3, timeouts=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.timeouts = timeouts
+        self.name = f'{host}:{port}'
+        self.reconnects = 0
+        self.sock = None
+        self._tid = 0
+        self._buffer = bytearray(pdu.MBAP_HEADER.size + 256)
+        self._view = memoryview(self._buffer)
+
+    def connect(self):
+        if self.sock is None:
+            try:
+                self.sock = socket.create_connection((self.host, self.port), self.timeout)
+            except OSError:
+                return False
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def frame(self, slave_id, request, tid=None):
+        if tid is None:
+            self._tid = tid = (self._tid + 1) & 0xFFFF
+        return pdu.mbap(tid, slave_id, request)
+
+    def payload(self, reply):
+        return bytes(reply[pdu.MBAP_HEADER.size:])
+
+    def address(self, frame):
+        return frame[pdu.MBAP_HEADER.size - 1]
+
+    def _recv_into(self, view):
+        received = 0
+        while received < len(view):
+            n = self.sock.recv_into(view[received:])
+            if not n:
+                raise ConnectionLost(f'{self.host}:{self.port}: соединение закрыто')
+            received += n
+
+    def exchange(self, frame):
+        if self.sock is None:
+            if not self.connect():
+                raise ConnectionLost(f'{self.host}:{self.port}: нет соединения')
+            self.reconnects += 1
+        header = pdu.MBAP_HEADER.size
+        timeouts = self.timeouts
+        timeout = self.timeout if timeouts is None else timeouts.timeout(frame[header - 1])
+        if self.sock.gettimeout() != timeout:
+            self.sock.settimeout(timeout)
+        start = time.perf_counter()
+        try:
+            self.sock.sendall(frame)
+            while True:
+                self._recv_into(self._view[:header])
+                length = int.from_bytes(self._buffer[4:6], 'big')
+                end = header + length - 1
+                # Кривая длина — поток не разобрать дальше: сбрасываем соединение
+                if self._buffer[2:4] != b'\x00\x00' or not header < end <= len(self._buffer):
+                    raise RelayError(f'{self.host}:{self.port}: неверный MBAP заголовок '
+                                     f'{bytes(self._buffer[:header]).hex()}')
+                self._recv_into(self._view[header:end])
+                # Ответ на другой (просроченный) запрос пропускаем
+                if self._buffer[0:2] == frame[0:2]:
+                    if timeouts is not None:
+                        timeouts.observe(frame[header - 1], time.perf_counter() - start)
+                    return self._view[:end]
+        except socket.timeout:
+            if timeouts is not None:
+                timeouts.expired(frame[header - 1])
+            # Поздний ответ может прийти позже и сбить следующий обмен
+            self.close()
+            raise RelayTimeout(f'{self.host}:{self.port}: нет ответа за {timeout:.3g} сек') from None
+        except RelayError:
+            self.close()
+            raise
+        except OSError as e:
+            self.close()
+            raise ConnectionLost(f'{self.host}:{self.port}: {e}') from e
+
+
+class RtuFrameTable:
+    """
+    Готовые RTU кадры одной платы, собираются один раз.
+
+    ``coil[channel][value]`` — FC05 вкл/выкл для каждого канала (64 кадра
+    на 32 канала), ``all_off``/``all_on`` — FC15 всех каналов,
+    ``read_all`` — FC01 всех каналов.
+    """
+
+    def __init__(self, slave_id, channels=32):
+        self.slave_id = slave_id
+        self.channels = channels
+        self.coil = [
+            (pdu.rtu(slave_id, pdu.write_coil(ch, False)), pdu.rtu(slave_id, pdu.write_coil(ch, True)))
+            for ch in range(channels)
+        ]
+        self.all_off = pdu.rtu(slave_id, pdu.write_coils(0, [False] * channels))
+        self.all_on = pdu.rtu(slave_id, pdu.write_coils(0, [True] * channels))
+        self.read_all = pdu.rtu(slave_id, pdu.read_coils(0, channels))
+
+
+class RtuTransport(FramedTransport):
+    """
+    Общая часть транспортов Modbus RTU: кадры адрес + PDU + CRC16,
+    длина ответа определяется по его заголовку, а не по таймауту.
+
+    Записи FC05 и FC15 "все вкл/выкл" берут готовый кадр из RtuFrameTable:
+    на горячем пути нет ни сборки PDU, ни расчета CRC, а эхо FC05
+    проверяется сравнением с отправленным кадром.
+
+    Наследники задают ``name`` и реализуют ``exchange`` и ``_read(count)``.
+    """
+
+    framing = 3
+
+    def __init__(self):
+        self._tables = {}
+
+    def frames(self, slave_id):
+        """Таблица готовых кадров платы ``slave_id`` (создается при первом обращении)."""
+        table = self._tables.get(slave_id)
+        if table is None:
+            table = self._tables[slave_id] = RtuFrameTable(slave_id)
+        return table
+
+    def frame(self, slave_id, request, tid=0):
+        return pdu.rtu(slave_id, request)
+
+    def payload(self, reply):
+        return reply[1:-2]
+
+    def address(self, frame):
+        return frame[0]
+
+    def _read(self, count):
+        raise NotImplementedError
+
+    def _read_reply(self):
+        head = self._read(3)
+        return head + self._read(pdu.rtu_response_length(head) - 3)
+
+    def _check_reply(self, frame, reply):
+        if reply[0] != frame[0]:
+            raise RelayError(f'{self.name}: ответ от Slave {reply[0]} на запрос Slave {frame[0]}')
+        if not pdu.rtu_check(reply):
+            raise RelayError(f'{self.name}: ошибка CRC в ответе Slave {frame[0]}')
+
+    def _send(self, slave_id, frame):
+        reply = self.exchange(frame)
+        # Эхо FC05 совпадает с запросом байт в байт — разбирать нечего
+        if reply != frame:
+            pdu.parse_response(slave_id, frame[1:-2], self.payload(reply))
+
+    def write_coil(self, slave_id, address, value):
+        table = self.frames(slave_id)
+        if address < table.channels:
+            self._send(slave_id, table.coil[address][bool(value)])
+        else:
+            super().write_coil(slave_id, address, value)
+
+    def write_coils(self, slave_id, address, values):
+        table = self.frames(slave_id)
+        if address == 0 and len(values) == table.channels and len(set(map(bool, values))) == 1:
+            self._send(slave_id, table.all_on if values[0] else table.all_off)
+        else:
+            super().write_coils(slave_id, address, values)
+
+
+class RtuSerialTransport(RtuTransport):
+    """
+    Modbus RTU через последовательный порт (USB-RS485).
+
+    Порт открывается один раз и держится открытым (в отличие от
+    minimalmodbus с ``close_port_after_each_call``). Перед каждым запросом
+    выдерживается тишина 3.5 символа после последнего байта на линии.
+    """
+
+    def __init__(self, device, baudrate=9600, timeout=1, parity='N', stopbits=1, timeouts=None):
+        super().__init__()
+        self.device = self.name = device
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.timeouts = timeouts
+        self.parity = parity
+        self.stopbits = stopbits
+        self.serial = None
+        # Старт + 8 бит данных + четность + стоп
+        self.bits_per_char = 1 + 8 + (parity != 'N') + stopbits
+        self.frame_gap = pdu.rtu_frame_gap(baudrate, self.bits_per_char)
+        self._idle_since = 0.0
+
+    def connect(self):
+        if self.serial is None:
+            _load_serial()
+            try:
+                self.serial = serial.Serial(
+                    self.device, self.baudrate, bytesize=8, parity=self.parity,
+                    stopbits=self.stopbits, timeout=self.timeout,
+                )
+            except (OSError, serial.SerialException):
+                return False
+        return True
+
+    def close(self):
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+
+    def _read(self, count):
+        data = self.serial.read(count)
+        if len(data) < count:
+            raise RelayTimeout(f'{self.device}: нет ответа за {self.serial.timeout:.3g} сек')
+        return data
+
+    def exchange(self, frame):
+        if self.serial is None and not self.connect():
+            raise ConnectionLost(f'{self.device}: порт не открыт')
+        timeouts = self.timeouts
+        timeout = self.timeout if timeouts is None else timeouts.timeout(frame[0])
+        if self.serial.timeout != timeout:
+            # Установка таймаута перенастраивает порт — только при изменении
+            self.serial.timeout = timeout
+        silence = self._idle_since + self.frame_gap - time.perf_counter()
+        if silence > 0:
+            time.sleep(silence)
+        start = time.perf_counter()
+        try:
+            # Остатки просроченного ответа не должны попасть в этот обмен
+            self.serial.reset_input_buffer()
+            self.serial.write(frame)
+            reply = self._read_reply()
+        except RelayTimeout:
+            if timeouts is not None:
+                timeouts.expired(frame[0])
+            raise
+        except serial.SerialException as e:
+            self.close()
+            raise ConnectionLost(f'{self.device}: {e}') from e
+        finally:
+            self._idle_since = time.perf_counter()
+        if timeouts is not None:
+            timeouts.observe(frame[0], self._idle_since - start)
+        self._check_reply(frame, reply)
+        return reply
+
+
+class RtuTcpTransport(RtuTransport):
+    """
+    Modbus RTU поверх TCP ("Port3-RAW"): порт Gateway в прозрачном режиме.
+
+    Кадры RTU с CRC уходят в socket как есть, без MBAP заголовка; Gateway
+    не конвертирует TCP→RTU, а только передает байты на шину RS485.
+    Паузы между кадрами на шине выдерживает сам Gateway. После таймаута
+    или испорченного ответа соединение закрывается (в потоке без
+    Transaction ID поздний ответ иначе не отличить от нового) и следующий
+    ``exchange`` переподключается (счетчик ``reconnects``).
+    """
+
+    def __init__(self, host, port=502, timeout=3, timeouts=None):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.timeouts = timeouts
+        self.name = f'{host}:{port}'
+        self.reconnects = 0
+        self.sock = None
+
+    def connect(self):
+        if self.sock is None:
+            try:
+                self.sock = socket.create_connection((self.host, self.port), self.timeout)
+            except OSError:
+                return False
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _read(self, count):
+        data = b''
+        while len(data) < count:
+            chunk = self.sock.recv(count - len(data))
+            if not chunk:
+                raise ConnectionLost(f'{self.name}: соединение закрыто')
+            data += chunk
+        return data
+
+    def exchange(self, frame):
+        if self.sock is None:
+            if not self.connect():
+                raise ConnectionLost(f'{self.name}: нет соединения')
+            self.reconnects += 1
+        timeouts = self.timeouts
+        timeout = self.timeout if timeouts is None else timeouts.timeout(frame[0])
+        if self.sock.gettimeout() != timeout:
+            self.sock.settimeout(timeout)
+        start = time.perf_counter()
+        try:
+            self.sock.sendall(frame)
+            reply = self._read_reply()
+            self._check_reply(frame, reply)
+        except socket.timeout:
+            if timeouts is not None:
+                timeouts.expired(frame[0])
+            self.close()
+            raise RelayTimeout(f'{self.name}: нет ответа за {timeout:.3g} сек') from None
+        except RelayError:
+            self.close()
+            raise
+        except OSError as e:
+            self.close()
+            raise ConnectionLost(f'{self.name}: {e}') from e
+        if timeouts is not None:
+            timeouts.observe(frame[0], time.perf_counter() - start)
+        return reply
+
+
+def as_transport(client):
+    """Транспорт как есть; клиент pymodbus или сессия — в PymodbusTransport."""
+    if isinstance(client, Transport):
+        return client
+    return PymodbusTransport(client)
+
+
+def open_transport(kind, host, port=502, **kwargs):
+    """
+    Транспорт по имени (для скриптов и бенчмарков).
+
+    ``tcp``     — Modbus TCP через общую GatewaySession (pymodbus);
+    ``raw-tcp`` — Modbus TCP напрямую через socket (RawTcpTransport);
+    ``rtu``     — Modbus RTU через USB-RS485, ``host`` — путь к порту
+    (RtuSerialTransport, ``port`` не используется);
+    ``rtu-tcp`` — Modbus RTU поверх TCP, порт Gateway в прозрачном режиме
+    (RtuTcpTransport).
+    ``timeouts`` (TimeoutPolicy) передается всем, кроме ``tcp``: у pymodbus
+    таймаут задается на клиент целиком и остается фиксированным.
+    """
+    if kind == 'tcp':
+        from src.session import get_session
+        kwargs.pop('timeouts', None)
+        return PymodbusTransport(get_session(host, port, **kwargs))
+    if kind == 'raw-tcp':
+        transport = RawTcpTransport(host, port, **kwargs)
+        transport.connect()
+        return transport
+    if kind == 'rtu':
+        transport = RtuSerialTransport(host, **kwargs)
+        transport.connect()
+        return transport
+    if kind == 'rtu-tcp':
+        transport = RtuTcpTransport(host, port, **kwargs)
+        transport.connect()
+        return transport
+    raise ValueError(f'неизвестный транспорт: {kind}')
+
+
+TRANSPORT_KINDS = ('tcp', 'raw-tcp', 'rtu', 'rtu-tcp')
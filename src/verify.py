@@ -0,0 +1,61 @@
+"""
+Проверка фактического состояния плат чтением FC01.
+
+Одно чтение всех 32 coils на плату — после каждого шага (``step``) или
+после серии шагов (``batch``), а не после каждого канала. Время проверок
+копится отдельно от времени записей, чтобы было видно её цену.
+"""
+
+import time
+
+from src.errors import RelayError
+
+VERIFY_MODES = ('off', 'step', 'batch')
+
+
+class VerifyStats:
+    def __init__(self):
+        self.reads = 0
+        self.elapsed = 0.0
+        self.mismatches = []   # (slave_id, Mismatch)
+        self.errors = []       # (slave_id, исключение)
+
+    @property
+    def ok(self):
+        return not self.mismatches and not self.errors
+
+    def __str__(self):
+        avg = self.elapsed / self.reads * 1000 if self.reads else 0.0
+        return (f'проверок {self.reads}, {self.elapsed * 1000:.1f} мс '
+                f'(в среднем {avg:.2f} мс), расхождений {len(self.mismatches)}, '
+                f'ошибок чтения {len(self.errors)}')
+
+
+def verify_boards(boards, stats, expected=None):
+    """
+    Проверить платы ``boards``; ``expected`` — ``{slave_id: маска}``
+    (по умолчанию — последние запрошенные маски). Возвращает новые расхождения.
+    """
+    found = []
+    for board in boards:
+        start = time.perf_counter()
+        try:
+            mask = None if expected is None else expected.get(board.slave_id)
+            for mismatch in board.verify(mask):
+                found.append((board.slave_id, mismatch))
+        except RelayError as e:
+            stats.errors.append((board.slave_id, e))
+        finally:
+            stats.reads += 1
+            stats.elapsed += time.perf_counter() - start
+    stats.mismatches.extend(found)
+    return found
+
+
+def _on_off(value):
+    return 'ВКЛ' if value else 'ВЫКЛ'
+
+
+def format_mismatch(slave_id, mismatch):
+    return (f'Slave {slave_id}, канал {mismatch.channel + 1}: '
+            f'ожидалось {_on_off(mismatch.expected)}, фактически {_on_off(mismatch.actual)}')